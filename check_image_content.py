@@ -2,17 +2,44 @@
 """
 检查图像内容的简单脚本
 """
+import argparse
 import os
 import sys
-from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+from PIL import Image
 
 # 动态将项目根目录加入 Python 路径（脚本位于项目根目录）
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-def analyze_image(image_path):
-    """分析图像内容"""
+def _fused_stats(img_array):
+    """单次遍历计算亮度统计（平均值、标准差、最小值、最大值）
+
+    函数级注释：
+    - 对 uint8 图像先做一次 np.bincount 得到 256 档直方图，再在直方图上推导四项统计，
+      避免 np.mean/np.std/np.min/np.max 对整幅图像各扫描一遍；
+    - 非 uint8 数组回退到 NumPy 的逐项归约。
+    """
+    if img_array.dtype != np.uint8:
+        return float(np.mean(img_array)), float(np.std(img_array)), np.min(img_array), np.max(img_array)
+    return _histogram_stats(np.bincount(img_array.ravel(), minlength=256), img_array.size)
+
+def _histogram_stats(hist, total):
+    """基于 256 档直方图推导平均值、标准差、最小值与最大值"""
+    levels = np.arange(256, dtype=np.float64)
+    mean = float(levels @ hist) / total
+    std = float(np.sqrt(((levels - mean) ** 2) @ hist / total))
+    nonzero = np.flatnonzero(hist)
+    return mean, std, int(nonzero[0]), int(nonzero[-1])
+
+def analyze_image(image_path, compute_stats=True, save_preview=True):
+    """分析图像内容
+
+    参数：
+    - compute_stats: 是否计算 RGB/灰度统计信息与唯一颜色数量（开销最大的部分）；
+    - save_preview: 是否生成并保存缩略图。
+    """
     print(f"=== 分析图像: {image_path} ===")
     
     # 检查文件是否存在
@@ -31,51 +58,78 @@ def analyze_image(image_path):
         print(f"❌ 图像加载失败: {e}")
         return False
     
+    # 转换为numpy数组进行分析（预览像素同样直接从数组读取，避免逐像素 getpixel 调用）；
+    # 统计仅读取数组，使用 np.asarray 避免额外复制一份解码缓冲区
+    img_array = np.asarray(image)
+
     # 分析图像统计信息
-    if image.mode == 'RGB':
-        # 转换为numpy数组进行分析
-        import numpy as np
-        img_array = np.array(image)
-        
+    if compute_stats and image.mode in ('RGB', 'L'):
+        if image.mode == 'L':
+            # 灰度快速路径：一次 bincount 同时得到全部统计与唯一灰度数
+            hist = np.bincount(img_array.ravel(), minlength=256)
+            pixel_count = img_array.size
+            mean_val, std_val, min_val, max_val = _histogram_stats(hist, pixel_count)
+            unique_colors = int(np.count_nonzero(hist))
+        else:
+            pixel_count = img_array.size // 3
+            mean_val, std_val, min_val, max_val = _fused_stats(img_array)
+            # 检查是否为纯色图像
+            # 将每个像素的 3 字节视为一个 void 记录，对一维数组去重，避免 axis=0 的逐行字典序排序
+            packed = np.ascontiguousarray(img_array[..., :3]).view(np.dtype((np.void, 3))).reshape(-1)
+            unique_colors = len(np.unique(packed))
+
         print(f"\n📊 图像统计信息:")
-        print(f"   像素总数: {img_array.size // 3}")
-        print(f"   平均亮度: {np.mean(img_array):.2f}")
-        print(f"   亮度标准差: {np.std(img_array):.2f}")
-        print(f"   最小亮度: {np.min(img_array)}")
-        print(f"   最大亮度: {np.max(img_array)}")
-        
-        # 检查是否为纯色图像
-        unique_colors = len(np.unique(img_array.reshape(-1, 3), axis=0))
+        print(f"   像素总数: {pixel_count}")
+        print(f"   平均亮度: {mean_val:.2f}")
+        print(f"   亮度标准差: {std_val:.2f}")
+        print(f"   最小亮度: {min_val}")
+        print(f"   最大亮度: {max_val}")
         print(f"   唯一颜色数量: {unique_colors}")
         
         if unique_colors <= 10:
             print("⚠️  警告: 图像颜色数量很少，可能是纯色或简单背景")
         
         # 检查对比度
-        contrast = np.max(img_array) - np.min(img_array)
+        contrast = max_val - min_val
         print(f"   对比度范围: {contrast}")
         
         if contrast < 50:
             print("⚠️  警告: 图像对比度较低，可能影响OCR识别")
     
     # 显示图像预览信息
+    h, w = img_array.shape[:2]
+    if image.mode == 'RGB':
+        tl = img_array[0, 0, :3].tolist()
+        c = img_array[h // 2, w // 2, :3].tolist()
+        br = img_array[-1, -1, :3].tolist()
+    else:
+        tl = img_array[0, 0].tolist()
+        c = img_array[h // 2, w // 2].tolist()
+        br = img_array[-1, -1].tolist()
     print(f"\n👀 图像预览:")
-    print(f"   左上角区域像素: {list(image.getpixel((0, 0))[:3]) if image.mode == 'RGB' else image.getpixel((0, 0))}")
-    print(f"   中心区域像素: {list(image.getpixel((image.width//2, image.height//2))[:3]) if image.mode == 'RGB' else image.getpixel((image.width//2, image.height//2))}")
-    print(f"   右下角区域像素: {list(image.getpixel((image.width-1, image.height-1))[:3]) if image.mode == 'RGB' else image.getpixel((image.width-1, image.height-1))}")
+    print(f"   左上角区域像素: {tl}")
+    print(f"   中心区域像素: {c}")
+    print(f"   右下角区域像素: {br}")
     
     # 保存缩略图用于检查
-    thumbnail_path = "/tmp/image_preview_thumbnail.png"
-    image.thumbnail((200, 200))
-    image.save(thumbnail_path)
-    print(f"   缩略图已保存: {thumbnail_path}")
+    if save_preview:
+        thumbnail_path = "/tmp/image_preview_thumbnail.png"
+        # 在副本上生成缩略图（不修改原图）；thumbnail 默认滤波已经先以 reduce() 做整数倍快速缩小
+        preview = image.copy()
+        preview.thumbnail((200, 200))
+        preview.save(thumbnail_path)
+        print(f"   缩略图已保存: {thumbnail_path}")
     
     return True
 
 def main():
+    parser = argparse.ArgumentParser(description="检查调试截图内容")
+    parser.add_argument('--quick', action='store_true', help='快速模式：跳过统计计算与缩略图保存')
+    args = parser.parse_args()
+
     image_path = "/tmp/debug_screenshot.png"
     
-    if not analyze_image(image_path):
+    if not analyze_image(image_path, compute_stats=not args.quick, save_preview=not args.quick):
         print("\n❌ 图像分析失败")
         return
     
@@ -15,6 +15,10 @@ import argparse
 import sys
 import os
 import logging
+import re
+from datetime import datetime
+
+import numpy as np
 
 # 将项目根目录加入 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -23,7 +27,7 @@ from services.config_manager import ConfigManager
 from services.logging_manager import LoggingManager
 from controllers.main_controller import MainController
 from ui.progress import ProgressReporter
-from models.config import OutputConfig
+from models.config import OutputConfig, parse_chat_area
 
 
 def setup_logging(app_cfg):
@@ -36,12 +40,36 @@ def setup_logging(app_cfg):
     LoggingManager().setup(app_cfg)
 
 
+def _natural_scroll_params_for(base: int, direction: str):
+    """按截断后的窗口高度 base 与方向计算自然滚动参数（用于构建查找表）"""
+    # 距离范围：窗口高度的 18%-26%
+    d_min = int(base * 0.18)
+    d_max = int(base * 0.26)
+    # 时间间隔范围：0.25-0.45 秒，较高窗口略微降低停顿（更顺畅）
+    i_min = 0.22 if base > 1000 else 0.27
+    i_max = 0.38 if base > 1000 else 0.48
+    # 方向对距离影响（向下滚动时适度减少距离以提升信息密度）
+    if direction == "down":
+        d_min = int(d_min * 0.85)
+        d_max = int(d_max * 0.85)
+    return (d_min, d_max), (i_min, i_max)
+
+
+# 按像素预计算的自然滚动参数表：{(base, direction): (distance_range, interval_range)}，覆盖 600-1400 全部整数高度
+_NATURAL_SCROLL_LUT = {
+    (base, direction): _natural_scroll_params_for(base, direction)
+    for base in range(600, 1401)
+    for direction in ("up", "down")
+}
+
+
 def compute_natural_scroll_params(window_height: int, direction: str):
     """根据窗口高度与方向估算自然滚动参数范围
 
     函数级注释：
     - 通过窗口高度简单估计每次滚动距离与间隔范围，使滚动更贴近真实用户行为；
     - 对于较高窗口，增加滚动距离并适度降低停顿；较低窗口则相反；
+    - 窗口高度截断到 600-1400 后按像素查表（_NATURAL_SCROLL_LUT），非整数高度回退到直接计算；
     - 返回 (distance_range, interval_range) 元组，供高级扫描函数使用。
     """
     # 基于窗口高度的简易估算（像素和秒）
@@ -49,25 +77,54 @@ def compute_natural_scroll_params(window_height: int, direction: str):
         return (180, 260), (0.25, 0.45)
 
     base = max(600, min(window_height, 1400))  # 截断到合理范围
-    # 距离范围：窗口高度的 18%-26%
-    d_min = int(base * 0.18)
-    d_max = int(base * 0.26)
-    # 时间间隔范围：0.25-0.45 秒，较高窗口略微降低停顿（更顺畅）
-    i_min = 0.22 if base > 1000 else 0.27
-    i_max = 0.38 if base > 1000 else 0.48
-    # 方向对距离影响（向下滚动时适度减少距离以提升信息密度）
-    if direction == "down":
-        d_min = int(d_min * 0.85)
-        d_max = int(d_max * 0.85)
-    return (d_min, d_max), (i_min, i_max)
+    key = (base, "down" if direction == "down" else "up")
+    params = _NATURAL_SCROLL_LUT.get(key)
+    return params if params is not None else _natural_scroll_params_for(*key)
+
+
+# 发送方编码：0=其它/未知，1=我，2=对方
+_SENDER_CODES = {"我": 1, "对方": 2}
+
 
+def count_senders(messages):
+    """统计“我”与“对方”的消息数
+
+    函数级注释：
+    - 将发送方编码为 uint8 数组后一次 np.bincount 得到各类计数；
+    - 返回 (my_count, other_count)。
+    """
+    codes = np.fromiter((_SENDER_CODES.get(m.sender or "", 0) for m in messages), dtype=np.uint8, count=len(messages))
+    counts = np.bincount(codes, minlength=3)
+    return int(counts[1]), int(counts[2])
 
-def parse_cli_args():
-    """解析命令行参数
+
+def compute_date_streaks(dates):
+    """计算最长连续天数与最长间隔天数
+
+    函数级注释：
+    - dates 为升序且去重的日期列表；
+    - 基于相邻日期差（np.diff）向量化计算：差值为 1 的连续段构成连续天数，
+      其余差值减 1 即为间隔天数；
+    - 返回 (longest_streak, longest_gap)，空列表返回 (0, 0)。
+    """
+    if not dates:
+        return 0, 0
+    diffs = np.diff(np.array(dates, dtype='datetime64[D]')).astype(np.int64)
+    breaks = np.flatnonzero(diffs != 1)
+    longest_gap = int(diffs[breaks].max() - 1) if breaks.size else 0
+    # 以断点切分差值序列，每段内 1 的个数 + 1 即该段连续天数
+    bounds = np.concatenate(([-1], breaks, [diffs.size]))
+    longest_streak = int(np.diff(bounds).max())
+    return longest_streak, longest_gap
+
+
+def build_parser():
+    """构建命令行参数解析器
 
     函数级注释：
     - 提供窗口定位、滚动控制、OCR 语言与输出格式等常用选项；
-    - 保持参数命名与项目其它 CLI 一致以减少学习成本。
+    - 保持参数命名与项目其它 CLI 一致以减少学习成本；
+    - 解析器在模块导入时构建一次（见 _PARSER），parse_cli_args 直接复用。
     """
     parser = argparse.ArgumentParser(description="一键自动化微信聊天 OCR 扫描")
     parser.add_argument('--direction', choices=['up', 'down'], default='up', help='滚动方向')
@@ -79,14 +136,104 @@ def parse_cli_args():
     parser.add_argument('--scroll-delay', type=float, help='滚动延迟秒数（留空自动估算）')
     parser.add_argument('--window-title', dest='title_override', help='窗口标题覆盖（用于窗口定位失败时）')
     parser.add_argument('--chat-area', help='聊天区域坐标覆盖，格式 x,y,width,height')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='OCR 流水线线程数（默认 1 为串行；>1 时开启流水线，识别与滚动重叠进行）')
     parser.add_argument('--ocr-lang', help='OCR 语言（默认取配置文件，例如 ch）')
+    parser.add_argument('--raw-region-input', action='store_true',
+                        help='区域识别前跳过整图预处理，直接把优化后的截图交给 OCR 引擎（省去每帧一次整图增强）')
     parser.add_argument('--formats', help='导出格式，逗号分隔，例如 json,csv,txt,md')
     parser.add_argument('--output', help='输出目录（覆盖配置文件目录）')
     parser.add_argument('--filename-prefix', default='auto_wechat_scan', help='输出文件名前缀')
+    parser.add_argument('--fast-json', action='store_true', help='使用 orjson（若已安装）加速 JSON 导出')
     parser.add_argument('--dry-run', action='store_true', help='仅打印统计，不保存文件')
     parser.add_argument('--skip-empty', action='store_true', help='当结果为空时跳过保存')
     parser.add_argument('--verbose', action='store_true', help='详细日志模式')
-    return parser.parse_args()
+    return parser
+
+
+_PARSER = build_parser()
+
+
+def parse_cli_args(argv=None):
+    """解析命令行参数（复用模块级解析器）"""
+    return _PARSER.parse_args(argv)
+
+
+_SPM_RE = re.compile(r'\s*(\d+)\s*,\s*(\d+)\s*')
+
+
+def _parse_chat_area(text):
+    """解析 --chat-area 参数（x,y,width,height），格式不合法时抛出 ValueError"""
+    area = parse_chat_area(text)
+    if area is None:
+        raise ValueError("chat-area 必须为 'x,y,width,height'")
+    return area
+
+
+def _parse_spm_range(text):
+    """解析 --spm-range 参数（min,max），格式不合法时返回 None"""
+    m = _SPM_RE.fullmatch(text)
+    return tuple(map(int, m.groups())) if m else None
+
+
+def _parse_formats(text):
+    """解析 --formats 参数为去重且保序的小写格式列表"""
+    return list(dict.fromkeys(f.strip().lower() for f in text.split(',') if f.strip()))
+
+
+# 从配置文件 ocr 段同步到控制器 OCR 配置的扩展开关（仅同步开启项，CLI 覆盖随后应用）
+CONFIG_OCR_SWITCHES = ("prefer_raw_region_input", "enable_mkldnn")
+
+
+# 作用于控制器的 CLI 覆盖项：(参数名, 解析函数, 应用函数, 日志描述)
+OVERRIDE_SPECS = (
+    ("ocr_lang", str.strip, lambda ctl, v: setattr(ctl.ocr.config, "language", v), "使用 CLI 指定的 OCR 语言"),
+    ("title_override", str, lambda ctl, v: ctl.scroll.set_title_override(v), "窗口标题覆盖"),
+    ("chat_area", _parse_chat_area, lambda ctl, v: ctl.scroll.set_override_chat_area(v), "聊天区域覆盖"),
+    ("raw_region_input", bool, lambda ctl, v: setattr(ctl.ocr.config, "prefer_raw_region_input", v), "区域识别跳过整图预处理"),
+)
+
+
+def apply_cli_overrides(controller, args, logger):
+    """按 OVERRIDE_SPECS 依次应用 CLI 覆盖
+
+    函数级注释：
+    - 未提供的参数直接跳过；
+    - 单项解析或应用失败仅记录告警，不影响其它覆盖项与后续扫描。
+    """
+    for attr, parse, apply, desc in OVERRIDE_SPECS:
+        raw = getattr(args, attr, None)
+        if not raw:
+            continue
+        try:
+            value = parse(raw)
+            apply(controller, value)
+            logger.info("%s: %s", desc, value)
+        except Exception as e:
+            logger.warning("%s失败 '%s': %s", desc, raw, e)
+
+
+def run_scan_passes(run_once, attempts, logger):
+    """执行多轮扫描并累积结果
+
+    函数级注释：
+    - 每轮都会执行（full-fetch 模式的第二轮用于补抓首轮遗漏内容），不因上一轮成功而提前结束；
+    - run_once 由调用方通过共享的 seen_keys 去重，各轮只返回新消息，这里直接拼接；
+    - 单轮抛出异常仅记录告警并继续下一轮，保留已获取的部分结果。
+    """
+    messages = []
+    for attempt in range(attempts):
+        try:
+            msgs = run_once()
+        except Exception as e:
+            logger.warning("第 %d 次扫描出现异常：%s（将继续）", attempt + 1, e)
+            continue
+        messages.extend(msgs)
+        if msgs:
+            logger.info("第 %d 次扫描获取 %d 条消息，累计 %d 条", attempt + 1, len(msgs), len(messages))
+        else:
+            logger.info("第 %d 次扫描未获取到新消息，累计 %d 条", attempt + 1, len(messages))
+    return messages
 
 
 def main():
@@ -108,35 +255,19 @@ def main():
 
     controller = MainController()
 
-    # 应用 OCR 语言覆盖
-    try:
-        if args.ocr_lang:
-            controller.ocr.config.language = args.ocr_lang.strip()
-            logger.info("使用 CLI 指定的 OCR 语言: %s", controller.ocr.config.language)
-        else:
+    # 默认使用配置中的 OCR 语言，随后应用 CLI 覆盖（OCR 语言、窗口标题、聊天区域）
+    if not args.ocr_lang:
+        try:
             controller.ocr.config.language = app_cfg.ocr.language
             logger.info("使用配置中的 OCR 语言: %s", controller.ocr.config.language)
-    except Exception as e:
-        logger.warning("应用 OCR 语言失败: %s", e)
-
-    # 应用窗口标题与聊天区域覆盖
-    if args.title_override:
-        try:
-            controller.scroll.set_title_override(args.title_override)
-            logger.info("窗口标题覆盖: %s", args.title_override)
-        except Exception:
-            logger.warning("应用窗口标题覆盖失败: %s", args.title_override)
-
-    if args.chat_area:
-        try:
-            parts = [p.strip() for p in args.chat_area.split(',')]
-            if len(parts) != 4:
-                raise ValueError("chat-area 必须为 'x,y,width,height'")
-            x, y, w, h = map(int, parts)
-            controller.scroll.set_override_chat_area((x, y, w, h))
-            logger.info("聊天区域覆盖: (%d,%d,%d,%d)", x, y, w, h)
         except Exception as e:
-            logger.warning("聊天区域覆盖失败 '%s': %s", args.chat_area, e)
+            logger.warning("应用 OCR 语言失败: %s", e)
+    for name in CONFIG_OCR_SWITCHES:
+        if getattr(app_cfg.ocr, name, False):
+            setattr(controller.ocr.config, name, True)
+            logger.info("使用配置中的 OCR 选项: %s", name)
+    apply_cli_overrides(controller, args, logger)
+    formats_list = _parse_formats(args.formats) if args.formats else []
 
     # 进度报告器（不设置内存阈值，避免误告警）
     reporter = ProgressReporter(logging.getLogger("progress"))
@@ -196,14 +327,14 @@ def main():
     from services.storage_manager import StorageManager
     # 构造临时配置用于计算实时路径
     temp_override = OutputConfig(
-        format=(args.formats.split(',')[0].strip().lower() if args.formats else app_cfg.output.format),
+        format=(formats_list[0] if formats_list else app_cfg.output.format),
         directory=(args.output or app_cfg.output.directory),
-        formats=[f.strip().lower() for f in args.formats.split(',') if f.strip()] if args.formats else None
+        formats=formats_list or None,
+        fast_json=bool(args.fast_json or app_cfg.output.fast_json),
     )
     storage_mgr = StorageManager(temp_override)
 
     # 预计算实时输出文件路径
-    from datetime import datetime
     from pathlib import Path
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     rt_filename_base = f"{args.filename_prefix}_{ts}"
@@ -243,49 +374,34 @@ def main():
                     logger.error(f"实时写入 {fmt} 失败: {e}")
 
     # 执行高级扫描
-    # 执行高级扫描（必要时进行一次轻量重试以避免偶发中断）
-    messages = []
+    # 执行高级扫描（full-fetch 模式执行两轮，单轮异常不中断）
     # 解析 spm-range
-    spm_range = None
-    try:
-        if args.spm_range:
-            parts = [p.strip() for p in args.spm_range.split(',')]
-            if len(parts) == 2:
-                spm_range = (int(parts[0]), int(parts[1]))
-    except Exception:
-        spm_range = None
+    spm_range = _parse_spm_range(args.spm_range) if args.spm_range else None
+    # seen 在多轮扫描间共享并由控制器原地更新：后续轮次中已识别的消息不会重复返回或重复实时写入
+    seen = set()
+
+    def run_once():
+        return controller.advanced_scan_chat_history(
+            max_scrolls=args.max_scrolls,
+            direction=args.direction,
+            target_content=None,
+            stop_at_edges=True,
+            reporter=reporter if args.verbose else None,
+            scroll_speed=None,
+            scroll_delay=None,  # 使用间隔范围而非固定延迟
+            scroll_distance_range=distance_range,
+            scroll_interval_range=interval_range,
+            max_scrolls_per_minute=args.max_scrolls_per_minute,
+            spm_range=spm_range,
+            on_batch_parsed=on_batch_parsed,
+            output_dir=(args.output or app_cfg.output.directory),
+            seen_keys=seen,
+            workers=args.workers,
+        )
+
+    # full-fetch 模式执行两轮扫描（第二轮补抓首轮遗漏的内容），单轮异常不影响后续轮次
     attempts = 1 if not args.full_fetch else 2
-    for attempt in range(attempts):
-        try:
-            msgs = controller.advanced_scan_chat_history(
-                max_scrolls=args.max_scrolls,
-                direction=args.direction,
-                target_content=None,
-                stop_at_edges=True,
-                reporter=reporter if args.verbose else None,
-                scroll_speed=None,
-                scroll_delay=None,  # 使用间隔范围而非固定延迟
-                scroll_distance_range=distance_range,
-                scroll_interval_range=interval_range,
-                max_scrolls_per_minute=args.max_scrolls_per_minute,
-                spm_range=spm_range,
-                on_batch_parsed=on_batch_parsed,
-                output_dir=(args.output or app_cfg.output.directory),
-            )
-            # 合并并去重（基于 stable_key）
-            seen = {m.stable_key() for m in messages}
-            for m in msgs:
-                k = m.stable_key()
-                if k not in seen:
-                    messages.append(m)
-                    seen.add(k)
-            if msgs:
-                logger.info("第 %d 次扫描获取 %d 条消息，累计 %d 条", attempt + 1, len(msgs), len(messages))
-            else:
-                logger.info("第 %d 次扫描未获取到新消息，累计 %d 条", attempt + 1, len(messages))
-        except Exception as e:
-            logger.warning("第 %d 次扫描出现异常：%s（将继续）", attempt + 1, e)
-            continue
+    messages = run_scan_passes(run_once, attempts, logger)
 
     # 保存输出（多格式与目录覆盖）
     if args.dry_run:
@@ -294,19 +410,6 @@ def main():
         if args.skip_empty and not messages:
             logger.info("Skip-empty 已启用，消息为空，跳过保存。")
         else:
-            formats_list = []
-            if args.formats:
-                try:
-                    cand = [f.strip().lower() for f in args.formats.split(',') if f.strip()]
-                    seen = set()
-                    for f in cand:
-                        if f not in seen:
-                            seen.add(f)
-                            formats_list.append(f)
-                except Exception:
-                    logging.getLogger("progress").warning("解析 --formats 失败: %s", args.formats)
-                    formats_list = []
-
             override = OutputConfig(
                 format=(formats_list[0] if formats_list else app_cfg.output.format),
                 directory=(args.output or app_cfg.output.directory),
@@ -315,6 +418,7 @@ def main():
                 exclude_fields=app_cfg.output.exclude_fields,
                 exclude_time_only=app_cfg.output.exclude_time_only,
                 aggressive_dedup=app_cfg.output.aggressive_dedup,
+                fast_json=bool(args.fast_json or app_cfg.output.fast_json),
             )
             messages = controller.run_and_save(
                 filename_prefix=args.filename_prefix,
@@ -346,23 +450,24 @@ def main():
 
     # 任务总结
     try:
-        from datetime import datetime, timezone
         stats = controller.get_last_scroll_stats() or {}
+        now_dt = datetime.now()
         start_ts = stats.get("start_time")
-        end_ts = stats.get("end_time") or (start_ts or datetime.now().timestamp())
+        end_ts = stats.get("end_time") or (start_ts or now_dt.timestamp())
         # 允许没有统计时的回退
         if start_ts and isinstance(start_ts, (int, float)):
             start_dt = datetime.fromtimestamp(start_ts)
         else:
-            start_dt = datetime.now()
+            start_dt = now_dt
         if end_ts and isinstance(end_ts, (int, float)):
             end_dt = datetime.fromtimestamp(end_ts)
         else:
-            end_dt = datetime.now()
+            end_dt = now_dt
+        start_str = start_dt.strftime('%m月%d日%H:%M')
+        end_str = end_dt.strftime('%m月%d日%H:%M')
         elapsed_sec = int(max(0.0, (end_dt - start_dt).total_seconds()))
-        hh = elapsed_sec // 3600
-        mm = (elapsed_sec % 3600) // 60
-        ss = elapsed_sec % 60
+        hh, rem = divmod(elapsed_sec, 3600)
+        mm, ss = divmod(rem, 60)
         total_scrolls = int(stats.get("total_scrolls", 0))
         spm = float(stats.get("scrolls_per_minute", 0.0))
 
@@ -372,52 +477,29 @@ def main():
                 return d.date()
             except Exception:
                 return None
-        dates = sorted({ _date(m.timestamp) for m in messages if _date(m.timestamp) })
+        dates = sorted({d for d in map(_date, (m.timestamp for m in messages)) if d})
+        my_count, other_count = count_senders(messages)
         msg_days = ( (dates[-1] - dates[0]).days + 1 ) if dates else 0
         # 连续与间隔
-        longest_streak = 0
-        longest_gap = 0
-        if dates:
-            streak = 1
-            for i in range(1, len(dates)):
-                diff = (dates[i] - dates[i-1]).days
-                if diff == 1:
-                    streak += 1
-                else:
-                    longest_streak = max(longest_streak, streak)
-                    streak = 1
-                    longest_gap = max(longest_gap, diff-1)
-            longest_streak = max(longest_streak, streak)
-        my_count = sum(1 for m in messages if (m.sender or "") == "我")
-        other_count = sum(1 for m in messages if (m.sender or "") == "对方")
-
-        print("\n=== 任务总结 ===")
-        print(f"开始时间：{start_dt.strftime('%m月%d日%H:%M')} ")
-        print(f"结束时间：{end_dt.strftime('%m月%d日%H:%M')} ")
-        print(f"耗时：{hh}小时{mm}分钟{ss}秒")
-        print(f"累计滚动次数：{total_scrolls}次")
-        print(f"每分钟滚动次数：{spm:.1f}次")
-        print(f"消息时长：{msg_days}天")
-        print(f"最长连续：{longest_streak}天")
-        print(f"最长间隔：{longest_gap}天")
-        print(f"累计消息数：{len(messages)}条")
-        print(f"我的消息数：{my_count}条")
-        print(f"对方消息数：{other_count}条")
-
-        # 同步写入日志文件（通过 LoggingManager 的文件处理器）
-        lg = logging.getLogger(__name__)
-        lg.info("=== 任务总结 ===")
-        lg.info("开始时间：%s", start_dt.strftime('%m月%d日%H:%M'))
-        lg.info("结束时间：%s", end_dt.strftime('%m月%d日%H:%M'))
-        lg.info("耗时：%d小时%d分钟%d秒", hh, mm, ss)
-        lg.info("累计滚动次数：%d次", total_scrolls)
-        lg.info("每分钟滚动次数：%.1f次", spm)
-        lg.info("消息时长：%d天", msg_days)
-        lg.info("最长连续：%d天", longest_streak)
-        lg.info("最长间隔：%d天", longest_gap)
-        lg.info("累计消息数：%d条", len(messages))
-        lg.info("我的消息数：%d条", my_count)
-        lg.info("对方消息数：%d条", other_count)
+        longest_streak, longest_gap = compute_date_streaks(dates)
+
+        lines = [
+            f"开始时间：{start_str}",
+            f"结束时间：{end_str}",
+            f"耗时：{hh}小时{mm}分钟{ss}秒",
+            f"累计滚动次数：{total_scrolls}次",
+            f"每分钟滚动次数：{spm:.1f}次",
+            f"消息时长：{msg_days}天",
+            f"最长连续：{longest_streak}天",
+            f"最长间隔：{longest_gap}天",
+            f"累计消息数：{len(messages)}条",
+            f"我的消息数：{my_count}条",
+            f"对方消息数：{other_count}条",
+        ]
+        summary = "\n".join(lines)
+        # 控制台一次性输出；同步写入日志文件（通过 LoggingManager 的文件处理器）
+        sys.stdout.write("\n=== 任务总结 ===\n" + summary + "\n")
+        logging.getLogger(__name__).info("=== 任务总结 ===\n%s", summary)
     except Exception as e:
         logging.getLogger(__name__).debug(f"任务总结生成失败：{e}")
 
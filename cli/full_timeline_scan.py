@@ -19,26 +19,172 @@
 - 根据机器性能与聊天长度，建议合理设置滚动步长、延迟与最大滚动次数；
 """
 
+import argparse
 import os
 import sys
 import time
 import json
 import signal
+import heapq
+import hashlib
 import logging
+from collections import OrderedDict
+from itertools import chain
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
+
+import numpy as np
+from PIL import Image
+
+try:
+    # 可选依赖：C 实现的 JSON 编码器，用于快速序列化存储统计
+    import orjson
+except ImportError:
+    orjson = None
 
 # 保证包导入在项目根目录结构下生效
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from controllers.main_controller import MainController
-from services.advanced_scroll_controller import AdvancedScrollController
-from services.storage_manager import StorageManager
-from models.config import OutputConfig
+# 控制器与存储服务（会间接加载 OCR 引擎等重量级依赖）延迟到 FullTimelineScanner 初始化时导入，
+# 使 --help 与参数错误等路径无需加载这些模块即可快速退出
+from models.config import OutputConfig, parse_chat_area
 from models.data_models import Message
 
+# 预览排序时缺失时间戳的消息排在最前
+_DATETIME_MIN = datetime.min
+# 指纹缓存的“尚未计算”哨兵（None 表示 stable_key 为空）
+_UNSET = object()
+
+
+def _key_fingerprint(key: str) -> int:
+    """将 stable_key 压缩为 64 位整数指纹。
+
+    函数级注释：
+    - 使用 blake2b(digest_size=8) 生成 64 位摘要，碰撞概率约 2^-64，可忽略；
+    - 尾部监控的已保存键集合仅存整数指纹，长时间运行时内存占用远小于完整字符串，
+      成员判断也只需对小整数求哈希。
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _dumps_stats(stats: Dict[str, Any]) -> str:
+    """序列化统计字典为 JSON 文本：优先 orjson（非 ASCII 字符原样输出），不可用或类型不支持时回退标准库。"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(stats, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(stats, ensure_ascii=False)
+
+
+def _message_fingerprint(msg: Message) -> Optional[int]:
+    """返回消息 stable_key 的 64 位指纹，并缓存到消息实例上。
+
+    函数级注释：
+    - 同一条消息在尾部增量筛选与保存后的索引更新中都会用到指纹，缓存后 stable_key 的字符串拼接与
+      blake2b 摘要每条消息只计算一次；
+    - 缓存写在实例属性 _stable_fp 上；本模块在消息解析完成后不再修改 sender/timestamp/content，缓存不会失效；
+    - stable_key 为空时返回 None（同样缓存），调用方据此跳过不稳定记录。
+    """
+    fp = getattr(msg, "_stable_fp", _UNSET)
+    if fp is _UNSET:
+        key = msg.stable_key()
+        fp = _key_fingerprint(key) if key else None
+        msg._stable_fp = fp
+    return fp
+
+
+def _frame_dhash(image, hash_size: int = 16) -> int:
+    """计算截图的差值哈希（dHash），用于尾部监控的画面变化检测。
+
+    函数级注释：
+    - 先转灰度再以 BOX 滤波缩放到 (hash_size+1)×hash_size，比较水平相邻像素得到 hash_size² 位；
+    - 默认 16×16（256 位）而非常见的 8×8：聊天区底部新增一条短消息时变化区域较小，
+      更细的网格可避免新消息被粗粒度哈希“吞掉”而漏掉 OCR；
+    - 缩放后仅几百个像素，计算开销相对一次整屏 OCR 可忽略。
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _frame_digest(image) -> tuple:
+    """返回截图的精确指纹 (尺寸, 模式, 像素内容 blake2b 摘要)，作为帧缓存的键。
+
+    函数级注释：
+    - 帧缓存会直接复用此前的识别结果，必须是精确的帧身份：dHash 为有损哈希，
+      不同画面（例如仅底部多一条短消息）可能得到相同哈希而错用旧结果，因此只作为廉价的变化预检；
+    - 对全分辨率像素字节求 16 字节摘要，开销（毫秒级）远低于一次 OCR。
+    """
+    return (image.size, image.mode, hashlib.blake2b(image.tobytes(), digest_size=16).digest())
+
+
+def _estimate_upward_shift(prev: np.ndarray, cur: np.ndarray, max_error: float = 1.0) -> int:
+    """估计两帧灰度图之间内容整体上移的像素数（新消息到达时聊天内容会向上推移）。
+
+    函数级注释：
+    - 以逐行平均亮度作为行特征，逐个尝试上移量 s，比较 prev[s:] 与 cur[:h-s] 的平均绝对误差；
+    - 仅在上半屏范围内搜索；满足误差阈值的候选中取最大上移量，
+      纯色背景导致多个候选同时成立时宁可多识别一些，也不漏掉新增内容；
+    - 未找到匹配时返回 0。
+    """
+    h = cur.shape[0]
+    prev_rows = prev.mean(axis=1)
+    cur_rows = cur.mean(axis=1)
+    best = 0
+    for s in range(1, h // 2):
+        if np.abs(prev_rows[s:] - cur_rows[:h - s]).mean() <= max_error:
+            best = s
+    return best
+
+
+def _changed_strip(
+    prev: Optional[np.ndarray],
+    cur: np.ndarray,
+    diff_threshold: int = 24,
+    margin: int = 6,
+    max_ratio: float = 0.8,
+) -> Optional[tuple[int, int, int, int]]:
+    """根据前后两帧灰度图计算需要重新 OCR 的整宽水平条带 (x, y, w, h)。
+
+    函数级注释：
+    - 逐像素差分超过 diff_threshold 的行视为变化行，取其上下界；
+    - 若检测到内容整体上移（新消息到达），仅取底部新增的 s 行作为条带；
+    - 条带保持整宽，保证解析器基于横向位置判断发送方的逻辑不受影响；上下额外留出 margin 像素，
+      与上一轮重复识别到的气泡由稳定键去重合并；
+    - 无上一帧、尺寸变化、无变化行或条带超过 max_ratio 屏高时返回 None，由调用方回退整屏 OCR。
+    """
+    if prev is None or prev.shape != cur.shape:
+        return None
+    h, w = cur.shape
+    changed_rows = np.flatnonzero((np.abs(cur.astype(np.int16) - prev) > diff_threshold).any(axis=1))
+    if changed_rows.size == 0:
+        return None
+    top, bottom = int(changed_rows[0]), int(changed_rows[-1]) + 1
+    shift = _estimate_upward_shift(prev, cur)
+    if shift:
+        top, bottom = h - shift, h
+    top = max(0, top - margin)
+    bottom = min(h, bottom + margin)
+    if bottom - top > max_ratio * h:
+        return None
+    return (0, top, w, bottom - top)
+
+
+def _cuda_available() -> bool:
+    """检测 PaddlePaddle 是否可使用 CUDA GPU（未安装 paddle 或检测异常时返回 False）。"""
+    try:
+        import paddle
+    except ImportError:
+        return False
+    try:
+        return bool(paddle.device.is_compiled_with_cuda()) and paddle.device.cuda.device_count() > 0
+    except Exception:
+        return False
+
 
 class FullTimelineScanner:
     """全量时间线扫描器：实现从顶部到最新与尾部实时监控。
@@ -46,15 +192,25 @@ class FullTimelineScanner:
     属性：
     - output_dir: 输出目录
     - realtime_tail_monitor: 是否在尾部开启实时增量监控
-    - tail_poll_interval: 尾部监控轮询间隔（秒）
+    - tail_poll_interval: 尾部监控基础轮询间隔（秒），画面持续无变化时按倍率退避
     - max_scrolls_initial: 初始阶段最大滚动次数（防止异常循环）
     - scroll_params: 渐进式滚动参数（方向、惯性、延迟等）
     - logger: 日志记录器
     - main_controller: 主控制器实例
     - adv_scroll: 高级滚动控制器实例
     - storage: 存储管理器实例
+    - save_batch_size: 初始扫描分片保存的批大小（0 为不分片，扫描结束时保存单个 initial_full_timeline 文件）
     """
 
+    # 尾部监控自适应轮询：连续若干次画面无变化后，每次将间隔乘以退避倍率，直至上限
+    TAIL_IDLE_POLLS_BEFORE_BACKOFF = 3
+    TAIL_BACKOFF_FACTOR = 1.5
+    TAIL_MAX_POLL_INTERVAL = 10.0
+    # 尾部监控：dHash 不同但缩小后 SSIM 不低于该值时，视为仅有渲染噪声、画面未变化
+    TAIL_SSIM_THRESHOLD = 0.995
+    # 帧哈希→识别结果的 LRU 缓存容量
+    FRAME_CACHE_SIZE = 256
+
     def __init__(
         self,
         output_dir: str = "output",
@@ -68,6 +224,8 @@ class FullTimelineScanner:
         verbose: bool = False,
         title_override: Optional[str] = None,
         chat_area_override: Optional[tuple[int, int, int, int]] = None,
+        ocr_workers: int = 1,
+        save_batch_size: int = 0,
     ):
         """初始化扫描器并配置日志、控制器与存储。
 
@@ -81,11 +239,15 @@ class FullTimelineScanner:
         - delay_between_scrolls: 每次滚动后的延迟（秒）
         - similarity_threshold: 内容相似度阈值，用于终止与重复页面检测
         - verbose: 是否启用详细日志
+        - ocr_workers: 初始扫描阶段的 OCR 流水线并发度（1 为串行；>1 时识别与后续滚动重叠进行）
+        - save_batch_size: >0 时初始扫描每累计该条数即落盘一个 initial_full_timeline_partNNN 分片，
+          内存只保留当前批；默认 0 保持单个 initial_full_timeline 输出文件
         """
         self.output_dir = output_dir
         self.realtime_tail_monitor = realtime_tail_monitor
         self.tail_poll_interval = tail_poll_interval
         self.max_scrolls_initial = max_scrolls_initial
+        self.save_batch_size = max(0, int(save_batch_size or 0))
         self.scroll_params = {
             "direction": scroll_direction,
             "inertia": inertia_enabled,
@@ -96,7 +258,11 @@ class FullTimelineScanner:
         self.logger = logging.getLogger("FullTimelineScanner")
         self._setup_logging(verbose)
 
-        # 控制器与存储初始化
+        # 控制器与存储初始化（延迟导入，见模块顶部说明）
+        from controllers.main_controller import MainController
+        from services.advanced_scroll_controller import AdvancedScrollController
+        from services.storage_manager import StorageManager
+
         self.main_controller = MainController()
         # 高级滚动控制器参数与存储配置修正：
         # - AdvancedScrollController 不支持 delay_between_scrolls/similarity_threshold 等关键字参数；
@@ -107,6 +273,13 @@ class FullTimelineScanner:
             scroll_delay=delay_between_scrolls,
             inertial_effect=inertia_enabled,
         )
+        # 复用主控制器的 OCR 与解析器实例，避免重复加载模型；
+        # 并开启截图→识别的流水线：滚动线程继续截图/滚动，识别在线程池中进行，按截图顺序发布结果
+        self.adv_scroll.ocr = self.main_controller.ocr
+        self.adv_scroll.parser = self.main_controller.parser
+        self.adv_scroll.ocr_workers = max(1, int(ocr_workers or 1))
+        # 连续截图“内容无变化”的判定使用缩小后的 SSIM，阈值取 CLI 的相似度参数
+        self.adv_scroll.similarity_threshold = similarity_threshold
 
         # 应用窗口标题与聊天区域坐标覆盖（若提供）：同时同步到主控制器与高级滚动控制器
         try:
@@ -146,7 +319,20 @@ class FullTimelineScanner:
 
         # 状态缓存
         self._stop_flag = False
-        self._last_saved_keyset: set[str] = set()
+        self._signal_handlers_installed = False
+        # 已保存消息的 stable_key 64 位指纹集合（见 _key_fingerprint）
+        self._last_saved_keyset: set[int] = set()
+        # 尾部监控上一帧聊天区域的 dHash（见 _frame_dhash）、精确指纹（见 _frame_digest）与灰度像素，None 表示尚未采样
+        self._last_frame_hash: Optional[int] = None
+        self._last_frame_digest: Optional[tuple] = None
+        self._last_frame: Optional[np.ndarray] = None
+        # 帧精确指纹（_frame_digest）→ 该帧整屏识别出的消息（LRU）：降级扫描与尾部监控中遇到已识别过的画面时跳过 OCR
+        self._frame_cache: "OrderedDict[tuple, List[Message]]" = OrderedDict()
+        # 初始扫描流式保存状态：待保存的逐页消息列表及其总条数、已写分片数与用于预览的最早若干条消息
+        self._stream_buffer: List[List[Message]] = []
+        self._stream_buffered = 0
+        self._stream_parts = 0
+        self._preview_messages: List[Message] = []
 
     def _setup_logging(self, verbose: bool):
         """配置日志输出格式与级别。
@@ -187,9 +373,10 @@ class FullTimelineScanner:
         except KeyboardInterrupt:
             self.logger.warning("收到中断信号，正在收尾保存…")
             self._stop_flag = True
+            self._flush_stream_buffer()
             return True
         except Exception as e:
-            self.logger.error(f"扫描失败: {e}")
+            self.logger.error("扫描失败: %s", e)
             return False
 
     def _ensure_window_ready(self) -> bool:
@@ -216,7 +403,7 @@ class FullTimelineScanner:
             self.logger.info("已定位并激活微信聊天窗口")
             return True
         except Exception as e:
-            self.logger.error(f"窗口定位失败: {e}")
+            self.logger.error("窗口定位失败: %s", e)
             return False
 
     def _scan_from_top_to_latest(self) -> bool:
@@ -256,14 +443,15 @@ class FullTimelineScanner:
                         else:
                             self.logger.debug("尚未获取到聊天区域坐标，后续将依赖高级滚动控制器的定位流程")
                 except Exception as e:
-                    self.logger.debug(f"同步窗口上下文失败：{e}")
+                    self.logger.debug("同步窗口上下文失败：%s", e)
 
             # 在同步上下文后再进行就绪检查：若已存在聊天区域覆盖，ensure_window_ready 将快速返回 True
             if not self.adv_scroll.ensure_window_ready(retries=2, delay=0.3):
                 self.logger.error("高级滚动控制器窗口未就绪，无法执行渐进扫描")
                 return False
 
-            # 渐进式向下滚动，采集每页内容
+            # 渐进式向下滚动，采集每页内容：每页识别完成即经回调进入流式保存缓冲，满批落盘
+            self.adv_scroll.on_state_captured = self._stream_state
             results = self.adv_scroll.progressive_scroll(
                 direction=self.scroll_params["direction"],
                 max_scrolls=self.max_scrolls_initial,
@@ -304,24 +492,19 @@ class FullTimelineScanner:
                 except Exception as e:
                     self.logger.debug("降级渐进扫描异常：%s", e)
 
-                # Step 3: 手动快照收集作为最后退路
+                # Step 3: 手动快照收集作为最后退路：先逐页截图并步进滚动，再对全部截图批量 OCR 与解析
                 if not results:
                     self.logger.warning("降级渐进扫描仍为空，退路为手动步进快照收集…")
                     manual_states: List[Dict[str, Any]] = []
                     try:
                         max_manual_pages = 6
+                        captures = []
                         for idx in range(max_manual_pages):
-                            # 执行一次 OCR 与消息解析
-                            page_msgs = self.main_controller.run_once()
-                            if page_msgs:
-                                manual_states.append({
-                                    "messages": page_msgs,
-                                    "message_count": len(page_msgs),
-                                    "timestamp": time.time(),
-                                })
-                                self.logger.debug("手动快照第 %d 页识别到 %d 条消息", idx + 1, len(page_msgs))
+                            shot = self.main_controller.scroll.capture_current_view()
+                            if shot is not None:
+                                captures.append((idx, time.time(), shot, _frame_digest(shot)))
                             else:
-                                self.logger.debug("手动快照第 %d 页未识别到消息", idx + 1)
+                                self.logger.debug("手动快照第 %d 页截图失败", idx + 1)
 
                             # 步进滚动到下一页
                             try:
@@ -329,7 +512,29 @@ class FullTimelineScanner:
                                 self.logger.debug("手动步进滚动（向下）结果=%s", ok)
                             except Exception:
                                 pass
-                            time.sleep(self.scroll_params["delay"])  # 等待界面稳定后下一次识别
+                            time.sleep(self.scroll_params["delay"])  # 等待界面稳定后下一次截图
+
+                        # 仅对未识别过的画面执行批量 OCR（同一批内重复画面也只识别一次）
+                        pending_frames: Dict[tuple, Any] = {}
+                        for _, _, shot, fp in captures:
+                            if fp not in self._frame_cache and fp not in pending_frames:
+                                pending_frames[fp] = shot
+                        if len(pending_frames) < len(captures):
+                            self.logger.debug("手动快照命中帧缓存 %d 页，跳过重复 OCR", len(captures) - len(pending_frames))
+                        pages = self.main_controller.run_batch(list(pending_frames.values()))
+                        for fp, page_msgs in zip(pending_frames, pages):
+                            self._frame_cache_put(fp, page_msgs)
+                        for idx, ts, _, fp in captures:
+                            page_msgs = self._frame_cache_get(fp)
+                            if page_msgs:
+                                manual_states.append({
+                                    "messages": page_msgs,
+                                    "message_count": len(page_msgs),
+                                    "timestamp": ts,
+                                })
+                                self.logger.debug("手动快照第 %d 页识别到 %d 条消息", idx + 1, len(page_msgs))
+                            else:
+                                self.logger.debug("手动快照第 %d 页未识别到消息", idx + 1)
 
                         if manual_states:
                             results = manual_states
@@ -340,47 +545,99 @@ class FullTimelineScanner:
                     self.logger.error("所有重试与降级策略均未获取到内容，终止扫描")
                     return False
 
-            # 解析与保存
-            parsed_messages: List[Message] = self._parse_results_to_messages(results)
-            self._save_messages_ordered(parsed_messages, label="initial_full_timeline")
+            # 解析与保存：尚未经回调流式处理的页（如手动快照退路）在此补充进入缓冲，最后落盘剩余分片
+            for page_messages in self._parse_results_to_messages(results):
+                self._buffer_messages(page_messages)
+            self._flush_stream_buffer()
 
             # 输出预览与统计
-            self._print_preview(parsed_messages, max_items=10)
+            self._print_preview(self._preview_messages, max_items=10)
             self._print_storage_stats()
             return True
         except Exception as e:
-            self.logger.error(f"从顶部到最新扫描失败: {e}")
+            self.logger.error("从顶部到最新扫描失败: %s", e)
+            # 已识别但未满批的消息仍尽量落盘，保留部分结果
+            self._flush_stream_buffer()
             return False
+        finally:
+            self.adv_scroll.on_state_captured = None
 
-    def _parse_results_to_messages(self, scroll_results: List[Dict[str, Any]]) -> List[Message]:
-        """将滚动结果解析为 Message 列表。
+    def _stream_state(self, state: Dict[str, Any]) -> None:
+        """渐进扫描的状态回调：将该页消息移入流式保存缓冲，并标记为已处理。
+
+        函数级注释：
+        - 回调在滚动线程中按截图顺序触发；
+        - 移入缓冲后清空 state 中的消息列表，使 progressive_scroll 返回的结果不再持有全部消息，
+          内存占用只与当前批大小相关；标记 streamed 以便后续解析步骤跳过该页。
+        """
+        page_messages = state.get("messages") or []
+        state["streamed"] = True
+        state["messages"] = []
+        self._buffer_messages(page_messages)
+
+    def _buffer_messages(self, page_messages: List[Message]) -> None:
+        """追加一页消息到流式保存缓冲；开启分片保存（save_batch_size > 0）时达到批大小即落盘一个分片。
+
+        函数级注释：
+        - 缓冲按页保存列表引用并累计条数，落盘时再以 chain.from_iterable 一次性按精确长度展平，
+          避免逐页 extend 引起的多次扩容复制。
+        """
+        if not page_messages:
+            return
+        self._stream_buffer.append(page_messages)
+        self._stream_buffered += len(page_messages)
+        if self.save_batch_size and self._stream_buffered >= self.save_batch_size:
+            self._flush_stream_buffer()
+
+    def _flush_stream_buffer(self) -> None:
+        """保存缓冲中的消息并更新预览候选。
+
+        函数级注释：
+        - 未开启分片保存时写出单个 initial_full_timeline 文件（与逐批落盘前的输出一致）；
+        - 开启分片保存时写出编号分片 initial_full_timeline_partNNN。
+        """
+        if not self._stream_buffer:
+            return
+        batch = list(chain.from_iterable(self._stream_buffer))
+        self._stream_buffer = []
+        self._stream_buffered = 0
+        self._stream_parts += 1
+        self._preview_messages = heapq.nsmallest(
+            10, self._preview_messages + batch, key=lambda m: m.timestamp or _DATETIME_MIN
+        )
+        label = f"initial_full_timeline_part{self._stream_parts:03d}" if self.save_batch_size else "initial_full_timeline"
+        self._save_messages_ordered(batch, label=label)
+
+    def _parse_results_to_messages(self, scroll_results: List[Dict[str, Any]]) -> Iterator[List[Message]]:
+        """将滚动结果逐页解析为 Message 列表（生成器，逐页产出）。
 
         说明：
         - 每个滚动结果应包括截图 OCR 文本与解析出的消息集合；
+        - 已由 _stream_state 流式处理过的页直接跳过；
         - 此处通过 MainController 的 run_once 进行当前视图的 OCR 与消息提取；
         - 若 AdvancedScrollController 已内置解析，可在 results 中直接读取。
-        返回：Message 列表（可能包含重复，后续由存储层去重）。
+        产出：每页的 Message 列表（可能包含重复，后续由存储层去重）。
         """
-        messages: List[Message] = []
+        run_once = self.main_controller.run_once
         try:
             for idx, page in enumerate(scroll_results):
-                # 若 page 已包含消息列表，优先使用
-                page_messages: List[Message] = []
-                if isinstance(page, dict) and "messages" in page and page["messages"]:
-                    page_messages = page["messages"]
-                else:
+                # 若 page 已包含消息列表，优先使用（单次 get 取值，已流式处理的页直接跳过）
+                page_messages: Optional[List[Message]] = None
+                if isinstance(page, dict):
+                    if page.get("streamed"):
+                        continue
+                    page_messages = page.get("messages")
+                if not page_messages:
                     # 回退：对当前屏幕执行一次 OCR 与解析（run_once 返回 List[Message]）
-                    page_messages = self.main_controller.run_once()
+                    page_messages = run_once()
 
                 if not page_messages:
-                    self.logger.debug(f"第 {idx+1} 页未识别到消息，跳过")
+                    self.logger.debug("第 %d 页未识别到消息，跳过", idx + 1)
                     continue
 
-                messages.extend(page_messages)
-            return messages
+                yield page_messages
         except Exception as e:
-            self.logger.error(f"解析滚动结果为消息失败: {e}")
-            return messages
+            self.logger.error("解析滚动结果为消息失败: %s", e)
 
     def _save_messages_ordered(self, messages: List[Message], label: str = "batch"):
         """按时间顺序保存消息到多种格式，并更新去重索引。
@@ -398,7 +655,7 @@ class FullTimelineScanner:
             return
 
         # 触发存储层的排序与去重，并输出到多格式
-        self.logger.info(f"开始保存批次 {label}，消息数: {len(messages)}")
+        self.logger.info("开始保存批次 %s，消息数: %d", label, len(messages))
         # 通过多格式导出（共享一次去重与索引过滤）
         try:
             paths = self.storage.save_messages_multiple(
@@ -408,16 +665,14 @@ class FullTimelineScanner:
             )
             if paths:
                 for p in paths:
-                    self.logger.info(f"已生成文件: {p}")
+                    self.logger.info("已生成文件: %s", p)
         except Exception as e:
-            self.logger.error(f"保存消息失败：{e}")
+            self.logger.error("保存消息失败：%s", e)
 
-        # 更新本地已保存键集合（用于尾部增量去重）
+        # 更新本地已保存键集合（用于尾部增量去重）：先一次性物化指纹（已缓存于消息实例），再批量 update 入集合
         try:
-            for msg in messages:
-                key = msg.stable_key()
-                if key:
-                    self._last_saved_keyset.add(key)
+            fps = [_message_fingerprint(msg) for msg in messages]
+            self._last_saved_keyset.update([fp for fp in fps if fp is not None])
         except Exception:
             pass
 
@@ -426,46 +681,173 @@ class FullTimelineScanner:
 
         机制：
         - 保持滚动到底部（先进一次 scroll_direction='down' 到尾部，可选）
-        - 周期性执行 run_once() 提取当前视图消息
+        - 周期性截取聊天区域并计算 dHash，画面未变化时跳过 run_once()；
+          连续空闲若干轮后按倍率退避轮询间隔（上限 TAIL_MAX_POLL_INTERVAL），画面变化即恢复基础间隔
+        - 以 time.monotonic() 截止时间调度轮询，识别耗时计入轮询周期（见 _wait_until_next_poll）
+        - 画面变化时与上一帧差分，仅对底部新增条带执行 run_once(region=...)；无法定位条带时整屏识别
         - 对比本地稳定键集合与存储层去重，找到新增消息并保存
         - 保证保存顺序：增量消息仍通过存储层排序
         可通过 Ctrl+C 终止监控。
         """
         self.logger.info("进入尾部实时监控阶段，按 Ctrl+C 终止…")
-        # 注册信号处理
-        signal.signal(signal.SIGINT, self._handle_sigint)
-        signal.signal(signal.SIGTERM, self._handle_sigint)
-
-        while not self._stop_flag:
-            try:
-                # 单次提取当前视图的消息列表
-                new_msgs: List[Message] = self.main_controller.run_once()
-                if not new_msgs:
-                    time.sleep(self.tail_poll_interval)
-                    continue
+        self._install_signal_handlers()
+
+        base_interval = self.tail_poll_interval
+        poll_interval = base_interval
+        idle_polls = 0
+        # 基于单调时钟的截止时间调度：轮询周期包含 OCR 耗时，而非在每轮工作之后再额外睡满一个间隔
+        next_deadline = time.monotonic()
+        # 信号处理器已一次性安装；直接在循环外层兜底 KeyboardInterrupt（如处理器未能安装时）
+        try:
+            while not self._stop_flag:
+                try:
+                    # 先以低成本的画面哈希判断聊天区是否变化，未变化则跳过本轮 OCR 并按需退避轮询间隔
+                    changed, roi = self._poll_tail_frame()
+                    if not changed:
+                        idle_polls += 1
+                        if idle_polls >= self.TAIL_IDLE_POLLS_BEFORE_BACKOFF:
+                            poll_interval = min(
+                                poll_interval * self.TAIL_BACKOFF_FACTOR,
+                                max(base_interval, self.TAIL_MAX_POLL_INTERVAL),
+                            )
+                        self.logger.debug("画面无变化，跳过 OCR（轮询间隔 %.1fs）", poll_interval)
+                        next_deadline = self._wait_until_next_poll(next_deadline, poll_interval)
+                        continue
+                    idle_polls = 0
+                    poll_interval = base_interval
 
-                # 仅保留稳定键未出现过的消息进行增量保存
-                incremental: List[Message] = []
-                for m in new_msgs:
-                    key = m.stable_key()
-                    if not key:
-                        # 无稳定键的消息也交由存储层去重处理，但这里谨慎跳过，避免不稳定记录
+                    # 单次提取当前视图（或其变化条带）的消息列表
+                    if roi:
+                        self.logger.debug("仅识别变化条带：y=%d h=%d", roi[1], roi[3])
+                        new_msgs: List[Message] = self.main_controller.run_once(region=roi)
+                    else:
+                        new_msgs = self.main_controller.run_once()
+                    # 仅整屏识别的结果代表整帧内容，才可按整帧指纹缓存；变化条带的局部结果不入缓存
+                    if roi is None and self._last_frame_digest is not None:
+                        self._frame_cache_put(self._last_frame_digest, new_msgs)
+                    if not new_msgs:
+                        next_deadline = self._wait_until_next_poll(next_deadline, poll_interval)
                         continue
-                    if key not in self._last_saved_keyset:
-                        incremental.append(m)
-
-                if incremental:
-                    self.logger.info(f"检测到新消息 {len(incremental)} 条，执行增量保存…")
-                    self._save_messages_ordered(incremental, label="tail_incremental")
-                else:
-                    self.logger.debug("暂无新增消息")
-
-                time.sleep(self.tail_poll_interval)
-            except KeyboardInterrupt:
-                self._stop_flag = True
-            except Exception as e:
-                self.logger.warning(f"尾部监控循环出现异常：{e}")
-                time.sleep(self.tail_poll_interval)
+
+                    # 仅保留稳定键未出现过的消息进行增量保存：
+                    # 以指纹为键建立映射，通过集合差集一次求出新增键，再按屏幕顺序取回消息。
+                    # 无稳定键的消息谨慎跳过，避免不稳定记录。
+                    present: Dict[int, Message] = {
+                        fp: m for fp, m in ((_message_fingerprint(m), m) for m in new_msgs) if fp is not None
+                    }
+                    new_fps = present.keys() - self._last_saved_keyset
+                    incremental: List[Message] = [m for fp, m in present.items() if fp in new_fps]
+
+                    if incremental:
+                        self.logger.info("检测到新消息 %d 条，执行增量保存…", len(incremental))
+                        self._save_messages_ordered(incremental, label="tail_incremental")
+                    else:
+                        self.logger.debug("暂无新增消息")
+
+                    next_deadline = self._wait_until_next_poll(next_deadline, poll_interval)
+                except Exception as e:
+                    self.logger.warning("尾部监控循环出现异常：%s", e)
+                    next_deadline = self._wait_until_next_poll(next_deadline, base_interval)
+        except KeyboardInterrupt:
+            self._stop_flag = True
+
+    def _wait_until_next_poll(self, deadline: float, interval: float) -> float:
+        """睡眠到下一轮轮询的截止时间并返回新的截止时间。
+
+        函数级注释：
+        - 截止时间在上一轮基础上累加 interval，本轮工作（截图/OCR/保存）耗时计入周期；
+        - 若已落后于计划（工作耗时超过 interval）则不再睡眠，并以当前时刻重新对齐，
+          避免长时间 OCR 之后连续补跑多轮。
+        """
+        deadline += interval
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+            return deadline
+        return time.monotonic()
+
+    def _poll_tail_frame(self) -> tuple[bool, Optional[tuple[int, int, int, int]]]:
+        """截取聊天区域，判断画面是否变化并给出需要重新 OCR 的区域。
+
+        函数级注释：
+        - 以 dHash 与上一帧比较判断是否变化；变化时基于灰度差分计算底部新增条带（见 _changed_strip）；
+        - 返回 (changed, roi)：roi 为 None 表示需要整屏 OCR；
+        - dHash 不同但与上一帧缩小后的 SSIM 达到 TAIL_SSIM_THRESHOLD 时视为无变化（见 _frames_equivalent）；
+        - 画面虽与上一帧不同、但按精确指纹命中帧缓存（此前已整屏识别过完全相同的画面，例如界面来回切换）时
+          同样视为无变化；
+        - 截图失败或计算异常时返回 (True, None)，保守地交由整屏 run_once() 执行，避免漏抓；
+        - 每次调用都会刷新 _last_frame_hash、_last_frame_digest 与 _last_frame（失败时清空），使下一轮与最新画面比较。
+        """
+        try:
+            frame = self.main_controller.scroll.capture_current_view()
+            if frame is None:
+                self._last_frame_hash = self._last_frame_digest = self._last_frame = None
+                return True, None
+            gray = frame.convert("L")
+            frame_hash = _frame_dhash(gray)
+            pixels = np.asarray(gray)
+        except Exception as e:
+            self.logger.debug("画面哈希计算失败，回退为直接 OCR：%s", e)
+            self._last_frame_hash = self._last_frame_digest = self._last_frame = None
+            return True, None
+        changed = frame_hash != self._last_frame_hash
+        if changed:
+            # dHash 仅作廉价预检；只有变化的画面才计算精确指纹并查询帧缓存
+            digest = _frame_digest(frame)
+            changed = self._frame_cache_get(digest) is None
+        else:
+            digest = self._last_frame_digest
+        if changed and self._frames_equivalent(self._last_frame, gray):
+            # 仅有细微渲染噪声：保留参考帧不刷新，避免细小变化逐轮累积而始终不触发识别
+            return False, None
+        roi = _changed_strip(self._last_frame, pixels) if changed else None
+        self._last_frame_hash = frame_hash
+        self._last_frame_digest = digest
+        self._last_frame = pixels
+        return changed, roi
+
+    def _frames_equivalent(self, prev: Optional[np.ndarray], cur: Image.Image) -> bool:
+        """判断当前帧与上一帧（灰度像素）在 256 最大边缩小后的 SSIM 是否达到 TAIL_SSIM_THRESHOLD。"""
+        if prev is None or prev.shape != (cur.height, cur.width):
+            return False
+        try:
+            similarity = self.main_controller.scroll.screenshot_similarity(
+                Image.fromarray(prev), cur, max_side=256
+            )
+        except Exception as e:
+            self.logger.debug("SSIM 计算失败：%s", e)
+            return False
+        return similarity is not None and similarity >= self.TAIL_SSIM_THRESHOLD
+
+    def _frame_cache_get(self, frame_key: tuple) -> Optional[List[Message]]:
+        """按帧精确指纹查询帧缓存，命中时刷新 LRU 顺序；未命中返回 None。"""
+        cached = self._frame_cache.get(frame_key)
+        if cached is not None:
+            self._frame_cache.move_to_end(frame_key)
+        return cached
+
+    def _frame_cache_put(self, frame_key: tuple, messages: List[Message]) -> None:
+        """写入帧缓存，超过 FRAME_CACHE_SIZE 时淘汰最久未使用的条目。"""
+        self._frame_cache[frame_key] = messages
+        self._frame_cache.move_to_end(frame_key)
+        if len(self._frame_cache) > self.FRAME_CACHE_SIZE:
+            self._frame_cache.popitem(last=False)
+
+    def _install_signal_handlers(self) -> None:
+        """一次性安装 SIGINT/SIGTERM 处理器（重复调用无副作用）。
+
+        函数级注释：
+        - 仅在进入尾部监控时安装：初始扫描阶段仍依赖默认的 KeyboardInterrupt 中断 progressive_scroll；
+        - signal.signal 只能在主线程调用，非主线程构造/运行时忽略安装失败，由循环外层的 KeyboardInterrupt 兜底。
+        """
+        if self._signal_handlers_installed:
+            return
+        try:
+            signal.signal(signal.SIGINT, self._handle_sigint)
+            signal.signal(signal.SIGTERM, self._handle_sigint)
+            self._signal_handlers_installed = True
+        except ValueError as e:
+            self.logger.debug("无法安装信号处理器（非主线程）：%s", e)
 
     def _handle_sigint(self, signum, frame):
         """信号处理：设置停止标记便于循环退出。"""
@@ -475,12 +857,12 @@ class FullTimelineScanner:
     def _print_preview(self, messages: List[Message], max_items: int = 10):
         """输出预览：按时间顺序展示前若干条消息的简要信息。"""
         try:
-            # 由存储层排序，这里仅本地排序预览
-            msgs_sorted = sorted(messages, key=lambda m: (m.timestamp or datetime.min))
+            # 由存储层排序，这里仅以有界堆取最早的 max_items 条预览（与完整排序后截取等价）
+            msgs_sorted = heapq.nsmallest(max_items, messages, key=lambda m: m.timestamp or _DATETIME_MIN)
             self.logger.info("消息预览（最多显示 %d 条）：", max_items)
-            for i, m in enumerate(msgs_sorted[:max_items]):
+            for i, m in enumerate(msgs_sorted):
                 ts = m.timestamp.isoformat() if isinstance(m.timestamp, datetime) else str(m.timestamp)
-                self.logger.info(f"[{i+1}] {ts} | {m.sender}: {m.content}")
+                self.logger.info("[%d] %s | %s: %s", i + 1, ts, m.sender, m.content)
         except Exception:
             pass
 
@@ -489,15 +871,21 @@ class FullTimelineScanner:
         try:
             stats = self.storage.get_statistics() if hasattr(self.storage, "get_statistics") else {}
             if stats:
-                self.logger.info(f"存储统计: {json.dumps(stats, ensure_ascii=False)}")
+                self.logger.info("存储统计: %s", _dumps_stats(stats))
         except Exception:
             pass
 
 
-def main():
-    """CLI 入口：解析参数并运行全量时间线扫描。"""
-    import argparse
+def _parse_chat_area(text: str) -> tuple[int, int, int, int]:
+    """argparse 类型函数：解析 --chat-area（x,y,width,height），格式不合法时由 argparse 报错退出"""
+    area = parse_chat_area(text)
+    if area is None:
+        raise argparse.ArgumentTypeError("chat-area 必须为 'x,y,width,height'")
+    return area
+
 
+def build_parser() -> argparse.ArgumentParser:
+    """构建全量时间线扫描 CLI 的参数解析器。"""
     parser = argparse.ArgumentParser(description="微信聊天全量时间线扫描，并尾部实时监控")
     parser.add_argument("--output", "-o", default="output", help="输出目录")
     parser.add_argument("--no-tail", action="store_true", help="禁用尾部实时监控")
@@ -507,23 +895,54 @@ def main():
     parser.add_argument("--similarity", type=float, default=0.985, help="相似度阈值")
     parser.add_argument("--verbose", "-v", action="store_true", help="详细日志模式")
     parser.add_argument("--window-title", dest="title_override", help="窗口标题覆盖（用于窗口定位失败时，例如 '微信' 或 'WeChat'）")
-    parser.add_argument("--chat-area", help="聊天区域坐标覆盖，格式 x,y,width,height")
+    parser.add_argument("--chat-area", type=_parse_chat_area, help="聊天区域坐标覆盖，格式 x,y,width,height")
     parser.add_argument("--ocr-lang", help="OCR 语言覆盖（默认从配置读取，例如 ch）")
+    parser.add_argument("--raw-region-input", action="store_true",
+                        help="区域识别前跳过整图预处理，直接把优化后的截图交给 OCR 引擎（省去每帧一次整图增强）")
+    parser.add_argument("--gpu", action="store_true", help="使用 GPU 进行 OCR 推理（需安装 CUDA 版 PaddlePaddle）")
+    parser.add_argument("--cudnn-search", action="store_true",
+                        help="GPU 推理时开启 cuDNN 卷积算法穷举搜索（需配合 --gpu，适合整帧尺寸固定的长时间扫描）")
+    parser.add_argument("--mkldnn", action="store_true",
+                        help="CPU 推理时开启 MKL-DNN 加速（仅 x86 CPU；区域尺寸多变时内存占用会增长）")
+    parser.add_argument("--save-batch-size", type=int, default=0,
+                        help="初始扫描分片保存：每累计 N 条消息写出一个 initial_full_timeline_partNNN 分片以限制内存"
+                             "（默认 0，扫描结束时保存为单个 initial_full_timeline 文件）")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="初始扫描阶段的 OCR 流水线并发度（默认 1 为串行；>1 时开启流水线，识别与滚动重叠进行）")
+    return parser
+
+
+def _apply_device_options(ocr_config, args: argparse.Namespace) -> None:
+    """
+    将 --gpu / --cudnn-search / --mkldnn 参数应用到 OCR 配置。
 
-    args = parser.parse_args()
+    函数级注释：
+    - --gpu 仅在检测到可用 CUDA 时设置 use_gpu，否则告警并保持 CPU 推理；
+    - --cudnn-search 仅随 GPU 生效，未启用 GPU 时告警并忽略；
+    - --mkldnn 开启 CPU 推理的 MKL-DNN 加速，GPU 推理时引擎会忽略该项。
+    """
+    log = logging.getLogger("FullTimelineScanner")
+    if args.gpu:
+        if _cuda_available():
+            ocr_config.use_gpu = True
+            log.info("OCR 将使用 GPU 推理")
+        else:
+            log.warning("未检测到可用的 CUDA GPU（或 PaddlePaddle 非 GPU 版本），继续使用 CPU 推理")
+    if args.cudnn_search:
+        if getattr(ocr_config, "use_gpu", False):
+            ocr_config.cudnn_exhaustive_search = True
+            log.info("GPU 推理将开启 cuDNN 卷积算法穷举搜索")
+        else:
+            log.warning("--cudnn-search 需配合可用的 GPU 推理（--gpu），已忽略")
+    if args.mkldnn:
+        ocr_config.enable_mkldnn = True
 
-    # 创建扫描器
-    # 解析聊天区域坐标覆盖
-    chat_area_tuple = None
-    if args.chat_area:
-        try:
-            parts = [p.strip() for p in args.chat_area.split(',')]
-            if len(parts) != 4:
-                raise ValueError("chat-area 必须为 'x,y,width,height'")
-            chat_area_tuple = tuple(map(int, parts))  # type: ignore
-        except Exception as e:
-            print(f"聊天区域覆盖解析失败: {e}")
 
+def main():
+    """CLI 入口：解析参数并运行全量时间线扫描。"""
+    args = build_parser().parse_args()
+
+    # 创建扫描器（聊天区域坐标覆盖已由 argparse 解析为元组）
     scanner = FullTimelineScanner(
         output_dir=args.output,
         realtime_tail_monitor=(not args.no_tail),
@@ -533,7 +952,9 @@ def main():
         similarity_threshold=args.similarity,
         verbose=args.verbose,
         title_override=args.title_override,
-        chat_area_override=chat_area_tuple,
+        chat_area_override=args.chat_area,
+        ocr_workers=args.workers,
+        save_batch_size=args.save_batch_size,
     )
 
     # 可选：应用 OCR 语言覆盖到主控制器
@@ -544,6 +965,13 @@ def main():
         except Exception as e:
             logging.getLogger("FullTimelineScanner").warning("应用 OCR 语言失败: %s", e)
 
+    # 可选：区域识别前跳过整图预处理（主控制器与高级滚动控制器的提取路径均读取该配置）
+    if args.raw_region_input:
+        scanner.main_controller.ocr.config.prefer_raw_region_input = True
+
+    # 可选：GPU 推理（引擎在首次识别时按配置初始化，需在 run() 前设置）
+    _apply_device_options(scanner.main_controller.ocr.config, args)
+
     success = scanner.run()
     sys.exit(0 if success else 1)
 
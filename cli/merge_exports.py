@@ -21,12 +21,56 @@
 """
 
 import argparse
-import csv
 import datetime as dt
 import json
 import os
+import queue
 import re
-from typing import Dict, List, Tuple, Iterable
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Iterable, Iterator
+
+try:
+    import ijson  # 可选：流式解析大体积导出文件
+except ImportError:
+    ijson = None
+
+try:
+    import orjson  # 可选：加速 JSON 解析与导出
+except ImportError:
+    orjson = None
+
+
+# 纯时间/日期/星期分隔消息的匹配规则：合并为单个预编译交替式，模块加载时编译一次；
+# 时间后缀（H:MM[:SS]）与星期前缀抽取为共享片段，减少各分支间的重复回溯
+_TIME_HMS = r"\d{1,2}:\d{2}(?::\d{2})?"
+_TIME_ONLY_UNION = re.compile(
+    "|".join(
+        (
+            r"\d{4}年\d{1,2}月\d{1,2}日",
+            rf"\d{{1,2}}月\d{{1,2}}日(?:\s*{_TIME_HMS})?",
+            _TIME_HMS,
+            rf"(?:星期|周)[一二三四五六日天](?:\s*{_TIME_HMS})?",
+            r"(?:昨天|今天|前天)(?:\s*\d{1,2}:\d{2})?",
+            rf"(?:下午|上午|中午|凌晨|傍晚|晚间|早上|早晨|AM|PM)\s*{_TIME_HMS}",
+        )
+    )
+)
+# 交替式可匹配的最大长度（规范化后单空格），超过即无需进入正则引擎
+_TIME_ONLY_UNION_MAX_LEN = 32
+# 分隔消息（含宽松兜底）可能的首字符；绝大多数普通聊天消息在此处即被排除。
+# 正则中的 \d 也匹配全角、阿拉伯-印度等 Unicode 数字，数字首字符另以 str.isdigit() 判断
+_TIME_ONLY_FIRSTCHARS = frozenset(":./-年月日星期周昨今前下上中凌傍晚早AP")
+# 宽松兜底：字符集限定 + 单字符标记（“星期”“周”在判断时单独检查子串）。
+# 文本已规范化（空白仅剩单个空格），删除全部允许字符后为空串即说明仅由这些字符组成
+_TIME_ONLY_ALLOWED_TRANS = str.maketrans("", "", "0123456789 :./-年月日星期周")
+_TIME_ONLY_MARKERS = frozenset("年月日:/.-")
+
+
+# 文本规范化的字符映射：删除零宽/方向控制字符，全角冒号转半角
+_NORMALIZE_TABLE = str.maketrans({"\u200b": None, "\u200c": None, "\u200d": None, "\u200e": None, "\u200f": None, "：": ":"})
 
 
 def _ensure_dir(path: str) -> None:
@@ -54,14 +98,47 @@ def _normalize_text(text: str) -> str:
     """
     if text is None:
         return ""
-    s = str(text)
-    # 移除常见的零宽与方向控制字符，统一全角冒号为半角
-    s = s.replace("\u200b", "").replace("\u200c", "").replace("\u200d", "")
-    s = s.replace("\u200e", "").replace("\u200f", "")
-    s = s.replace("：", ":")
-    s = s.strip()
-    s = re.sub(r"\s+", " ", s)
-    return s
+    # 快速路径：isprintable() 为真时不含零宽/方向控制字符及除 ASCII 空格外的任何空白，
+    # 再排除全角冒号、连续空格与首尾空格，即可确认文本已是规范形态
+    if (
+        text.__class__ is str
+        and text.isprintable()
+        and "：" not in text
+        and "  " not in text
+        and text[:1] != " "
+        and text[-1:] != " "
+    ):
+        return text
+    # 移除常见的零宽与方向控制字符，并统一全角冒号为半角（单次 translate 完成）
+    s = str(text).translate(_NORMALIZE_TABLE)
+    # split() 无参时按任意 Unicode 空白切分并丢弃首尾空白，等价于 strip + 折叠连续空白
+    return " ".join(s.split())
+
+
+def _is_iso_seconds_shape(s: str) -> bool:
+    """判断字符串是否为 `YYYY-MM-DDTHH:MM:SS` 形态（仅校验分隔符位置与 ASCII 数字，不校验取值范围）。"""
+    return (
+        len(s) == 19
+        and s[4] == "-" and s[7] == "-" and s[10] == "T" and s[13] == ":" and s[16] == ":"
+        and s.isascii()
+        and s[:4].isdigit() and s[5:7].isdigit() and s[8:10].isdigit()
+        and s[11:13].isdigit() and s[14:16].isdigit() and s[17:].isdigit()
+    )
+
+
+def _parse_ts_string_fast(s: str) -> Optional[dt.datetime]:
+    """按切片直接构造 datetime，替代逐格式解释的 strptime。
+
+    函数级注释：
+    - 仅处理 `_is_iso_seconds_shape` 形态的字符串，其余返回 None 由调用方走慢速路径；
+    - 取值越界（如 13 月、2 月 30 日）时同样返回 None，与 strptime 抛出 ValueError 的语义一致。
+    """
+    if not _is_iso_seconds_shape(s):
+        return None
+    try:
+        return dt.datetime(int(s[:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16]), int(s[17:]))
+    except ValueError:
+        return None
 
 
 def _normalize_timestamp(ts: str) -> str:
@@ -84,7 +161,10 @@ def _normalize_timestamp(ts: str) -> str:
     # 若缺少 'T'，尝试替换空格为 'T'
     if "T" not in s and " " in s:
         s = s.replace(" ", "T")
-    # 尝试用 datetime 解析
+    # 快速路径：已是标准秒级 ISO 形态时直接返回（与 strptime+strftime 往返结果一致）
+    if _is_iso_seconds_shape(s):
+        return s
+    # 慢速路径：用 datetime 解析（兼容未补零的月/日/时等写法）
     for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"):
         try:
             dt_obj = dt.datetime.strptime(s, fmt)
@@ -95,7 +175,56 @@ def _normalize_timestamp(ts: str) -> str:
     return s
 
 
-def _stable_key(msg: Dict) -> str:
+def _memoize(fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """为单参数规范化函数构造基于 dict 的记忆化包装。
+
+    函数级注释：
+    - 合并时发送者、时间戳高度重复，缓存可按重复倍数削减规范化开销；
+    - 缓存随包装对象存活，由调用方按一次合并的生命周期创建，避免全局常驻；
+    - 不可哈希的输入（如列表）直接调用原函数，不做缓存。
+    """
+    cache: Dict[Any, Any] = {}
+
+    def wrapper(raw):
+        try:
+            return cache[raw]
+        except KeyError:
+            value = cache[raw] = fn(raw)
+            return value
+        except TypeError:
+            return fn(raw)
+
+    return wrapper
+
+
+def _stable_key_parts(
+    msg: Dict,
+    normalize_text: Callable[[Any], str] = _normalize_text,
+    normalize_timestamp: Callable[[Any], str] = _normalize_timestamp,
+) -> Tuple[str, ...]:
+    """计算消息稳定去重键的组成部分（不拼接字符串）。
+
+    返回 ("id", <id>) 或 (sender, timestamp, content)；合并时直接对该元组取哈希，
+    各部分多为记忆化后复用的字符串对象，避免为每条消息分配一份拼接后的长字符串。
+    """
+    mid = msg.get("id", "")
+    # 快速路径：id 为无首尾空白的非空字符串（导出文件的常见情况）时直接使用，跳过 str()/strip()
+    if mid.__class__ is str and mid and not mid[0].isspace() and not mid[-1].isspace():
+        return ("id", mid)
+    mid = str(mid).strip()
+    if mid:
+        return ("id", mid)
+    sender = normalize_text(msg.get("sender", "")).lower()
+    ts = normalize_timestamp(msg.get("timestamp", ""))
+    content = normalize_text(msg.get("content", ""))
+    return (sender, ts, content)
+
+
+def _stable_key(
+    msg: Dict,
+    normalize_text: Callable[[Any], str] = _normalize_text,
+    normalize_timestamp: Callable[[Any], str] = _normalize_timestamp,
+) -> str:
     """计算消息的稳定去重键。
 
     规则:
@@ -104,33 +233,35 @@ def _stable_key(msg: Dict) -> str:
 
     参数:
         msg: 消息字典，期望包含 sender/content/timestamp 等键。
+        normalize_text / normalize_timestamp: 可替换为记忆化版本的规范化函数。
 
     返回:
         用于去重的稳定键字符串。
     """
     if msg is None:
         return ""
-    mid = str(msg.get("id", "")).strip()
-    if mid:
-        return f"id:{mid}"
-    sender = _normalize_text(msg.get("sender", "")).lower()
-    ts = _normalize_timestamp(msg.get("timestamp", ""))
-    content = _normalize_text(msg.get("content", ""))
-    return f"{sender}|{ts}|{content}"
+    parts = _stable_key_parts(msg, normalize_text, normalize_timestamp)
+    if len(parts) == 2:
+        return "id:" + parts[1]
+    return "|".join(parts)
+
 
+def _aggressive_key_parts(msg: Dict, normalize_text: Callable[[Any], str] = _normalize_text) -> Tuple[str, str]:
+    """激进内容级去重键的组成部分：(sender, content)。"""
+    return (normalize_text(msg.get("sender", "")).lower(), normalize_text(msg.get("content", "")))
 
-def _aggressive_key(msg: Dict) -> str:
+
+def _aggressive_key(msg: Dict, normalize_text: Callable[[Any], str] = _normalize_text) -> str:
     """激进内容级去重键：仅使用 sender+content，用于减少同轮重复。
 
     参数:
         msg: 消息字典。
+        normalize_text: 可替换为记忆化版本的文本规范化函数。
 
     返回:
         基于发送者与内容的键。
     """
-    sender = _normalize_text(msg.get("sender", "")).lower()
-    content = _normalize_text(msg.get("content", ""))
-    return f"{sender}|{content}"
+    return "|".join(_aggressive_key_parts(msg, normalize_text))
 
 
 def _is_time_only_separator(text: str) -> bool:
@@ -148,30 +279,73 @@ def _is_time_only_separator(text: str) -> bool:
     if not s:
         return False
 
-    patterns = [
-        r"^\d{4}年\d{1,2}月\d{1,2}日$",
-        r"^\d{1,2}月\d{1,2}日(?:\s*\d{1,2}:\d{2}(?::\d{2})?)?$",
-        r"^\d{1,2}:\d{2}(?::\d{2})?$",
-        r"^星期[一二三四五六日天]$",
-        r"^周[一二三四五六日天]$",
-        r"^星期[一二三四五六日天]\s*\d{1,2}:\d{2}(?::\d{2})?$",
-        r"^周[一二三四五六日天]\s*\d{1,2}:\d{2}(?::\d{2})?$",
-        r"^(?:昨天|今天|前天)(?:\s*\d{1,2}:\d{2})?$",
-        r"^(?:下午|上午|中午|凌晨|傍晚|晚间|早上|早晨)\s*\d{1,2}:\d{2}(?::\d{2})?$",
-        r"^(?:AM|PM)\s*\d{1,2}:\d{2}(?::\d{2})?$",
-    ]
-    for p in patterns:
-        if re.fullmatch(p, s):
-            return True
+    if s[0] not in _TIME_ONLY_FIRSTCHARS and not s[0].isdigit():
+        return False
+    if len(s) <= _TIME_ONLY_UNION_MAX_LEN and _TIME_ONLY_UNION.fullmatch(s):
+        return True
 
     # 宽松兜底：仅数字/空格/冒号/日期/星期单位组成，且包含日期/星期单位或时间冒号
-    if re.fullmatch(r"[0-9\s:\./\-年月日星期周]+", s):
-        if any(ch in s for ch in ["年", "月", "日", "星期", "周", ":", "/", ".", "-"]):
+    if not s.translate(_TIME_ONLY_ALLOWED_TRANS):
+        if not _TIME_ONLY_MARKERS.isdisjoint(s) or "星期" in s or "周" in s:
             return True
 
     return False
 
 
+# 可能超出 64 位的整数字面量（20 位及以上数字）：orjson 会将其静默解析为 float
+_LONG_DIGITS_RE = re.compile(rb"\d{20,}")
+
+
+def _loads_json_bytes(raw: bytes) -> Any:
+    """解析 JSON 字节：优先 orjson，与标准库 json 结果不一致的输入回退到 json.loads。
+
+    函数级注释：
+    - orjson 拒绝 NaN/Infinity 等标准库可接受的字面量（抛出 JSONDecodeError），此时回退；
+    - 含 20 位及以上数字串时可能存在超出 64 位的整数，orjson 会将其转为 float（破坏 id 与去重键），
+      直接交给标准库解析；字符串内的长数字串只会多走一次较慢路径，结果不受影响。
+    """
+    if orjson is not None and not _LONG_DIGITS_RE.search(raw):
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
+
+def _load_json(path: str) -> Any:
+    """一次性解析 JSON 文件：整体读入字节后经 `_loads_json_bytes` 解析（优先 orjson，必要时回退标准库）。"""
+    with open(path, "rb") as f:
+        return _loads_json_bytes(f.read())
+
+
+def iter_messages_from_file(path: str) -> Iterator[Dict]:
+    """逐条产出 JSON 文件中的消息字典。
+
+    函数级注释：
+    - 安装 ijson 时流式解析顶层数组元素，消息逐条进入去重流程，峰值内存不随文件体积增长；
+    - 未安装 ijson 时回退到 `_load_json` 一次性解析（优先 orjson）；
+    - 顶层非列表时不产出任何消息；解析失败时打印警告并停止产出（已产出的消息保留）。
+
+    参数:
+        path: JSON 文件路径。
+    """
+    try:
+        if ijson is not None:
+            with open(path, "rb") as f:
+                # use_float=True：数值解析为 float 而非 Decimal，保持与 json.load 一致
+                for d in ijson.items(f, "item", use_float=True):
+                    if isinstance(d, dict):
+                        yield d
+            return
+        data = _load_json(path)
+        if isinstance(data, list):
+            for d in data:
+                if isinstance(d, dict):
+                    yield d
+    except Exception as e:
+        print(f"[WARN] 加载失败: {path} -> {e}")
+
+
 def load_messages_from_file(path: str) -> List[Dict]:
     """从 JSON 文件加载消息列表。
 
@@ -184,8 +358,7 @@ def load_messages_from_file(path: str) -> List[Dict]:
         消息字典列表；解析失败时返回空列表。
     """
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _load_json(path)
         if isinstance(data, list):
             return [d for d in data if isinstance(d, dict)]
         return []
@@ -214,21 +387,170 @@ def discover_input_files(inputs: Iterable[str]) -> List[str]:
         if os.path.isfile(p) and p.lower().endswith(".json"):
             files.append(p)
         elif os.path.isdir(p):
-            for name in sorted(os.listdir(p)):
-                fp = os.path.join(p, name)
-                if os.path.isfile(fp) and fp.lower().endswith(".json"):
-                    if os.path.basename(fp) == ".dedup_index.json":
+            # scandir 一次取得目录项及其类型信息，避免逐项 isfile 再 stat 一次
+            with os.scandir(p) as it:
+                for entry in it:
+                    name = entry.name
+                    if name == ".dedup_index.json" or not name.lower().endswith(".json"):
                         continue
-                    files.append(fp)
+                    if entry.is_file():
+                        files.append(entry.path)
     # 去重
     uniq = sorted(set(files))
     return uniq
 
 
+# 并行预取时每个文件的有界消息队列容量：限制预取占用的内存，生产者在队列满时等待消费
+_PREFETCH_QUEUE_SIZE = 1024
+# 预取队列的文件结束标记
+_PREFETCH_END = object()
+
+
+def _prefetch_file(path: str, q: "queue.Queue", stop: threading.Event) -> None:
+    """在工作线程中流式读取单个文件，将消息逐条放入有界队列，结束时放入 _PREFETCH_END。
+
+    函数级注释：
+    - 复用 iter_messages_from_file，安装 ijson 时同样逐条解析，内存占用受队列容量约束；
+    - stop 被置位（消费方提前结束）时尽快退出，避免阻塞在已满的队列上。
+    """
+
+    def _put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        if stop.is_set():
+            return
+        for d in iter_messages_from_file(path):
+            if not _put(d):
+                return
+    finally:
+        _put(_PREFETCH_END)
+
+
+def _iter_file_messages(input_files: List[str], max_workers: int) -> Iterator[Dict]:
+    """按输入顺序逐条产出所有文件中的消息，可选多线程预取。
+
+    函数级注释：
+    - max_workers <= 1 或仅一个文件时，顺序流式读取；
+    - 否则使用线程池同时流式预取最多 max_workers 个文件（文件 I/O 与解析可与去重重叠），
+      每个文件经容量为 _PREFETCH_QUEUE_SIZE 的有界队列交付，峰值内存不随文件体积增长；
+    - 按提交顺序消费各文件的队列，保证去重结果与顺序读取一致。
+    """
+    if max_workers <= 1 or len(input_files) <= 1:
+        for fp in input_files:
+            yield from iter_messages_from_file(fp)
+        return
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending: deque = deque()
+
+        def _submit(fp: str) -> None:
+            q: queue.Queue = queue.Queue(maxsize=_PREFETCH_QUEUE_SIZE)
+            pool.submit(_prefetch_file, fp, q, stop)
+            pending.append(q)
+
+        files = iter(input_files)
+        for fp in files:
+            _submit(fp)
+            if len(pending) >= max_workers:
+                break
+        try:
+            while pending:
+                q = pending.popleft()
+                nxt = next(files, None)
+                if nxt is not None:
+                    _submit(nxt)
+                while True:
+                    d = q.get()
+                    if d is _PREFETCH_END:
+                        break
+                    yield d
+        finally:
+            # 消费方提前结束（或异常）时通知生产者退出，线程池随后回收线程
+            stop.set()
+
+
+# engine="auto" 时切换到 pandas 向量化去重/排序的消息数量阈值
+_PANDAS_MIN_MESSAGES = 100_000
+
+
+def _merge_with_pandas(
+    messages: List[Dict],
+    exclude_time_only: bool,
+    normalize_text: Callable[[Any], str],
+    normalize_timestamp: Callable[[Any], str],
+    parse_ts: Callable[[Any], Tuple[int, str]],
+) -> Optional[List[Dict]]:
+    """使用 pandas/NumPy 对已加载的消息做向量化过滤、去重与排序（结果与逐条循环一致）。
+
+    函数级注释：
+    - 各原始列先 factorize，规范化函数只对唯一值调用一次，再按编码回填；
+    - 稳定键在 object 数组上逐元素拼接，由 pandas 哈希去重（保留首次出现）；
+    - 时间戳排序键先在唯一值上排出整数名次，再对整数做稳定 argsort，同键保持加载顺序；
+    - 不支持激进去重（其“键与内容键同时未见”的贪心语义无法拆成两次独立去重），由调用方走逐条循环；
+    - 未安装 pandas 或字段值不可哈希时返回 None，调用方回退到逐条循环。
+    """
+    try:
+        import numpy as np
+        import pandas as pd
+    except ImportError:
+        return None
+
+    def _map_unique(raw: List[Any], *fns: Callable[[Any], Any]):
+        # None 被 factorize 编码为 -1，对应各结果数组末尾追加的 fn(None)
+        codes, uniques = pd.factorize(pd.Series(raw, dtype=object))
+        uniques = list(uniques) + [None]
+        out = []
+        for fn in fns:
+            mapped = np.empty(len(uniques), dtype=object)
+            mapped[:] = [fn(u) for u in uniques]
+            out.append(mapped)
+        return codes, out
+
+    def _id_key(mid: Any) -> str:
+        mid = str(mid).strip()
+        return f"id:{mid}" if mid else ""
+
+    try:
+        codes, (id_u,) = _map_unique([m.get("id", "") for m in messages], _id_key)
+        id_keys = id_u[codes]
+        codes, (sender_u,) = _map_unique([m.get("sender", "") for m in messages], lambda v: normalize_text(v).lower())
+        senders = sender_u[codes]
+        content_fns = (normalize_text, _is_time_only_separator) if exclude_time_only else (normalize_text,)
+        content_codes, content_u = _map_unique([m.get("content", "") for m in messages], *content_fns)
+        contents = content_u[0][content_codes]
+        ts_codes, (ts_norm_u, ts_key_u) = _map_unique([m.get("timestamp", "") for m in messages], normalize_timestamp, parse_ts)
+    except TypeError:
+        return None
+
+    keys = np.where(id_keys != "", id_keys, senders + "|" + ts_norm_u[ts_codes] + "|" + contents)
+    # 分隔消息不参与去重：先剔除再判重，与逐条循环的跳过顺序一致
+    if exclude_time_only:
+        candidates = np.flatnonzero(~content_u[1].astype(bool)[content_codes])
+    else:
+        candidates = np.arange(len(messages))
+    duplicated = pd.Series(keys[candidates], dtype=object).duplicated(keep="first").to_numpy()
+    positions = candidates[~duplicated]
+
+    # 唯一时间戳排序键 -> 稠密整数名次
+    dense = {k: i for i, k in enumerate(sorted(set(ts_key_u)))}
+    ts_rank = np.array([dense[k] for k in ts_key_u], dtype=np.int64)[ts_codes]
+    order = positions[np.argsort(ts_rank[positions], kind="stable")]
+    return [messages[i] for i in order.tolist()]
+
+
 def merge_messages(
     input_files: List[str],
     exclude_time_only: bool = False,
     aggressive_dedup: bool = False,
+    max_workers: Optional[int] = None,
+    engine: str = "python",
 ) -> List[Dict]:
     """合并多个 JSON 文件中的消息并去重。
 
@@ -241,79 +563,151 @@ def merge_messages(
         input_files: 需要合并的 JSON 文件路径列表。
         exclude_time_only: 是否过滤纯时间/日期/星期分隔消息。
         aggressive_dedup: 是否启用激进内容级去重。
+        max_workers: 并行流式预取文件的线程数；默认 min(8, 文件数)，1 表示在当前线程顺序读取。
+        engine: 去重与排序实现："python"（逐条流式循环，默认）、"pandas"（向量化，需一次性载入全部消息）
+            或 "auto"（消息数不少于 _PANDAS_MIN_MESSAGES 时使用 pandas）；激进去重始终使用逐条循环。
 
     返回:
         合并后的消息列表（字典）。
     """
-    seen_stable: set = set()
-    seen_aggr: set = set()
-    merged: List[Dict] = []
-
-    total_loaded = 0
-    for fp in input_files:
-        msgs = load_messages_from_file(fp)
-        total_loaded += len(msgs)
-        for m in msgs:
-            if exclude_time_only and _is_time_only_separator(m.get("content", "")):
-                continue
-            key = _stable_key(m)
-            if key in seen_stable:
-                continue
-            if aggressive_dedup:
-                akey = _aggressive_key(m)
-                if akey in seen_aggr:
-                    continue
-                seen_aggr.add(akey)
-            seen_stable.add(key)
-            merged.append(m)
-
-    # 尝试按时间戳排序（解析失败的保持相对顺序）
-    def _ts_key(m: Dict) -> Tuple[int, str]:
-        ts = _normalize_timestamp(m.get("timestamp", ""))
+    # 本次合并范围内的记忆化规范化函数（发送者/时间戳重复度高）
+    norm_text = _memoize(_normalize_text)
+    norm_ts = _memoize(_normalize_timestamp)
+
+    # 时间戳排序键：解析结果按原始时间戳缓存，去重阶段计算一次即可供排序复用
+    @_memoize
+    def _parse_ts(raw) -> Tuple[int, str]:
+        ts = norm_ts(raw)
+        dt_obj = _parse_ts_string_fast(ts)
+        if dt_obj is not None:
+            return (0, ts)
         try:
             dt_obj = dt.datetime.strptime(ts, "%Y-%m-%dT%H:%M:%S")
             return (0, dt_obj.isoformat())
         except Exception:
             return (1, ts)
 
-    merged_sorted = sorted(merged, key=_ts_key)
+    # 单次遍历完成过滤与去重：稳定键哈希 -> (排序键, 消息)，dict 保持首次出现的加载顺序。
+    # 成员判断直接使用 dict/set：其哈希查找已在 C 层完成，额外的布隆过滤器预检需在 Python 层
+    # 计算多次哈希，且命中后仍要回查精确集合，只会增加开销
+    seen: Dict[int, Tuple[Tuple[int, str], Dict]] = {}
+    seen_aggr: set = set()
+
+    if max_workers is None:
+        max_workers = min(8, len(input_files))
+    messages: Iterable[Dict] = _iter_file_messages(input_files, max_workers)
+    if engine != "python" and not aggressive_dedup:
+        messages = list(messages)
+        if engine == "pandas" or len(messages) >= _PANDAS_MIN_MESSAGES:
+            merged_sorted = _merge_with_pandas(messages, exclude_time_only, norm_text, norm_ts, _parse_ts)
+            if merged_sorted is not None:
+                print(f"[INFO] 已加载 {len(messages)} 条，合并后 {len(merged_sorted)} 条（去重后）。")
+                return merged_sorted
+
+    total_loaded = 0
+    # 记录排序键是否按到达顺序单调不减（导出文件通常已按时间排列），是则无需再排序
+    in_order = True
+    last_ts_key: Optional[Tuple[int, str]] = None
+    for m in messages:
+        total_loaded += 1
+        if exclude_time_only and _is_time_only_separator(m.get("content", "")):
+            continue
+        # 去重键取组成部分元组的 64 位哈希：集合中只保存整数，不再为每条消息拼接并常驻长字符串
+        key = hash(_stable_key_parts(m, norm_text, norm_ts))
+        if key in seen:
+            continue
+        if aggressive_dedup:
+            akey = hash(_aggressive_key_parts(m, norm_text))
+            if akey in seen_aggr:
+                continue
+            seen_aggr.add(akey)
+        ts_key = _parse_ts(m.get("timestamp", ""))
+        if in_order and last_ts_key is not None and ts_key < last_ts_key:
+            in_order = False
+        last_ts_key = ts_key
+        seen[key] = (ts_key, m)
+
+    # 按时间戳排序（无法解析的排在其后；排序稳定，同键保持加载顺序）
+    # list(dict.values()) 与 list(map(...)) 均按已知长度一次性分配，避免逐个 append 的扩容
+    entries = list(seen.values())
+    if not in_order:
+        entries.sort(key=itemgetter(0))
+    merged_sorted = list(map(itemgetter(1), entries))
     print(f"[INFO] 已加载 {total_loaded} 条，合并后 {len(merged_sorted)} 条（去重后）。")
     return merged_sorted
 
 
 def exclude_fields(messages: List[Dict], fields: List[str]) -> List[Dict]:
-    """从消息字典中移除指定字段。
+    """从消息字典中移除指定字段（原地修改）。
+
+    消息由 merge_messages 刚解析得到、不被其他对象引用，因此直接在原字典上 pop，
+    避免为每条消息再复制一份字典；调用方若需保留原始数据，应自行先行复制。
 
     参数:
         messages: 消息列表。
         fields: 需要移除的字段名列表。
 
     返回:
-        处理后的消息列表（新对象）。
+        处理后的消息列表（即传入的同一列表）。
     """
     if not fields:
         return messages
-    out: List[Dict] = []
     for m in messages:
-        nm = dict(m)
         for f in fields:
-            nm.pop(f, None)
-        out.append(nm)
-    return out
+            m.pop(f, None)
+    return messages
 
 
 def save_json(messages: List[Dict], out_path: str) -> None:
     """保存为 JSON 文件（UTF-8，缩进 2）。
 
+    安装 orjson 时一次性编码为 bytes 并单次写入；遇到 orjson 不支持的值（如超过 64 位的整数）
+    时回退到标准库 json。
+
     参数:
         messages: 消息列表。
         out_path: 输出文件路径。
     """
+    if orjson is not None:
+        try:
+            buf = orjson.dumps(messages, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            buf = None
+        if buf is not None:
+            with open(out_path, "wb") as f:
+                f.write(buf)
+            print(f"[INFO] 写入 JSON: {out_path}")
+            return
     with open(out_path, "w", encoding="utf-8") as f:
         json.dump(messages, f, ensure_ascii=False, indent=2)
     print(f"[INFO] 写入 JSON: {out_path}")
 
 
+_CSV_WRITE_BUFFER = 1 << 20
+_CSV_CHUNK_ROWS = 4096
+# 需要加引号的字符（与 csv 模块默认 excel 方言的 QUOTE_MINIMAL 判定一致）
+_CSV_NEEDS_QUOTE = re.compile(r'[",\r\n]')
+
+
+def _csv_field(value: Any) -> str:
+    """按 excel 方言的最小引用规则编码单个 CSV 字段（None 写为空串，内部引号加倍）。"""
+    if value is None:
+        return ""
+    s = value if isinstance(value, str) else str(value)
+    if _CSV_NEEDS_QUOTE.search(s):
+        return '"' + s.replace('"', '""') + '"'
+    return s
+
+
+def _csv_line(values: List[Any]) -> str:
+    """编码一行 CSV（以 \\r\\n 结尾），输出与 csv.writer 默认方言逐字节一致。"""
+    line = ",".join([_csv_field(v) for v in values])
+    # csv.writer 对仅含单个空字段的行写出 ""，避免产生无法与空行区分的记录
+    if not line and len(values) == 1:
+        line = '""'
+    return line + "\r\n"
+
+
 def save_csv(messages: List[Dict], out_path: str) -> None:
     """保存为 CSV 文件（UTF-8）。
 
@@ -338,14 +732,32 @@ def save_csv(messages: List[Dict], out_path: str) -> None:
     extra = sorted([k for k in keys if k not in ordered])
     fieldnames = ordered + extra
 
-    with open(out_path, "w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for m in messages:
-            writer.writerow({k: m.get(k, "") for k in fieldnames})
+    # 1 MiB 写缓冲；每 _CSV_CHUNK_ROWS 行拼接为一个字符串后单次写入
+    with open(out_path, "w", encoding="utf-8", newline="", buffering=_CSV_WRITE_BUFFER) as f:
+        f.write(_csv_line(fieldnames))
+        for start in range(0, len(messages), _CSV_CHUNK_ROWS):
+            chunk = messages[start:start + _CSV_CHUNK_ROWS]
+            f.write("".join(_csv_line([m.get(k, "") for k in fieldnames]) for m in chunk))
     print(f"[INFO] 写入 CSV: {out_path}")
 
 
+def save_markdown(messages: List[Dict], out_path: str) -> None:
+    """保存为简易 Markdown 列表（可后续替换为 StorageManager 的更丰富格式）。
+
+    整个文档先拼接为一个字符串再单次写入，避免逐条消息调用 write。
+
+    参数:
+        messages: 消息列表。
+        out_path: 输出文件路径。
+    """
+    payload = "# 合并导出（部分片段）\n\n" + "".join(
+        [f"- [{m.get('timestamp', '')}] {m.get('sender', '')}: {m.get('content', '')}\n" for m in messages]
+    )
+    with open(out_path, "w", encoding="utf-8", buffering=_CSV_WRITE_BUFFER) as f:
+        f.write(payload)
+    print(f"[INFO] 写入 Markdown: {out_path}")
+
+
 def parse_args() -> argparse.Namespace:
     """解析命令行参数。
 
@@ -360,6 +772,8 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--exclude-fields", default="", help="在导出中移除的字段（逗号分隔），如 raw_ocr_text,confidence_score")
     p.add_argument("--exclude-time-only", action="store_true", help="过滤纯时间/日期分隔消息")
     p.add_argument("--aggressive-dedup", action="store_true", help="启用激进内容级去重（sender+content）")
+    p.add_argument("--engine", choices=("python", "pandas", "auto"), default="python", help="去重与排序实现：python（流式，默认）/pandas（向量化）/auto（大数据量时使用 pandas）")
+    p.add_argument("--workers", type=int, default=None, help="并行流式预取输入文件的线程数（默认 min(8, 文件数)；1 为在当前线程顺序读取）")
     return p.parse_args()
 
 
@@ -383,7 +797,13 @@ def main() -> None:
     for fp in files:
         print(f"  - {fp}")
 
-    msgs = merge_messages(files, exclude_time_only=args.exclude_time_only, aggressive_dedup=args.aggressive_dedup)
+    msgs = merge_messages(
+        files,
+        exclude_time_only=args.exclude_time_only,
+        aggressive_dedup=args.aggressive_dedup,
+        max_workers=args.workers,
+        engine=args.engine,
+    )
     # 字段排除
     exclude = [s.strip() for s in (args.exclude_fields or "").split(",") if s.strip()]
     msgs = exclude_fields(msgs, exclude)
@@ -397,16 +817,7 @@ def main() -> None:
     if "csv" in formats:
         save_csv(msgs, base + ".csv")
     if "md" in formats:
-        # 简易 Markdown 导出（可后续替换为 StorageManager 的更丰富格式）
-        md_path = base + ".md"
-        with open(md_path, "w", encoding="utf-8") as f:
-            f.write("# 合并导出（部分片段）\n\n")
-            for m in msgs:
-                ts = m.get("timestamp", "")
-                sender = m.get("sender", "")
-                content = m.get("content", "")
-                f.write(f"- [{ts}] {sender}: {content}\n")
-        print(f"[INFO] 写入 Markdown: {md_path}")
+        save_markdown(msgs, base + ".md")
 
     print("[DONE] 合并导出完成。")
 
@@ -1,7 +1,10 @@
 import argparse
+import functools
+import importlib
 import logging
 import sys
 import os
+from typing import Optional, Tuple
 
 # 确保项目根目录在 Python 路径中，避免作为脚本运行时的模块导入失败
 def _bootstrap_sys_path():
@@ -23,10 +26,26 @@ def _bootstrap_sys_path():
 
 _bootstrap_sys_path()
 
-from controllers.main_controller import MainController
-from services.config_manager import ConfigManager
-from services.logging_manager import LoggingManager
-from ui.progress import ProgressReporter
+logger = logging.getLogger(__name__)
+
+# 重依赖（OCR/截图/numpy 等）延迟到首次访问时才导入，`--help` 与参数校验失败路径只需 argparse；
+# 借助模块级 __getattr__（PEP 562），`cli.run_extraction.MainController` 等属性仍可访问与替换
+_LAZY_ATTRS = {
+    "MainController": "controllers.main_controller",
+    "ConfigManager": "services.config_manager",
+    "LoggingManager": "services.logging_manager",
+    "ProgressReporter": "ui.progress",
+}
+
+
+def __getattr__(name):
+    """按需导入 `_LAZY_ATTRS` 中的重依赖类，并缓存到模块全局以免重复解析。"""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
 
 
 def _apply_cli_filters(messages, args):
@@ -35,10 +54,29 @@ def _apply_cli_filters(messages, args):
     Note: This helper must be defined BEFORE calling main() to avoid NameError
     when the module is executed directly.
     """
-    if not messages:
+    if not messages or not _has_active_filters(args):
+        return messages
+    return list(_iter_cli_filters(messages, args))
+
+
+def _has_active_filters(args) -> bool:
+    """判断是否设置了任一过滤条件；均未设置时调用方直接返回原消息，省去一次完整遍历。"""
+    return bool(args.sender or args.start or args.end or args.types or args.contains) or (
+        args.min_confidence is not None
+    )
+
+
+def _iter_cli_filters(messages, args):
+    """Lazy variant of _apply_cli_filters: returns an iterator over matching messages.
+
+    Accepts any iterable (e.g. MainController.iter_scan_chat_history) and never
+    materializes the unfiltered stream. Returns ``messages`` itself when no
+    filter is active.
+    """
+    if not _has_active_filters(args):
         return messages
     from datetime import datetime
-    from services.message_filters import filter_messages
+    from services.message_filters import iter_filter_messages
     from models.data_models import MessageType
 
     start = None
@@ -47,25 +85,25 @@ def _apply_cli_filters(messages, args):
         try:
             start = datetime.fromisoformat(args.start)
         except Exception:
-            logging.getLogger(__name__).warning(f"Invalid --start datetime: {args.start}")
+            logger.warning("Invalid --start datetime: %s", args.start)
     if args.end:
         try:
             end = datetime.fromisoformat(args.end)
         except Exception:
-            logging.getLogger(__name__).warning(f"Invalid --end datetime: {args.end}")
+            logger.warning("Invalid --end datetime: %s", args.end)
 
     types = None
     if args.types:
-        try:
-            types_list = [t.strip().upper() for t in args.types.split(",") if t.strip()]
-            types = []
-            for t in types_list:
-                types.append(MessageType[t])
-        except Exception:
-            logging.getLogger(__name__).warning(f"Invalid --types value: {args.types}")
-            types = None
+        types_list = [t.strip().upper() for t in args.types.split(",") if t.strip()]
+        # 以枚举的名称映射做字典查找，未知名称不经 KeyError 异常路径；
+        # 逐条消息做成员判断，使用 frozenset 保证 O(1) 查找
+        by_name = MessageType.__members__
+        if all(t in by_name for t in types_list):
+            types = frozenset(by_name[t] for t in types_list)
+        else:
+            logger.warning("Invalid --types value: %s", args.types)
 
-    return filter_messages(
+    return iter_filter_messages(
         messages,
         sender=args.sender,
         start=start,
@@ -76,19 +114,42 @@ def _apply_cli_filters(messages, args):
     )
 
 
-def main():
-    """
-    基础提取 CLI 入口。
+def _build_output_override(args, app_cfg):
+    """根据 CLI 参数与应用配置构建本次运行的 OutputConfig 覆盖。
 
     函数级注释：
-    - 支持基础提取与可选重试、滚动扫描；
-    - 输出控制支持单一格式 (--format) 或多格式 (--formats)；
-    - 新增存储层控制选项：
-        * --exclude-fields 用于在 JSON/CSV 导出中移除指定字段（如 confidence_score, raw_ocr_text）
-        * --exclude-time-only 过滤纯时间/日期分隔消息（例如 “10月21日23:47”、“星期四” 等）
-        * --aggressive-dedup 启用激进去重（基于 sender+content 的内容级去重）
-    - 过滤器支持按发件人、时间范围、类型、内容包含、最小置信度等。
-"""
+    - --format/--outdir 未提供时沿用配置文件中的格式与目录；
+    - --formats 与 --exclude-fields 均为逗号分隔列表，解析时去除空白与空项；
+    - --exclude-time-only / --aggressive-dedup 与配置项取“或”，--no-dedup 强制关闭去重。
+    """
+    from models.config import OutputConfig
+
+    # 解析多格式与字段排除
+    multi_formats = None
+    if args.formats:
+        multi_formats = [f.strip().lower() for f in args.formats.split(',') if f.strip()]
+    exclude_fields = [f.strip() for f in (args.exclude_fields.split(',') if args.exclude_fields else []) if f.strip()]
+
+    return OutputConfig(
+        format=(args.format or app_cfg.output.format),
+        directory=(args.outdir or app_cfg.output.directory),
+        enable_deduplication=(False if args.no_dedup else app_cfg.output.enable_deduplication),
+        formats=multi_formats,
+        exclude_fields=exclude_fields,
+        exclude_time_only=bool(args.exclude_time_only or app_cfg.output.exclude_time_only),
+        aggressive_dedup=bool(args.aggressive_dedup or app_cfg.output.aggressive_dedup),
+    )
+
+
+def _parse_chat_area(text: str) -> Optional[Tuple[int, int, int, int]]:
+    """解析 --chat-area（x,y,w,h），不合法时返回 None；规则与其它 CLI 共用 models.config.parse_chat_area"""
+    from models.config import parse_chat_area
+    return parse_chat_area(text)
+
+
+@functools.lru_cache(maxsize=1)
+def build_parser() -> argparse.ArgumentParser:
+    """构建基础提取 CLI 的参数解析器（进程内只构建一次，重复调用 main() 时复用）。"""
     parser = argparse.ArgumentParser(description="WeChatMsgGraber")
     parser.add_argument("--prefix", default="extraction", help="filename prefix for output")
     parser.add_argument("--retry", action="store_true", help="use retry mechanism")
@@ -120,81 +181,91 @@ def main():
     parser.add_argument("--types", help="comma-separated message types to include, e.g. TEXT,IMAGE")
     parser.add_argument("--contains", help="filter by substring in content (case-insensitive)")
     parser.add_argument("--min-confidence", type=float, help="minimum confidence score threshold (0.0-1.0)")
-    args = parser.parse_args()
+    return parser
+
 
-    cfg_mgr = ConfigManager()
+def main():
+    """
+    基础提取 CLI 入口。
+
+    函数级注释：
+    - 支持基础提取与可选重试、滚动扫描；
+    - 输出控制支持单一格式 (--format) 或多格式 (--formats)；
+    - 新增存储层控制选项：
+        * --exclude-fields 用于在 JSON/CSV 导出中移除指定字段（如 confidence_score, raw_ocr_text）
+        * --exclude-time-only 过滤纯时间/日期分隔消息（例如 “10月21日23:47”、“星期四” 等）
+        * --aggressive-dedup 启用激进去重（基于 sender+content 的内容级去重）
+    - 过滤器支持按发件人、时间范围、类型、内容包含、最小置信度等。
+"""
+    args = build_parser().parse_args(sys.argv[1:])
+
+    # 参数解析成功后才加载重依赖（经模块属性访问，触发 __getattr__ 的延迟导入）
+    this = sys.modules[__name__]
+    cfg_mgr = this.ConfigManager()
     app_cfg = cfg_mgr.get_config()
 
     # Setup logging
-    LoggingManager().setup(app_cfg)
+    this.LoggingManager().setup(app_cfg)
 
-    reporter = None if args.no_progress else ProgressReporter(logging.getLogger("progress"))
+    reporter = None if args.no_progress else this.ProgressReporter(logging.getLogger("progress"))
 
     # Optionally clear persistent dedup index
     if args.clear_dedup_index:
         from services.storage_manager import StorageManager
         StorageManager(app_cfg.output).clear_dedup_index()
 
-    controller = MainController()
+    controller = this.MainController()
     # Apply OCR language from CLI or config
     try:
         if args.ocr_lang:
             controller.ocr.config.language = args.ocr_lang.strip()
-            logging.getLogger(__name__).info("Using OCR language from CLI: %s", controller.ocr.config.language)
+            logger.info("Using OCR language from CLI: %s", controller.ocr.config.language)
         else:
             controller.ocr.config.language = app_cfg.ocr.language
-            logging.getLogger(__name__).info("Using OCR language from config: %s", controller.ocr.config.language)
+            logger.info("Using OCR language from config: %s", controller.ocr.config.language)
     except Exception as e:
-        logging.getLogger(__name__).warning("Failed to apply OCR language override: %s", e)
+        logger.warning("Failed to apply OCR language override: %s", e)
     # Apply optional window/chat-area overrides for limited environments
     if args.window_title:
         try:
             controller.scroll.set_title_override(args.window_title)
         except Exception:
-            logging.getLogger(__name__).warning("Failed to apply --window-title override: %s", args.window_title)
+            logger.warning("Failed to apply --window-title override: %s", args.window_title)
     if args.chat_area:
-        try:
-            parts = [p.strip() for p in args.chat_area.split(',')]
-            if len(parts) != 4:
-                raise ValueError("chat-area must be 'x,y,w,h'")
-            x, y, w, h = (int(parts[0]), int(parts[1]), int(parts[2]), int(parts[3]))
-            controller.scroll.set_override_chat_area((x, y, w, h))
-        except Exception as e:
-            logging.getLogger(__name__).warning("Invalid --chat-area value '%s': %s", args.chat_area, e)
+        chat_area = _parse_chat_area(args.chat_area)
+        if chat_area is None:
+            logger.warning("Invalid --chat-area value '%s': chat-area must be 'x,y,w,h'", args.chat_area)
+        else:
+            try:
+                controller.scroll.set_override_chat_area(chat_area)
+            except Exception as e:
+                logger.warning("Failed to apply --chat-area override '%s': %s", args.chat_area, e)
+    # 输出配置覆盖在分支分派前构建一次（dry-run 不落盘，无需构建）
+    output_override = None if args.dry_run else _build_output_override(args, app_cfg)
     if args.scan:
-        # Use adaptive multi-batch scanning
-        messages = controller.scan_chat_history(max_batches=args.batches, direction=args.direction, reporter=reporter)
-        # Apply filters if any
-        messages = _apply_cli_filters(messages, args)
+        # Use adaptive multi-batch scanning; filters are applied while batches stream in,
+        # so unfiltered messages are never accumulated
+        stream = _iter_cli_filters(
+            controller.iter_scan_chat_history(max_batches=args.batches, direction=args.direction, reporter=reporter),
+            args,
+        )
         if args.dry_run:
-            logging.getLogger(__name__).info(f"Dry-run: scanned {len(messages)} messages, no file saved.")
+            # Dry-run only needs the count: consume the stream without keeping any message
+            messages = None
+            scanned = sum(1 for _ in stream)
+            logger.info("Dry-run: scanned %d messages, no file saved.", scanned)
         else:
+            messages = list(stream)
             if args.skip_empty and not messages:
-                logging.getLogger(__name__).info("Skip-empty is enabled and there are zero messages. Nothing will be saved.")
+                logger.info("Skip-empty is enabled and there are zero messages. Nothing will be saved.")
             else:
                 # Save scanned messages directly
-                from models.config import OutputConfig
-                # 解析多格式与字段排除
-                multi_formats = None
-                if args.formats:
-                    multi_formats = [f.strip().lower() for f in args.formats.split(',') if f.strip()]
-                exclude_fields = [f.strip() for f in (args.exclude_fields.split(',') if args.exclude_fields else []) if f.strip()]
-
-                override = OutputConfig(
-                    format=(args.format or app_cfg.output.format),
-                    directory=(args.outdir or app_cfg.output.directory),
-                    enable_deduplication=(False if args.no_dedup else app_cfg.output.enable_deduplication),
-                    formats=multi_formats,
-                    exclude_fields=exclude_fields,
-                    exclude_time_only=bool(args.exclude_time_only or app_cfg.output.exclude_time_only),
-                    aggressive_dedup=bool(args.aggressive_dedup or app_cfg.output.aggressive_dedup),
-                )
                 messages = controller.run_and_save(
                     filename_prefix=args.prefix,
                     use_retry=False,
                     reporter=None,
                     messages=messages,
-                    output_override=override,
+                    output_override=output_override,
                 )
     else:
         # Perform extraction first to allow filtering
@@ -217,35 +288,21 @@ def main():
         messages = _apply_cli_filters(messages, args)
 
         if args.dry_run:
-            logging.getLogger(__name__).info(f"Dry-run: extracted {len(messages)} messages, no file saved.")
+            logger.info("Dry-run: extracted %d messages, no file saved.", len(messages))
         else:
             if args.skip_empty and not messages:
-                logging.getLogger(__name__).info("Skip-empty is enabled and there are zero messages. Nothing will be saved.")
+                logger.info("Skip-empty is enabled and there are zero messages. Nothing will be saved.")
             else:
                 # Save filtered messages
-                from models.config import OutputConfig
-                multi_formats = None
-                if args.formats:
-                    multi_formats = [f.strip().lower() for f in args.formats.split(',') if f.strip()]
-                exclude_fields = [f.strip() for f in (args.exclude_fields.split(',') if args.exclude_fields else []) if f.strip()]
-                override = OutputConfig(
-                    format=(args.format or app_cfg.output.format),
-                    directory=(args.outdir or app_cfg.output.directory),
-                    enable_deduplication=(False if args.no_dedup else app_cfg.output.enable_deduplication),
-                    formats=multi_formats,
-                    exclude_fields=exclude_fields,
-                    exclude_time_only=bool(args.exclude_time_only or app_cfg.output.exclude_time_only),
-                    aggressive_dedup=bool(args.aggressive_dedup or app_cfg.output.aggressive_dedup),
-                )
                 messages = controller.run_and_save(
                     filename_prefix=args.prefix,
                     use_retry=False,
                     reporter=None,
                     messages=messages,
-                    output_override=override,
+                    output_override=output_override,
                 )
 
-    logging.getLogger(__name__).info(f"Extraction finished, messages: {len(messages)}")
+    logger.info("Extraction finished, messages: %d", scanned if messages is None else len(messages))
 
 
 if __name__ == "__main__":
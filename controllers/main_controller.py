@@ -1,15 +1,20 @@
 """
 Main controller orchestrating window automation, OCR, and message parsing.
 """
+import errno
 import logging
+import os
+import re
 import time
-from typing import List, Optional
-
-from models.data_models import Message, MessageType
-from datetime import datetime
 import uuid
-import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+
 from PIL import Image
+
+from models.data_models import Message, MessageType
 from services.auto_scroll_controller import AutoScrollController
 from services.advanced_scroll_controller import AdvancedScrollController
 from services.image_preprocessor import ImagePreprocessor
@@ -23,6 +28,75 @@ from models.config import AppConfig, OutputConfig
 from ui.progress import ProgressReporter
 
 
+def _frame_fingerprint(image: Image.Image, grid: int = 64) -> tuple:
+    """计算整帧截图的指纹（尺寸 + grid×grid 灰度缩略图字节），用于扫描循环中识别重复帧。
+
+    函数级注释：
+    - 以 BOX 滤波缩放，每个格子为原图对应区域的平均灰度，缩放后仅数千像素，开销远低于一次 OCR；
+    - 仅做精确匹配：聊天区滚动一条短消息时变化很小，按容差匹配可能漏识别新消息；
+      不用差值哈希，因其无法区分亮度不同的纯色帧。
+    """
+    small = image.convert("L").resize((grid, grid), Image.Resampling.BOX)
+    return (image.size, small.tobytes())
+
+
+# 系统消息是否为时间分隔（_fill_message_times 使用）：五种模式合并为单一预编译交替式
+_TIME_SEPARATOR_RE = re.compile(r"\d{1,2}:\d{2}|昨天|今天|星期|年.+月.+日")
+
+
+def _sleep_until(deadline: float) -> None:
+    """休眠至 time.monotonic() 截止时刻；截止前的其他工作耗时计入等待，已过期则立即返回。"""
+    remaining = deadline - time.monotonic()
+    if remaining > 0:
+        time.sleep(remaining)
+
+
+# 消息类型解析表：同时接受枚举成员与其取值字符串，替代逐条 MessageType(...) + try/except
+_MESSAGE_TYPE_LOOKUP = {**{t.value: t for t in MessageType}, **{t: t for t in MessageType}}
+
+
+def _messages_from_raw(raw_messages: list) -> List[Message]:
+    """将一批滚动结果（dict 或 Message 混合）统一转换为 Message 列表。
+
+    函数级注释：
+    - 消息类型通过 _MESSAGE_TYPE_LOOKUP 查表解析，未知值回退为 TEXT；
+    - 缺失或无法解析的时间戳共用本批次的同一个 datetime.now()，不再逐条取当前时间；
+    - 仅对缺少 id 的字典生成 uuid；已是 Message 的元素原样保留。
+    """
+    lookup_type = _MESSAGE_TYPE_LOOKUP.get
+    batch_now: Optional[datetime] = None
+    converted: List[Message] = []
+    append = converted.append
+    for msg in raw_messages:
+        if not isinstance(msg, dict):
+            append(msg)
+            continue
+        ts = msg.get('timestamp')
+        if not isinstance(ts, datetime):
+            parsed = None
+            if isinstance(ts, str):
+                try:
+                    parsed = datetime.fromisoformat(ts)
+                except ValueError:
+                    pass
+            if parsed is None:
+                if batch_now is None:
+                    batch_now = datetime.now()
+                parsed = batch_now
+            ts = parsed
+        content = msg.get('content', '')
+        append(Message(
+            id=msg.get('id') or str(uuid.uuid4()),
+            sender=msg.get('sender', '未知'),
+            content=content,
+            message_type=lookup_type(msg.get('message_type', MessageType.TEXT), MessageType.TEXT),
+            timestamp=ts,
+            confidence_score=float(msg.get('confidence_score', 0.0)),
+            raw_ocr_text=msg.get('raw_ocr_text', content),
+        ))
+    return converted
+
+
 class MainController:
     """Coordinates the overall extraction workflow."""
 
@@ -37,9 +111,13 @@ class MainController:
         self.last_scroll_stats: dict | None = None
         self._images_output_dir: str | None = None
 
-    def run_once(self) -> List[Message]:
+    def run_once(self, region: Optional[tuple] = None) -> List[Message]:
         """Run a single extraction cycle on current chat view.
 
+        Args:
+            region: 可选的 OCR 感兴趣区域 (x, y, w, h)，坐标相对于聊天区域截图；
+                提供时仅对该区域裁剪后的图像执行 OCR 与解析（例如尾部监控只识别底部新增条带）。
+
         Returns:
             List of parsed Message objects.
         """
@@ -66,8 +144,13 @@ class MainController:
             self.logger.warning("截图失败，跳过本次提取。")
             return messages
 
+        if region:
+            x, y, w, h = region
+            img = img.crop((x, y, x + w, y + h))
+
         optimized = self.scroll.optimize_screenshot_quality(img)
-        preprocessed = self.pre.preprocess_for_ocr(optimized)
+        # 引擎偏好原始输入时跳过整图预处理（区域检测与裁剪区域仍会在 OCRProcessor 内部预处理）
+        preprocessed = optimized if self.ocr.prefers_raw_input() else self.pre.preprocess_for_ocr(optimized, use_cache=True)
 
         # Ensure OCR engine is ready
         if not self.ocr.is_engine_ready():
@@ -75,30 +158,9 @@ class MainController:
                 self.logger.warning("OCR引擎初始化失败。")
                 return messages
 
-        # Region-based OCR for better mapping to messages
-        region_results = self.ocr.detect_and_process_regions(preprocessed)
-        text_regions = [tr for tr, _ in region_results]
-        self.logger.info(f"区域识别文本区域数量：{len(text_regions)}")
-
-        # Fallback: if region-based detection produced no regions, try full-image OCR on preprocessed image
-        if not text_regions:
-            self.logger.info("区域识别未检测到文本，尝试对整张截图进行OCR以回退。")
-            try:
-                full_image_regions = self.ocr.extract_text_regions(preprocessed)
-                self.logger.info(f"整图OCR（预处理后）文本区域数量：{len(full_image_regions)}")
-                text_regions = full_image_regions
-            except Exception as e:
-                self.logger.warning(f"整图OCR回退失败：{e}")
-
-        # Second fallback: try OCR on optimized (raw) screenshot if still empty
-        if not text_regions:
-            self.logger.info("整图OCR（预处理后）仍为空，尝试对优化后的原始截图进行OCR回退。")
-            try:
-                raw_regions = self.ocr.extract_text_regions(optimized, preprocess=False)
-                self.logger.info(f"整图OCR（原始优化）文本区域数量：{len(raw_regions)}")
-                text_regions = raw_regions
-            except Exception as e:
-                self.logger.warning(f"整图OCR（原始优化）回退失败：{e}")
+        # Region-based OCR for better mapping to messages（为空时依次回退到整图 OCR）
+        text_regions = self._acquire_text_regions(preprocessed, optimized)
+        self.logger.info(f"识别文本区域数量：{len(text_regions)}")
 
         # Parse text regions into messages
         messages = self.parser.parse(text_regions)
@@ -109,6 +171,34 @@ class MainController:
 
         return messages
 
+    def run_batch(self, images: List[Image.Image], batch_size: int = 8) -> List[List[Message]]:
+        """对一组已截取的聊天截图执行批量 OCR 与解析，返回与输入一一对应的消息列表。
+
+        函数级注释：
+        - 与 run_once 相同地先做截图质量优化与预处理，再按 batch_size 分批调用 OCRProcessor.recognize_batch，
+          一次推理处理多张截图，适用于先集中截图、后统一识别的场景；
+        - OCR 引擎未就绪且初始化失败时返回全空列表。
+        """
+        if not images:
+            return []
+        if not self.ocr.is_engine_ready():
+            if not self.ocr.initialize_engine():
+                self.logger.warning("OCR引擎初始化失败。")
+                return [[] for _ in images]
+
+        preprocessed = [self.pre.preprocess_for_ocr(self.scroll.optimize_screenshot_quality(img), use_cache=True) for img in images]
+        step = max(1, int(batch_size))
+        pages: List[List[Message]] = []
+        for start in range(0, len(preprocessed), step):
+            for text_regions in self.ocr.recognize_batch(preprocessed[start:start + step]):
+                pages.append(self.parser.parse(text_regions))
+
+        # 自动保存图片消息（使用消息ID命名）
+        for img, messages in zip(images, pages):
+            if messages:
+                self._save_image_messages(messages, img)
+        return pages
+
     def run_with_retry(self, max_attempts: int = 3, delay_seconds: float = 0.5) -> List[Message]:
         """Run extraction with retry on failures or empty results.
 
@@ -139,8 +229,7 @@ class MainController:
         reporter.start()
         # Provide a small pre-focus delay so user can bring WeChat to foreground
         try:
-            self.logger.info("开始前等待1.5秒以便前置微信窗口聚焦，请确保微信聊天窗口处于前台。")
-            time.sleep(1.5)
+            self._wait_for_wechat_foreground(timeout=1.5)
         except Exception:
             pass
         messages: List[Message] = []
@@ -164,6 +253,26 @@ class MainController:
         reporter.finish(success=False)
         return messages
 
+    def _wait_for_wechat_foreground(self, timeout: float = 1.5, interval: float = 0.05) -> None:
+        """
+        开始提取前等待微信窗口处于前台，最多等待 timeout 秒。
+
+        函数级注释：
+        - 每 interval 秒轮询一次，微信一旦位于前台立即返回，脚本化运行时无需空等；
+        - 已设置聊天区域覆盖时按坐标截图、不依赖窗口焦点，直接跳过等待；
+        - 超时后照常继续，与原固定等待的行为一致。
+        """
+        if self.scroll.has_chat_area_override():
+            return
+        deadline = time.monotonic() + timeout
+        if self.scroll.is_wechat_foreground():
+            return
+        self.logger.info(f"开始前最多等待{timeout:g}秒以便前置微信窗口聚焦，请确保微信聊天窗口处于前台。")
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            if self.scroll.is_wechat_foreground():
+                return
+
     def scan_chat_history(
         self,
         max_messages: int = 1000,
@@ -171,6 +280,7 @@ class MainController:
         max_batches: Optional[int] = None,
         direction: str = "up",
         reporter: Optional[ProgressReporter] = None,
+        seen_keys: Optional[set] = None,
     ) -> List[Message]:
         """
         扫描聊天历史记录，支持方向控制、批次限制与进度上报，并保持向后兼容。
@@ -181,19 +291,58 @@ class MainController:
         - max_batches: 最大批次数（每个批次一次截图+解析+滚动），可用于测试或受限环境
         - direction: 滚动方向，"up" 表示向上，"down" 表示向下（默认向上）
         - reporter: 进度上报器，可为空；若提供则在每批次更新解析进度
+        - seen_keys: 可选的已知 stable_key 集合（原地更新）；多次调用传入同一集合即可跨调用去重
 
         返回值：
         - 已解析的消息列表（可能为空）
         """
+        return list(
+            self.iter_scan_chat_history(
+                max_messages=max_messages,
+                enable_deduplication=enable_deduplication,
+                max_batches=max_batches,
+                direction=direction,
+                reporter=reporter,
+                seen_keys=seen_keys,
+            )
+        )
+
+    def iter_scan_chat_history(
+        self,
+        max_messages: int = 1000,
+        enable_deduplication: bool = True,
+        max_batches: Optional[int] = None,
+        direction: str = "up",
+        reporter: Optional[ProgressReporter] = None,
+        seen_keys: Optional[set] = None,
+    ) -> Iterator[Message]:
+        """
+        scan_chat_history 的生成器版本：每批解析、去重后立即逐条产出新消息（参数含义相同）。
+
+        函数级注释：
+        - 调用方可边扫描边过滤/计数/写出，无需等待全部批次结束；
+        - 控制器内部只保留去重键集合与计数，不再累积完整消息列表；
+        - 每帧的识别在单线程后台池中执行，与滚动、等待及边缘检测截图重叠，隐藏 OCR 延迟；
+        - 生成器正常结束、提前关闭或异常退出时均会停止滚动。
+        """
         self.logger.info(
             f"开始扫描聊天历史记录（方向={direction}，max_messages={max_messages}，max_batches={max_batches}，dedup={enable_deduplication}）"
         )
 
-        messages: List[Message] = []
-        seen_keys = set()
+        total = 0
+        # 精确集合而非布隆过滤器：集合查找在 C 层完成，纯 Python 的布隆过滤器每次查询需多次哈希，
+        # 且误判会静默丢弃真实消息；键规模受 max_messages 约束，内存可控。
+        # 调用方传入的集合原地更新（如 scan_multiple_chats 的全局去重），每条消息只计算一次键
+        if seen_keys is None:
+            seen_keys = set()
         consecutive_misses = 0
         max_consecutive_misses = 3
         batches_done = 0
+        # 最近已识别帧的 (指纹, 解析结果, 去重键)：滚动到边缘或界面未变化时重复帧直接复用结果，
+        # 键随结果一并缓存，复用帧不再重复拼接 stable_key
+        recent_frames: deque = deque(maxlen=8)
+        # 上一轮边缘检测在滚动后截取的画面：两轮之间没有再滚动，可直接作为本轮截图
+        next_screenshot = None
 
         # 方向初始化：默认向上滚动，先到顶部；向下滚动则直接从当前位置开始
         try:
@@ -209,163 +358,216 @@ class MainController:
         start_ts = time.time()
         last_heartbeat_ts = start_ts
 
-        while len(messages) < max_messages:
-            # 若指定了批次限制，达到后退出
-            if max_batches is not None and batches_done >= max_batches:
-                self.logger.info(f"达到最大批次限制：{max_batches}，停止扫描。")
-                break
-
-            # 捕获聊天区域截图（若失败尝试一次窗口重定位/激活再重试）
-            screenshot = self.scroll.capture_current_view()
-            if screenshot:
-                # DEBUG: Save every screenshot to verify capture content
-                debug_dir = os.path.join(os.getcwd(), "output", "debug_screenshots")
-                os.makedirs(debug_dir, exist_ok=True)
-                debug_path = os.path.join(debug_dir, f"scan_batch_{batches_done}_{int(time.time())}.png")
-                screenshot.save(debug_path)
-                self.logger.info(f"DEBUG: Saved batch screenshot to {debug_path}")
-
-            if not screenshot:
-                self.logger.warning("首次截图失败，尝试重定位/激活窗口后重试……")
-                try:
-                    window = self.scroll.locate_wechat_window()
-                    if window:
-                        self.scroll.activate_window()
-                        time.sleep(0.3)
-                        screenshot = self.scroll.capture_current_view()
-                except Exception as e:
-                    self.logger.error(f"重试截图时异常：{e}")
-            if not screenshot:
-                self.logger.warning("无法捕获聊天区域截图，结束扫描。")
-                break
-
-            optimized = self.scroll.optimize_screenshot_quality(screenshot)
-            preprocessed = self.pre.preprocess_for_ocr(optimized)
-
-            # 确保OCR引擎就绪
-            if not self.ocr.is_engine_ready():
-                if not self.ocr.initialize_engine():
-                    self.logger.warning("OCR引擎初始化失败，结束扫描。")
+        # 单线程识别池：OCR 引擎只在该线程内串行使用，主线程负责滚动与截图
+        ocr_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-ocr")
+        try:
+            while total < max_messages:
+                # 若指定了批次限制，达到后退出
+                if max_batches is not None and batches_done >= max_batches:
+                    self.logger.info(f"达到最大批次限制：{max_batches}，停止扫描。")
                     break
 
-            # 区域识别与解析
-            try:
-                region_results = self.ocr.detect_and_process_regions(preprocessed)
-                text_regions = [tr for tr, _ in region_results]
-            except Exception as e:
-                self.logger.error(f"区域识别失败：{e}")
-                text_regions = []
+                # 捕获聊天区域截图（优先复用上一轮滚动后的截图；若失败尝试一次窗口重定位/激活再重试）
+                screenshot = next_screenshot or self.scroll.capture_current_view()
+                next_screenshot = None
+
+                if not screenshot:
+                    self.logger.warning("首次截图失败，确认窗口就绪后重试……")
+                    try:
+                        # 仅当窗口已失效时才重定位；ensure_window_ready 在聊天区域覆盖下直接返回，
+                        # 激活等待已由 activate_window 内部完成，重试前无需额外休眠
+                        if not self.scroll.has_chat_area_override() and not self.scroll.is_window_valid():
+                            self.scroll.locate_wechat_window()
+                        if self.scroll.ensure_window_ready(retries=1, delay=0.0):
+                            screenshot = self.scroll.capture_current_view()
+                    except Exception as e:
+                        self.logger.error(f"重试截图时异常：{e}")
+                if not screenshot:
+                    self.logger.warning("无法捕获聊天区域截图，结束扫描。")
+                    break
 
-            # Fallback: 整图 OCR（预处理后）
-            if not text_regions:
-                try:
-                    text_regions = self.ocr.extract_text_regions(preprocessed)
-                except Exception as e:
-                    self.logger.warning(f"整图OCR回退失败：{e}")
+                # 确保OCR引擎就绪
+                if not self.ocr.is_engine_ready():
+                    if not self.ocr.initialize_engine():
+                        self.logger.warning("OCR引擎初始化失败，结束扫描。")
+                        break
+
+                # 本帧的优化、预处理、识别与解析交给后台线程，与下方的滚动、等待及边缘检测截图重叠执行；
+                # 命中率仍只影响下一次滚动，与串行实现一致
+                # 与最近某帧指纹完全一致时复用其解析结果，跳过优化、预处理、识别与解析
+                fingerprint = _frame_fingerprint(screenshot)
+                reused = next(((msgs, keys) for fp, msgs, keys in recent_frames if fp == fingerprint), None)
+                if reused is None:
+                    ocr_future = ocr_pool.submit(self._recognize_scan_frame, screenshot)
+                else:
+                    ocr_future = None
+                    self.logger.debug("当前帧与最近已识别帧一致，跳过 OCR 并复用解析结果。")
+
+                # 截图相似度用于边缘检测
+                prev_screenshot = screenshot
+
+                # 方向滚动（优先按窗口高度）
+                success = self.scroll.scroll_by_window_height(direction.lower())
+                if not success:
+                    self.logger.warning("按窗口高度滚动失败，回退到默认滚动方式。")
+                    self.scroll.start_scrolling(direction.lower())
+
+                # 适当休眠（带抖动，提升稳定性）：按截止时刻等待，等待界面稳定期间先保存本帧调试截图，
+                # 其耗时计入等待时间
+                jitter = 0.03
+                settle_deadline = time.monotonic() + max(0.0, self.scroll.scroll_delay + jitter)
+                self._save_scan_debug_screenshot(screenshot, batches_done)
+                _sleep_until(settle_deadline)
+
+                reached_edge = False
+                current_screenshot = self.scroll.capture_current_view()
+                next_screenshot = current_screenshot
+                if prev_screenshot and current_screenshot:
+                    # 边缘检测只需判断画面是否基本不变：缩小到最大边 256 再算 SSIM，与高级滚动控制器一致
+                    similar = self.scroll._compare_screenshots(
+                        prev_screenshot, current_screenshot, threshold=0.95, max_side=256
+                    )
+                    if similar:
+                        # 非常相似：可能到达边缘
+                        self.logger.info("检测到内容高度相似，可能已到达边缘，尝试再滚动一次确认。")
+                        confirm = self.scroll.scroll_by_window_height(direction.lower())
+                        time.sleep(max(0.0, self.scroll.scroll_delay))
+                        confirm_screenshot = self.scroll.capture_current_view()
+                        if confirm_screenshot:
+                            next_screenshot = confirm_screenshot
+                        if confirm and confirm_screenshot:
+                            reached_edge = self.scroll._compare_screenshots(
+                                current_screenshot, confirm_screenshot, threshold=0.97, max_side=256
+                            )
+
+                # 取回本帧识别结果（到达边缘时也先产出本帧消息再停止）
+                if ocr_future is None:
+                    new_messages, new_keys = reused
+                else:
+                    new_messages = ocr_future.result()
+                    new_keys = [m.stable_key() for m in new_messages] if enable_deduplication else None
+                    recent_frames.append((fingerprint, new_messages, new_keys))
+
+                # 批次去重控制
+                batch_messages: List[Message] = []
+                if enable_deduplication:
+                    for m, key in zip(new_messages, new_keys):
+                        if key not in seen_keys:
+                            batch_messages.append(m)
+                            seen_keys.add(key)
+                else:
+                    batch_messages = list(new_messages)
+
+                # 统计与日志
+                batches_done += 1
+                if batch_messages:
+                    total += len(batch_messages)
+                    self.logger.info(
+                        f"第{batches_done}批提取到 {len(batch_messages)} 条新消息，总计: {total}"
+                    )
+                    yield from batch_messages
+                    consecutive_misses = 0
+                else:
+                    consecutive_misses += 1
+                    self.logger.info(f"第{batches_done}批未找到新消息，连续失败次数: {consecutive_misses}")
+                    if consecutive_misses >= max_consecutive_misses:
+                        self.logger.info("连续失败次数过多，停止扫描。")
+                        break
+
+                if reached_edge:
+                    self.logger.info("确认到达聊天记录边缘，停止扫描。")
+                    break
 
-            # Second fallback: 整图 OCR（原始优化，无预处理）
-            if not text_regions:
-                try:
-                    text_regions = self.ocr.extract_text_regions(optimized, preprocess=False)
-                except Exception as e:
-                    self.logger.warning(f"整图OCR（原始优化）回退失败：{e}")
+                # 命中率用于自适应滚动
+                hit_rate = len(batch_messages) / len(new_messages) if new_messages else 0.0
 
-            # 解析文本区域为消息
-            try:
-                new_messages = self.parser.parse(text_regions)
-            except Exception as e:
-                self.logger.error(f"消息解析失败：{e}")
-                new_messages = []
-
-            # 自动保存图片消息（使用消息ID命名，便于后续关联）
-            if screenshot and new_messages:
-                self._save_image_messages(new_messages, screenshot)
-
-            # 批次去重控制
-            batch_messages: List[Message] = []
-            if enable_deduplication:
-                for m in new_messages:
-                    key = m.stable_key()
-                    if key not in seen_keys:
-                        batch_messages.append(m)
-                        seen_keys.add(key)
-            else:
-                batch_messages = list(new_messages)
-
-            # 统计与日志
-            batches_done += 1
-            if batch_messages:
-                messages.extend(batch_messages)
-                self.logger.info(
-                    f"第{batches_done}批提取到 {len(batch_messages)} 条新消息，总计: {len(messages)}"
-                )
-                consecutive_misses = 0
-            else:
-                consecutive_misses += 1
-                self.logger.info(f"第{batches_done}批未找到新消息，连续失败次数: {consecutive_misses}")
-                if consecutive_misses >= max_consecutive_misses:
-                    self.logger.info("连续失败次数过多，停止扫描。")
-                    break
+                # 自适应滚动速度：读入局部变量计算，仅在需要调整时各写回一次
+                speed, delay = self.scroll.scroll_speed, self.scroll.scroll_delay
+                if hit_rate < 0.3:  # 低命中率，滚动更快
+                    speed, delay = min(10, speed + 1), max(0.2, delay - 0.1)
+                    self.scroll.scroll_speed, self.scroll.scroll_delay = speed, delay
+                elif hit_rate > 0.7:  # 高命中率，滚动更慢以提高精度
+                    speed, delay = max(1, speed - 1), min(2.0, delay + 0.1)
+                    self.scroll.scroll_speed, self.scroll.scroll_delay = speed, delay
 
-            # 命中率用于自适应滚动
-            hit_rate = len(batch_messages) / len(new_messages) if new_messages else 0.0
+                # 进度上报与心跳日志（每5秒）
+                if reporter:
+                    reporter.update(
+                        status=f"扫描中：第{batches_done}批，命中率 {hit_rate:.2f}",
+                        messages_parsed_delta=len(batch_messages),
+                    )
+                now_ts = time.time()
+                if now_ts - last_heartbeat_ts >= 5.0:
+                    self.logger.info(
+                        f"心跳：已运行 {(now_ts - start_ts):.1f}s，累计批次 {batches_done}，累计消息 {total}，速度 {speed}，延迟 {delay:.2f}"
+                    )
+                    last_heartbeat_ts = now_ts
 
-            # 截图相似度用于边缘检测
-            prev_screenshot = screenshot
+        finally:
+            ocr_pool.shutdown(wait=True, cancel_futures=True)
+            self.scroll.stop_scrolling()
 
-            # 方向滚动（优先按窗口高度）
-            success = self.scroll.scroll_by_window_height(direction.lower())
-            if not success:
-                self.logger.warning("按窗口高度滚动失败，回退到默认滚动方式。")
-                self.scroll.start_scrolling(direction.lower())
+    def _save_scan_debug_screenshot(self, screenshot: Image.Image, batch_index: int) -> None:
+        """DEBUG：保存扫描循环中的每帧截图，便于核对截图内容。"""
+        debug_dir = os.path.join(os.getcwd(), "output", "debug_screenshots")
+        os.makedirs(debug_dir, exist_ok=True)
+        debug_path = os.path.join(debug_dir, f"scan_batch_{batch_index}_{int(time.time())}.png")
+        screenshot.save(debug_path)
+        self.logger.info(f"DEBUG: Saved batch screenshot to {debug_path}")
 
-            # 适当休眠（带抖动，提升稳定性）
-            jitter = 0.03
-            time.sleep(max(0.0, self.scroll.scroll_delay + jitter))
+    def _recognize_scan_frame(self, screenshot: Image.Image) -> List[Message]:
+        """对扫描循环中的单帧截图执行优化、预处理、区域识别（含两级整图回退）与解析。
 
-            current_screenshot = self.scroll.capture_current_view()
-            if prev_screenshot and current_screenshot:
-                similar = self.scroll._compare_screenshots(
-                    prev_screenshot, current_screenshot, threshold=0.95
-                )
-                if similar:
-                    # 非常相似：可能到达边缘
-                    self.logger.info("检测到内容高度相似，可能已到达边缘，尝试再滚动一次确认。")
-                    confirm = self.scroll.scroll_by_window_height(direction.lower())
-                    time.sleep(max(0.0, self.scroll.scroll_delay))
-                    confirm_screenshot = self.scroll.capture_current_view()
-                    if confirm and confirm_screenshot:
-                        similar2 = self.scroll._compare_screenshots(
-                            current_screenshot, confirm_screenshot, threshold=0.97
-                        )
-                        if similar2:
-                            self.logger.info("确认到达聊天记录边缘，停止扫描。")
-                            break
-
-            # 自适应滚动速度
-            if hit_rate < 0.3:  # 低命中率，滚动更快
-                self.scroll.scroll_speed = min(10, self.scroll.scroll_speed + 1)
-                self.scroll.scroll_delay = max(0.2, self.scroll.scroll_delay - 0.1)
-            elif hit_rate > 0.7:  # 高命中率，滚动更慢以提高精度
-                self.scroll.scroll_speed = max(1, self.scroll.scroll_speed - 1)
-                self.scroll.scroll_delay = min(2.0, self.scroll.scroll_delay + 0.1)
-
-            # 进度上报与心跳日志（每5秒）
-            if reporter:
-                reporter.update(
-                    status=f"扫描中：第{batches_done}批，命中率 {hit_rate:.2f}",
-                    messages_parsed_delta=len(batch_messages),
-                )
-            now_ts = time.time()
-            if now_ts - last_heartbeat_ts >= 5.0:
-                self.logger.info(
-                    f"心跳：已运行 {(now_ts - start_ts):.1f}s，累计批次 {batches_done}，累计消息 {len(messages)}，速度 {self.scroll.scroll_speed}，延迟 {self.scroll.scroll_delay:.2f}"
-                )
-                last_heartbeat_ts = now_ts
+        函数级注释：
+        - 由 iter_scan_chat_history 提交到后台识别线程执行，调用前主线程已确保 OCR 引擎就绪；
+        - 识别或解析失败时记录日志并返回空列表，不中断扫描；
+        - 解析出图片消息时按消息 ID 自动保存截图片段。
+        """
+        optimized = self.scroll.optimize_screenshot_quality(screenshot)
+        preprocessed = optimized if self.ocr.prefers_raw_input() else self.pre.preprocess_for_ocr(optimized, use_cache=True)
+
+        # 区域识别与解析
+        # 注意：此处逐帧识别而非跨批次攒帧批量识别——本帧的命中率与连续未命中计数决定下一次
+        # 滚动的速度、延迟与是否停止，延后识别会使自适应与停止判断滞后；
+        # 先集中截图、后统一识别的场景请使用 run_batch（OCRProcessor.recognize_batch）。
+        text_regions = self._acquire_text_regions(preprocessed, optimized)
+
+        # 解析文本区域为消息
+        try:
+            new_messages = self.parser.parse(text_regions)
+        except Exception as e:
+            self.logger.error(f"消息解析失败：{e}")
+            new_messages = []
+
+        # 自动保存图片消息（使用消息ID命名，便于后续关联）
+        if new_messages:
+            self._save_image_messages(new_messages, screenshot)
+        return new_messages
+
+    def _acquire_text_regions(self, preprocessed: Image.Image, optimized: Image.Image) -> list:
+        """按优先级依次尝试文本区域获取策略，返回第一个非空结果；全部为空或失败时返回空列表。
+
+        函数级注释：
+        - 策略顺序：区域识别 → 整图 OCR（预处理后）→ 整图 OCR（优化后原图，不再预处理）；
+        - 后续策略仅在前一策略为空或抛出异常时执行，异常记录日志后继续回退；
+        - 调用方负责事先确保 OCR 引擎就绪（run_once 与扫描循环均已检查）。
+        """
+        strategies = (
+            ("区域识别", lambda: [tr for tr, _ in self.ocr.detect_and_process_regions(preprocessed)]),
+            ("整图OCR（预处理后）", lambda: self.ocr.extract_text_regions(preprocessed)),
+            ("整图OCR（原始优化）", lambda: self.ocr.extract_text_regions(optimized, preprocess=False)),
+        )
+        for label, strategy in strategies:
+            try:
+                text_regions = strategy()
+            except Exception as e:
+                self.logger.warning(f"{label}失败：{e}")
+                continue
+            if text_regions:
+                return text_regions
+            self.logger.debug(f"{label}未得到文本区域，尝试下一种回退。")
+        return []
 
-        self.scroll.stop_scrolling()
-        return messages
-    
     def scroll_to_top(self) -> None:
         """
         滑动到聊天记录顶部
@@ -379,14 +581,18 @@ class MainController:
         
         # 检查是否真正到达顶部
         max_checks = 10
+        current_screenshot = None
         for i in range(max_checks):
-            prev_screenshot = self.scroll.capture_current_view()
+            # 上一轮滚动后的截图即本轮滚动前的画面，直接复用，每轮只截一次图
+            prev_screenshot = current_screenshot or self.scroll.capture_current_view()
             self.scroll.start_scrolling("up")
             time.sleep(0.5)
             current_screenshot = self.scroll.capture_current_view()
             
             if prev_screenshot and current_screenshot:
-                similarity = self.scroll._compare_screenshots(prev_screenshot, current_screenshot, threshold=0.98)
+                similarity = self.scroll._compare_screenshots(
+                    prev_screenshot, current_screenshot, threshold=0.98, max_side=256
+                )
                 if similarity:  # 截图几乎相同，说明已到达顶部
                     self.logger.info("已到达聊天记录顶部")
                     return
@@ -430,11 +636,8 @@ class MainController:
         # If direction='up': Capture Order = New -> Old.
         # If direction='down': Capture Order = Old -> New.
         
-        ordered_indices = range(len(messages))
-        if direction == "up":
-            ordered_indices = range(len(messages) - 1, -1, -1)
-        
-        current_time = datetime.now()
+        ordered = reversed(messages) if direction == "up" else messages
+
         # Initial guess: Scan start time? Or just use Now.
         # Better: Scan backwards (New->Old) to find the FIRST system timestamp?
         # No, System timestamps appear ABOVE messages (Old side).
@@ -443,38 +646,18 @@ class MainController:
         # We need a reference date. Usually Today.
         scan_date = datetime.now()
         current_context_time = scan_date
+        system_type = MessageType.SYSTEM
+        parse_time = MessageParser.parse_wechat_time
+        is_time_separator = _TIME_SEPARATOR_RE.search
         
-        # Traverse Old -> New
-        for i in ordered_indices:
-            msg = messages[i]
-            if msg.message_type == MessageType.SYSTEM:
-                # Try to parse
-                parsed = MessageParser.parse_wechat_time(msg.content, scan_date)
-                # If parsed time is different from reference (meaning it found a time), update context
-                # Note: parse_wechat_time returns reference_date if failure.
-                # But we might have "Yesterday 10:00".
-                # To detect if it WAS parsed, we can check if it's different OR check content pattern again?
-                # The parser logic already handles this.
-                # But wait, if we pass scan_date, and it returns scan_date, we don't know if it parsed "Today Now" or failed.
-                # But "System" messages usually contain time.
-                # Let's assume if it's System, we update context.
-                # But sometimes System msg is "You recalled a message".
-                # We should only update if it looks like time.
-                
-                # Check if it looks like time (using the parser's internal helper would be nice, but it's private)
-                # We'll just trust parse_wechat_time to return a reasonable time.
-                # To be safe, let's only update if the content looks like time.
-                # Re-implement simple check? Or make `_is_timestamp_line` public?
-                # I'll rely on the fact that if it parses, it's good.
-                # But we need to distinguish "Failed to parse" (returned ref date) from "Parsed Today".
-                # We can check if content matches time patterns.
-                
-                is_time = False
-                import re
-                pats = [r"\d{1,2}:\d{2}", r"昨天", r"今天", r"星期", r"年.+月.+日"]
-                if any(re.search(p, msg.content) for p in pats):
-                    parsed = MessageParser.parse_wechat_time(msg.content, scan_date)
-                    current_context_time = parsed
+        # Traverse Old -> New（直接迭代列表或其反向视图，不再逐条按下标取值）
+        for msg in ordered:
+            if msg.message_type == system_type:
+                # 仅当系统消息内容看起来像时间（如 "10:00"、"昨天"、"2024年1月1日"）时才解析并更新上下文；
+                # parse_wechat_time 解析失败会返回参考日期，无法据此区分，因此先用预编译正则判定。
+                # "You recalled a message" 之类的系统消息不影响时间上下文。
+                if is_time_separator(msg.content):
+                    current_context_time = parse_time(msg.content, scan_date)
                     msg.message_time = current_context_time
             else:
                 # Assign current context time
@@ -588,7 +771,6 @@ class MainController:
                                     msg.message_type = MessageType.IMAGE
                                 self.logger.info(f"Saved image for msg {msg.id} to {filepath}")
                             except OSError as e:
-                                import errno
                                 if e.errno == errno.ENOSPC:
                                     self.logger.critical(f"Disk full! Failed to save image for msg {msg.id}: {e}")
                                 else:
@@ -620,8 +802,10 @@ class MainController:
         scroll_interval_range: Optional[tuple] = None,
         max_scrolls_per_minute: Optional[int] = None,
         spm_range: Optional[tuple] = None,
-        on_batch_parsed: Optional[callable] = None,
+        on_batch_parsed: Optional[Callable] = None,
         output_dir: Optional[str] = None,
+        seen_keys: Optional[set] = None,
+        workers: int = 1,
     ) -> List[Message]:
         """
         高级聊天历史扫描 - 使用渐进式滑动和智能终止检测
@@ -638,14 +822,16 @@ class MainController:
             scroll_interval_range: 渐进式滚动的时间间隔范围（秒，形如 (min,max)）
             max_scrolls_per_minute: 每分钟滚动上限（速率限制）
             on_batch_parsed: 每批次解析完成后的回调函数，参数为新发现的消息列表
+            seen_keys: 可选的已知 stable_key 集合（原地更新）；重试时传入同一集合，
+                已识别过的消息不会再次返回或触发回调
+            workers: OCR 流水线线程数；>1 时截图识别在线程池中进行，与滚动/停顿重叠
             
         Returns:
             解析得到的消息列表（去重后）
         """
-        from typing import Optional, Callable
-        
         messages: List[Message] = []
-        seen_keys = set()
+        if seen_keys is None:
+            seen_keys = set()
 
         if output_dir:
             self._images_output_dir = str(output_dir)
@@ -653,41 +839,8 @@ class MainController:
         # 内部函数：处理并去重消息
         def _process_batch_messages(raw_messages: List[any]) -> List[Message]:
             new_unique: List[Message] = []
-            for msg in raw_messages:
-                # 转换为标准消息格式并去重
-                if isinstance(msg, dict):
-                    mtype_raw = msg.get('message_type', MessageType.TEXT)
-                    if isinstance(mtype_raw, MessageType):
-                        mtype = mtype_raw
-                    else:
-                        try:
-                            mtype = MessageType(mtype_raw)
-                        except Exception:
-                            mtype = MessageType.TEXT
-
-                    ts_raw = msg.get('timestamp')
-                    if isinstance(ts_raw, datetime):
-                        ts = ts_raw
-                    elif isinstance(ts_raw, str):
-                        try:
-                            ts = datetime.fromisoformat(ts_raw)
-                        except Exception:
-                            ts = datetime.now()
-                    else:
-                        ts = datetime.now()
-
-                    message_obj = Message(
-                        id=msg.get('id') or str(uuid.uuid4()),
-                        sender=msg.get('sender', '未知'),
-                        content=msg.get('content', ''),
-                        message_type=mtype,
-                        timestamp=ts,
-                        confidence_score=float(msg.get('confidence_score', 0.0)),
-                        raw_ocr_text=msg.get('raw_ocr_text', msg.get('content', ''))
-                    )
-                else:
-                    message_obj = msg
-                
+            # 先整批转换为标准消息格式，再按 stable_key 去重
+            for message_obj in _messages_from_raw(raw_messages):
                 key = message_obj.stable_key()
                 if key not in seen_keys:
                     seen_keys.add(key)
@@ -735,6 +888,7 @@ class MainController:
         # 注入现有的 OCR 和 Parser 实例，避免重复初始化导致资源浪费或冲突
         advanced_scroll.ocr = self.ocr
         advanced_scroll.parser = self.parser
+        advanced_scroll.ocr_workers = max(1, int(workers or 1))
         
         # 动态速率限制（若提供上限）
         try:
@@ -833,6 +987,8 @@ class MainController:
         - 支持全局去重（基于 Message.stable_key），避免跨会话重复内容；
         - 保存阶段支持多格式导出（StorageManager.save_messages_multiple），若未指定 formats 则回退到配置；
         - 该方法假设微信窗口可见且侧边栏与聊天区域布局稳定；如已设置聊天区域覆盖（override），仍可运行但点击会话可能依赖窗口 API。
+        - 会话按顺序逐个扫描而非分发到进程池：所有会话共用同一个微信窗口，点击、滚动与截图必须串行，
+          识别则已在 iter_scan_chat_history 的后台线程中与滚动重叠；多进程只会额外加载多份 OCR 模型。
 
         参数：
         - chat_titles: 需要批量扫描的会话标题列表（支持模糊匹配，如“产品群”可匹配“产品讨论群(1)”）；
@@ -932,6 +1088,8 @@ class MainController:
             if reporter:
                 reporter.update(status=f"扫描会话：{safe_title}")
             try:
+                # 每个会话使用独立的去重集合：per_chat_max_messages 与连续未命中停止条件只按本会话结果计数，
+                # 不受此前会话中出现过的相同内容影响；跨会话去重在下方聚合阶段完成
                 msgs = self.scan_chat_history(
                     max_messages=per_chat_max_messages,
                     enable_deduplication=True,
@@ -945,13 +1103,14 @@ class MainController:
 
             # 全局聚合与去重
             if msgs:
-                for m in msgs:
-                    if deduplicate_global:
+                if deduplicate_global:
+                    for m in msgs:
                         k = m.stable_key()
-                        if k in seen_keys:
-                            continue
-                        seen_keys.add(k)
-                    aggregated.append(m)
+                        if k not in seen_keys:
+                            seen_keys.add(k)
+                            aggregated.append(m)
+                else:
+                    aggregated.extend(msgs)
             else:
                 self.logger.info(f"会话 '{safe_title}' 未提取到消息。")
 
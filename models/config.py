@@ -2,8 +2,9 @@
 Configuration data models for WeChat chat extractor.
 """
 from dataclasses import dataclass, field
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import os
+import re
 
 
 @dataclass
@@ -80,6 +81,27 @@ class OCRConfig:
     # 整图 OCR LRU 缓存的最大条目数（过大将增加内存占用）。
     full_image_cache_size: int = 16
 
+    # 区域识别前是否跳过整图预处理（preprocess_for_ocr），直接把优化后的截图交给引擎。
+    # 说明：
+    # - detect_and_process_regions 会自行做局部对比度增强，并对每个裁剪区域单独预处理；
+    #   PaddleOCR 等深度模型也会在内部做归一化，整图再预处理一遍往往收益有限；
+    # - 开启后每帧省去一次整图增强/降噪/灰度转换；默认关闭以保持既有识别效果；
+    # - 可由配置文件 ocr.prefer_raw_region_input 或 CLI --raw-region-input 开启。
+    prefer_raw_region_input: bool = False
+
+    # GPU 推理时是否开启 cuDNN 卷积算法穷举搜索（Paddle 的 FLAGS_cudnn_exhaustive_search，等价于 cudnn.benchmark）。
+    # 说明：
+    # - 每种输入形状首次推理时搜索最优卷积算法并缓存，同一窗口的整帧截图尺寸固定，后续帧可直接复用；
+    # - 裁剪区域的尺寸各不相同，新形状都会触发一次搜索，默认关闭；仅在整帧识别为主且 use_gpu=True 时建议开启；
+    # - 引擎初始化时经 paddle.set_flags 在运行时设置；可由配置文件 ocr.cudnn_exhaustive_search 或 CLI --cudnn-search 开启。
+    cudnn_exhaustive_search: bool = False
+
+    # CPU 推理时是否开启 MKL-DNN（oneDNN）加速（PaddleOCR 的 enable_mkldnn 参数）。
+    # 说明：
+    # - 在 x86 CPU 上可明显加快识别；但 PaddleOCR 2.x 在裁剪区域尺寸多变时会按形状缓存计算图，内存持续增长；
+    # - Apple Silicon 等非 x86 平台不支持；默认关闭，可由配置文件 ocr.enable_mkldnn 或 CLI --mkldnn 开启。
+    enable_mkldnn: bool = False
+
 
 @dataclass
 class ScrollConfig:
@@ -89,6 +111,18 @@ class ScrollConfig:
     max_retry_attempts: int = 3
 
 
+# 聊天区域覆盖 x,y,width,height：x/y 允许为负（多显示器场景下副屏坐标可能为负），宽高必须为非负整数
+_CHAT_AREA_RE = re.compile(r"\s*(-?\d+)\s*,\s*(-?\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*")
+
+
+def parse_chat_area(text: str) -> Optional[Tuple[int, int, int, int]]:
+    """解析聊天区域覆盖字符串（x,y,width,height），格式不合法时返回 None；各 CLI 共用，按需包装为自身的报错方式"""
+    m = _CHAT_AREA_RE.fullmatch(text)
+    if not m:
+        return None
+    return tuple(map(int, m.groups()))  # type: ignore[return-value]
+
+
 @dataclass
 class OutputConfig:
     """Output configuration."""
@@ -107,6 +141,8 @@ class OutputConfig:
     aggressive_dedup: bool = False
     # 用户自定义的“纯时间/日期分隔”识别正则列表（追加到内置规则之后）
     time_only_patterns: List[str] = field(default_factory=list)
+    # 使用 orjson（若已安装）序列化 JSON 导出，大批量消息时显著加速
+    fast_json: bool = False
 
 
 @dataclass
@@ -158,6 +194,7 @@ class AppConfig:
             exclude_time_only=False,
             aggressive_dedup=False,
             time_only_patterns=[],
+            fast_json=False,
         )
     
     def validate(self) -> bool:
@@ -223,6 +260,9 @@ class AppConfig:
                 "enable_paddlex_yaml_cache": getattr(self.ocr, "enable_paddlex_yaml_cache", True),
                 "enable_full_image_cache": getattr(self.ocr, "enable_full_image_cache", True),
                 "full_image_cache_size": getattr(self.ocr, "full_image_cache_size", 16),
+                "prefer_raw_region_input": getattr(self.ocr, "prefer_raw_region_input", False),
+                "cudnn_exhaustive_search": getattr(self.ocr, "cudnn_exhaustive_search", False),
+                "enable_mkldnn": getattr(self.ocr, "enable_mkldnn", False),
                 "enable_paddlex_offline": getattr(self.ocr, "enable_paddlex_offline", True),
             },
             "output": {
@@ -234,6 +274,7 @@ class AppConfig:
                 "exclude_time_only": (self.output.exclude_time_only if hasattr(self.output, 'exclude_time_only') else False),
                 "aggressive_dedup": (self.output.aggressive_dedup if hasattr(self.output, 'aggressive_dedup') else False),
                 "time_only_patterns": (self.output.time_only_patterns if hasattr(self.output, 'time_only_patterns') else []),
+                "fast_json": (self.output.fast_json if hasattr(self.output, 'fast_json') else False),
             },
             "logging": {
                 "level": self.logging.level,
@@ -7,6 +7,9 @@ import random
 import logging
 import os
 import uuid
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple, List, Dict, Any
 import pyautogui
 from PIL import Image
@@ -67,6 +70,14 @@ class AdvancedScrollController(AutoScrollController):
         # - 现改为成员变量，并在 progressive_scroll 启动时按需初始化。
         self.ocr = None
         self.parser = None
+
+        # OCR 流水线并发度：1 表示串行（截图→识别→滚动）；>1 时识别在线程池中进行，
+        # 与后续滚动/停顿重叠。OCR 引擎调用通过 _ocr_lock 串行化，预处理与解析可并发。
+        self.ocr_workers = 1
+        self._ocr_lock = threading.Lock()
+
+        # 连续截图“内容无变化”判定的 SSIM 阈值（达到即视为同一画面）
+        self.similarity_threshold = 0.98
         
         # 滚动状态跟踪
         self.scroll_history: List[Dict[str, Any]] = []
@@ -130,9 +141,31 @@ class AdvancedScrollController(AutoScrollController):
             return results
         self.logger.debug(f"DEBUG: Initial position located: {self.current_position}")
         
+        workers = max(1, int(self.ocr_workers or 1))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scroll-ocr") if workers > 1 else None
+        pending = deque()
+        
+        try:
+            self._progressive_scroll_loop(direction, max_scrolls, target_content, stop_at_edges,
+                                          max_duration, results, executor, pending)
+        finally:
+            if executor is not None:
+                # 等待所有在途识别完成并按截图顺序发布
+                self._drain_pending_states(pending, wait_all=True)
+                executor.shutdown(wait=True)
+        
+        # 停止看门狗
+        self.stop_watchdog()
+        self.end_time = time.time()
+        return results
+
+    def _progressive_scroll_loop(self, direction, max_scrolls, target_content, stop_at_edges,
+                                 max_duration, results, executor, pending) -> None:
+        """progressive_scroll 的主循环（executor 为 None 时串行识别）"""
         scroll_count = 0
         consecutive_no_change = 0
-        
+        workers = max(1, int(self.ocr_workers or 1))
+
         while scroll_count < max_scrolls:
             scroll_count += 1
             # 心跳日志与资源监控
@@ -144,8 +177,17 @@ class AdvancedScrollController(AutoScrollController):
             # 滚动前确保窗口就绪
             self.ensure_window_ready(retries=1, delay=0.2)
             
-            # 记录当前状态
-            current_state = self._capture_scroll_state(scroll_count)
+            # 记录当前状态（流水线模式下识别异步进行，已完成的状态按顺序发布）
+            if executor is None:
+                current_state = self._capture_scroll_state(scroll_count)
+            else:
+                current_state = self._submit_scroll_state(scroll_count, executor, pending)
+                published = self._drain_pending_states(pending, max_pending=workers)
+                if target_content and any(
+                    target_content.lower() in (st.get("content_summary") or "").lower() for st in published
+                ):
+                    self.logger.info(f"检测到目标内容: {target_content}，停止滚动 (第{scroll_count}次滚动)")
+                    break
             
             # 检查终止条件（依据方向进行边缘判断）
             # 函数级注释：
@@ -203,13 +245,9 @@ class AdvancedScrollController(AutoScrollController):
             # - 该策略避免在 max_scrolls 较大（例如 1000+）时占用过多内存；
             # - 保留最近 3 次以保障内容比较（last vs current），并兼容后续扩展；
             # - 同时清理截图缓存，减少驻留内存对象。
-            self._prune_history_images(keep_last=3)
+            # 流水线模式下额外保留在途状态的截图，供发布时保存图片消息
+            self._prune_history_images(keep_last=3 if executor is None else 3 + workers)
             self.clear_screenshot_cache()
-        
-        # 停止看门狗
-        self.stop_watchdog()
-        self.end_time = time.time()
-        return results
 
     def get_scroll_statistics(self) -> Dict[str, Any]:
         """获取最近一次滚动的统计信息
@@ -370,7 +408,53 @@ class AdvancedScrollController(AutoScrollController):
             return False
 
     def _capture_scroll_state(self, scroll_count: int) -> Dict[str, Any]:
-        """捕获当前滚动状态"""
+        """捕获当前滚动状态（串行：截图、识别并立即发布）"""
+        state = self._snapshot_scroll_state(scroll_count)
+        if state["screenshot"]:
+            self._extract_state_content(state, state["screenshot"])
+        self._publish_state(state)
+        self.scroll_history.append(state)
+        return state
+
+    def _submit_scroll_state(self, scroll_count: int, executor: ThreadPoolExecutor, pending: deque) -> Dict[str, Any]:
+        """捕获截图并将识别提交到线程池（流水线模式）
+
+        函数级注释：
+        - 截图与历史记录同步完成，保证边缘检测与相邻内容比较不受影响；
+        - 识别任务持有截图引用，即使历史截图随后被裁剪也不影响识别；
+        - 状态与 future 按截图顺序进入 pending，由 _drain_pending_states 顺序发布。
+        """
+        state = self._snapshot_scroll_state(scroll_count)
+        self.scroll_history.append(state)
+        future = executor.submit(self._extract_state_content, state, state["screenshot"]) if state["screenshot"] else None
+        pending.append((state, future))
+        return state
+
+    def _drain_pending_states(self, pending: deque, max_pending: int = 0, wait_all: bool = False) -> List[Dict[str, Any]]:
+        """按截图顺序发布已完成识别的状态
+
+        函数级注释：
+        - 队首已完成时持续发布；在途数量超过 max_pending 时阻塞等待队首，限制内存占用；
+        - wait_all=True 时等待并发布全部在途状态（扫描结束时调用）；
+        - 返回本次发布的状态列表。
+        """
+        published = []
+        while pending:
+            state, future = pending[0]
+            if not (wait_all or len(pending) > max_pending or future is None or future.done()):
+                break
+            pending.popleft()
+            if future is not None:
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.warning(f"内容提取失败: {e}")
+            self._publish_state(state)
+            published.append(state)
+        return published
+
+    def _snapshot_scroll_state(self, scroll_count: int) -> Dict[str, Any]:
+        """截图并构造滚动状态（不含识别结果）"""
         # 捕获截图
         raw_screenshot = self.capture_current_view()
         
@@ -398,9 +482,11 @@ class AdvancedScrollController(AutoScrollController):
             "scroll_speed": self.scroll_speed,
             "scroll_delay": self.scroll_delay
         }
-        
-        # 提取当前可视内容
-        if state["screenshot"]:
+        return state
+
+    def _extract_state_content(self, state: Dict[str, Any], screenshot: Image.Image) -> None:
+        """对截图执行预处理、OCR 与解析，结果写回 state"""
+        if screenshot:
             try:
                 # 使用预初始化的 OCR 实例
                 # 函数级注释：
@@ -416,31 +502,25 @@ class AdvancedScrollController(AutoScrollController):
                     from services.message_parser import MessageParser
                     self.parser = MessageParser()
                 
-                # 预处理图像
-                optimized = self.optimize_screenshot_quality(state["screenshot"])
-                preprocessed = self.pre.preprocess_for_ocr(optimized)
+                # 预处理图像（引擎偏好原始输入时跳过整图预处理，与 MainController 保持一致）
+                optimized = self.optimize_screenshot_quality(screenshot)
+                preprocessed = optimized if self.ocr.prefers_raw_input() else self.pre.preprocess_for_ocr(optimized, use_cache=True)
                 
                 # 提取文本区域 (优先使用区域检测，与 MainController 保持一致)
                 text_regions = []
-                try:
-                    region_results = self.ocr.detect_and_process_regions(preprocessed)
-                    text_regions = [tr for tr, _ in region_results]
-                except Exception as e:
-                    self.logger.warning(f"区域检测失败，回退到整图 OCR: {e}")
-                
-                if not text_regions:
-                    self.logger.debug("区域检测未发现文本，尝试整图 OCR")
-                    text_regions = self.ocr.extract_text_regions(preprocessed)
+                with self._ocr_lock:
+                    try:
+                        region_results = self.ocr.detect_and_process_regions(preprocessed)
+                        text_regions = [tr for tr, _ in region_results]
+                    except Exception as e:
+                        self.logger.warning(f"区域检测失败，回退到整图 OCR: {e}")
+                    
+                    if not text_regions:
+                        self.logger.debug("区域检测未发现文本，尝试整图 OCR")
+                        text_regions = self.ocr.extract_text_regions(preprocessed)
 
                 messages = self.parser.parse(text_regions)
                 
-                # 保存图片消息
-                # 函数级注释：
-                # - 解析完成后立即调用 _save_image_messages；
-                # - 确保消息对象中的图片路径被更新为本地文件路径；
-                # - 同时利用当前内存中的 screenshot 进行裁剪，避免后续需要重新加载。
-                self._save_image_messages(messages, state["screenshot"])
-                
                 state["messages"] = messages
                 state["message_count"] = len(messages)
                 state["content_summary"] = self._summarize_content(messages)
@@ -450,7 +530,17 @@ class AdvancedScrollController(AutoScrollController):
                 state["messages"] = []
                 state["message_count"] = 0
                 state["content_summary"] = ""
-        
+
+    def _publish_state(self, state: Dict[str, Any]) -> None:
+        """保存图片消息并触发状态回调（始终在调用线程中按截图顺序执行）"""
+        # 保存图片消息
+        # 函数级注释：
+        # - 解析完成后立即调用 _save_image_messages；
+        # - 确保消息对象中的图片路径被更新为本地文件路径；
+        # - 同时利用当前内存中的 screenshot 进行裁剪，避免后续需要重新加载。
+        if state.get("messages"):
+            self._save_image_messages(state["messages"], state["screenshot"])
+
         # 触发回调（如果存在）
         if self.on_state_captured:
             try:
@@ -458,9 +548,6 @@ class AdvancedScrollController(AutoScrollController):
             except Exception as e:
                 self.logger.warning(f"状态捕获回调执行失败: {e}")
 
-        self.scroll_history.append(state)
-        return state
-
     def _execute_progressive_scroll(self, direction: str, scroll_count: int) -> bool:
         """执行渐进式滚动"""
         try:
@@ -676,9 +763,9 @@ class AdvancedScrollController(AutoScrollController):
             return False
 
     def _compare_content(self, img1: Image.Image, img2: Image.Image) -> bool:
-        """比较两个截图的内容相似度"""
+        """比较两个截图的内容相似度（缩小到 256 最大边后计算 SSIM，阈值见 similarity_threshold）"""
         try:
-            return self._compare_screenshots(img1, img2, threshold=0.98)
+            return self._compare_screenshots(img1, img2, threshold=self.similarity_threshold, max_side=256)
         except:
             return False
 
@@ -21,6 +21,9 @@ from models.data_models import WindowInfo, Rectangle
 
 class AutoScrollController:
     """Controller for automated scrolling operations in WeChat window."""
+
+    # optimize_screenshot_quality 使用的 3×3 锐化核
+    _SHARPEN_KERNEL = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
     
     def __init__(self, scroll_speed: int = 2, scroll_delay: float = 1.0, enable_macos_fallback: Optional[bool] = None, enable_watchdog: Optional[bool] = None, watchdog_interval: float = 5.0, allow_active_fallback: Optional[bool] = None, allow_title_enumeration_fallback: Optional[bool] = None):
         """
@@ -367,6 +370,31 @@ class AutoScrollController:
             self.logger.error(f"Error validating window: {e}")
             return False
     
+    def is_wechat_foreground(self) -> bool:
+        """
+        判断当前前台窗口是否为微信窗口。
+
+        函数级注释：
+        - 已定位到窗口时优先按句柄比较；否则要求前台窗口标题与微信标题（或 CLI 指定的标题）完全一致，
+          避免把标题中含 "WeChat" 的 IDE/项目窗口误判为微信；
+        - 无 getActiveWindow 或查询失败时返回 False，由调用方决定是否继续等待。
+        """
+        if not hasattr(gw, 'getActiveWindow'):
+            return False
+        try:
+            active = gw.getActiveWindow()
+        except Exception:
+            return False
+        if not active:
+            return False
+        handle = getattr(self.current_window, 'handle', 0) if self.current_window else 0
+        if handle and getattr(active, '_hWnd', None) == handle:
+            return True
+        # Some environments may return plain strings instead of window objects.
+        title = active if isinstance(active, str) else (getattr(active, 'title', '') or '')
+        wechat_titles = [self._title_override] if self._title_override else ["微信", "WeChat"]
+        return title.strip() in wechat_titles
+
     def get_chat_area_bounds(self) -> Optional[Rectangle]:
         """
         Calculate the chat area bounds within the WeChat window.
@@ -894,7 +922,8 @@ class AutoScrollController:
             self.logger.error(f"Error checking if at bottom: {e}")
             return False
     
-    def _compare_screenshots(self, img1: Image.Image, img2: Image.Image, threshold: float = 0.92) -> bool:
+    def _compare_screenshots(self, img1: Image.Image, img2: Image.Image, threshold: float = 0.92,
+                             max_side: Optional[int] = None) -> bool:
         """
         Compare two screenshots to determine if they are similar.
         
@@ -902,37 +931,57 @@ class AutoScrollController:
             img1: First screenshot
             img2: Second screenshot
             threshold: Similarity threshold (0.0 to 1.0)
+            max_side: 可选，先将灰度图等比缩小到最大边不超过该值再计算 SSIM（None 表示原分辨率）
             
         Returns:
             True if images are similar (indicating no scroll movement), False otherwise
         """
         try:
-            g1 = cv2.cvtColor(np.array(img1.convert('RGB')), cv2.COLOR_RGB2GRAY)
-            g2 = cv2.cvtColor(np.array(img2.convert('RGB')), cv2.COLOR_RGB2GRAY)
-            if g1.shape != g2.shape:
+            similarity = self.screenshot_similarity(img1, img2, max_side=max_side)
+            if similarity is None:
                 return False
-            g1 = g1.astype(np.float64)
-            g2 = g2.astype(np.float64)
-            kernel = (7, 7)
-            mu1 = cv2.GaussianBlur(g1, kernel, 1.5)
-            mu2 = cv2.GaussianBlur(g2, kernel, 1.5)
-            mu1_sq = mu1 * mu1
-            mu2_sq = mu2 * mu2
-            mu1_mu2 = mu1 * mu2
-            sigma1_sq = cv2.GaussianBlur(g1 * g1, kernel, 1.5) - mu1_sq
-            sigma2_sq = cv2.GaussianBlur(g2 * g2, kernel, 1.5) - mu2_sq
-            sigma12 = cv2.GaussianBlur(g1 * g2, kernel, 1.5) - mu1_mu2
-            L = 255.0
-            C1 = (0.01 * L) ** 2
-            C2 = (0.03 * L) ** 2
-            ssim_map = ((2 * mu1_mu2 + C1) * (2 * sigma12 + C2)) / ((mu1_sq + mu2_sq + C1) * (sigma1_sq + sigma2_sq + C2))
-            similarity = float(ssim_map.mean())
             self.logger.debug(f"Screenshot SSIM: {similarity:.3f}")
             return bool(similarity >= threshold)
             
         except Exception as e:
             self.logger.error(f"Error comparing screenshots: {e}")
             return False
+
+    def screenshot_similarity(self, img1: Image.Image, img2: Image.Image,
+                              max_side: Optional[int] = None) -> Optional[float]:
+        """
+        计算两张截图灰度图的平均 SSIM（结构相似度），尺寸不一致时返回 None。
+
+        函数级注释：
+        - 使用 7×7、σ=1.5 的高斯窗口估计局部均值/方差/协方差，常数取 SSIM 论文默认值；
+        - 提供 max_side 时先以 INTER_AREA 等比缩小（如 256），判断“画面是否基本不变”时足够稳健，
+          计算量随像素数下降约两个数量级，适合在每次滚动或轮询时调用。
+        """
+        g1 = cv2.cvtColor(np.array(img1.convert('RGB')), cv2.COLOR_RGB2GRAY)
+        g2 = cv2.cvtColor(np.array(img2.convert('RGB')), cv2.COLOR_RGB2GRAY)
+        if g1.shape != g2.shape:
+            return None
+        if max_side and max(g1.shape) > max_side:
+            scale = max_side / float(max(g1.shape))
+            size = (max(7, int(round(g1.shape[1] * scale))), max(7, int(round(g1.shape[0] * scale))))
+            g1 = cv2.resize(g1, size, interpolation=cv2.INTER_AREA)
+            g2 = cv2.resize(g2, size, interpolation=cv2.INTER_AREA)
+        g1 = g1.astype(np.float64)
+        g2 = g2.astype(np.float64)
+        kernel = (7, 7)
+        mu1 = cv2.GaussianBlur(g1, kernel, 1.5)
+        mu2 = cv2.GaussianBlur(g2, kernel, 1.5)
+        mu1_sq = mu1 * mu1
+        mu2_sq = mu2 * mu2
+        mu1_mu2 = mu1 * mu2
+        sigma1_sq = cv2.GaussianBlur(g1 * g1, kernel, 1.5) - mu1_sq
+        sigma2_sq = cv2.GaussianBlur(g2 * g2, kernel, 1.5) - mu2_sq
+        sigma12 = cv2.GaussianBlur(g1 * g2, kernel, 1.5) - mu1_mu2
+        L = 255.0
+        C1 = (0.01 * L) ** 2
+        C2 = (0.03 * L) ** 2
+        ssim_map = ((2 * mu1_mu2 + C1) * (2 * sigma12 + C2)) / ((mu1_sq + mu2_sq + C1) * (sigma1_sq + sigma2_sq + C2))
+        return float(ssim_map.mean())
     
     def capture_current_view(self) -> Optional[Image.Image]:
         """
@@ -1324,28 +1373,23 @@ class AutoScrollController:
             Optimized PIL Image
         """
         try:
-            # Convert to numpy array for OpenCV processing
-            img_array = np.array(image)
-            
-            # Convert RGB to BGR for OpenCV
-            img_bgr = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            
-            # Apply image enhancement techniques
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGB')
+            # 只读视图即可：convertScaleAbs 会写入新缓冲区，无需先复制整帧
+            img_array = np.asarray(image)
+            # RGBA 只保留颜色通道（与 COLOR_RGB2BGR 的输出一致）
+            img_array = img_array[..., :3]
+
+            # 对比度/亮度与锐化均逐通道独立计算，通道顺序不影响结果，
+            # 因此省去 RGB↔BGR 往返转换；1×1 高斯模糊为恒等变换，一并省去
             # 1. Increase contrast
             alpha = 1.2  # Contrast control
             beta = 10    # Brightness control
-            enhanced = cv2.convertScaleAbs(img_bgr, alpha=alpha, beta=beta)
-            
-            # 2. Apply Gaussian blur to reduce noise
-            blurred = cv2.GaussianBlur(enhanced, (1, 1), 0)
-            
-            # 3. Sharpen the image
-            kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-            sharpened = cv2.filter2D(blurred, -1, kernel)
-            
-            # Convert back to RGB and PIL Image
-            img_rgb = cv2.cvtColor(sharpened, cv2.COLOR_BGR2RGB)
-            optimized_image = Image.fromarray(img_rgb)
+            enhanced = cv2.convertScaleAbs(img_array, alpha=alpha, beta=beta)
+
+            # 2. Sharpen the image（原地写回，复用 enhanced 缓冲区）
+            cv2.filter2D(enhanced, -1, self._SHARPEN_KERNEL, dst=enhanced)
+            optimized_image = Image.fromarray(enhanced)
             
             self.logger.debug("Screenshot quality optimized")
             return optimized_image
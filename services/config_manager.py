@@ -109,7 +109,12 @@ class ConfigManager:
            - exclude_fields: 导出时移除字段（list[str]）
            - exclude_time_only: 过滤纯时间/日期分隔消息（bool）
            - aggressive_dedup: 激进内容级去重（bool）
+           - fast_json: 使用 orjson 加速 JSON 导出（bool）
            - time_only_patterns: 用户自定义的时间分隔正则（list[str] 或 单字符串会被转为 list）
+        3) 若存在 ocr 扩展字段，注入到 AppConfig.ocr：
+           - cudnn_exhaustive_search: GPU 推理时开启 cuDNN 卷积算法穷举搜索（bool）
+           - enable_mkldnn: CPU 推理时开启 MKL-DNN 加速（bool）
+           - prefer_raw_region_input: 区域识别前跳过整图预处理（bool）
 
         容错策略：
         - 对不存在的键采用默认值；
@@ -163,6 +168,7 @@ class ConfigManager:
                     app_cfg.output.exclude_system_messages = bool(o.get('exclude_system_messages', app_cfg.output.exclude_system_messages))
                     app_cfg.output.exclude_time_only = bool(o.get('exclude_time_only', app_cfg.output.exclude_time_only))
                     app_cfg.output.aggressive_dedup = bool(o.get('aggressive_dedup', app_cfg.output.aggressive_dedup))
+                    app_cfg.output.fast_json = bool(o.get('fast_json', app_cfg.output.fast_json))
                     # 用户自定义时间分隔正则列表
                     try:
                         patterns = o.get('time_only_patterns', app_cfg.output.time_only_patterns)
@@ -178,6 +184,16 @@ class ConfigManager:
                         pass
         except Exception:
             pass
+        # 将 OCRConfig 的扩展字段注入（若提供）
+        try:
+            if 'ocr' in config_data:
+                c = config_data['ocr']
+                if isinstance(c, dict):
+                    app_cfg.ocr.cudnn_exhaustive_search = bool(c.get('cudnn_exhaustive_search', app_cfg.ocr.cudnn_exhaustive_search))
+                    app_cfg.ocr.enable_mkldnn = bool(c.get('enable_mkldnn', app_cfg.ocr.enable_mkldnn))
+                    app_cfg.ocr.prefer_raw_region_input = bool(c.get('prefer_raw_region_input', app_cfg.ocr.prefer_raw_region_input))
+        except Exception:
+            pass
         return app_cfg
     
     def save_config(self, config: AppConfig, file_path: Optional[str] = None) -> None:
@@ -2,7 +2,10 @@
 Image preprocessing module for OCR optimization.
 Handles image quality enhancement, noise reduction, and text region detection.
 """
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import List, Tuple, Optional
 import cv2
 import numpy as np
@@ -22,6 +25,9 @@ class ImagePreprocessor:
         - 在部分平台（如 macOS/Apple Silicon）上，该设置可带来稳定的性能提升。
         """
         self.logger = logging.getLogger(__name__)
+        # preprocess_for_ocr 的结果缓存（LRU）：键为图像内容摘要与预处理参数
+        self._preprocess_cache: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+        self._preprocess_cache_lock = threading.Lock()
         try:
             # 开启 OpenCV 内部优化（如向量化/并行优化），提升降噪与阈值处理性能
             cv2.setUseOptimized(True)
@@ -1217,15 +1223,18 @@ class ImagePreprocessor:
             self.logger.error(f"Image cropping failed: {e}")
             return image
     
-    def preprocess_for_ocr(self, image: Image.Image, 
+    PREPROCESS_CACHE_SIZE = 8
+
+    def preprocess_for_ocr(self, image: Image.Image,
                           enhance_quality: bool = True,
                           reduce_noise_flag: bool = True,
                           convert_grayscale: bool = True,
                           noise_method: str = "bilateral",
-                          padding: int = 0) -> Image.Image:
+                          padding: int = 0,
+                          use_cache: bool = False) -> Image.Image:
         """
         Apply complete preprocessing pipeline for OCR optimization.
-        
+
         Args:
             image: Input PIL Image
             enhance_quality: Whether to enhance image quality
@@ -1234,9 +1243,62 @@ class ImagePreprocessor:
             noise_method: Noise reduction method to use ("gaussian", "median", "bilateral")
             padding: Padding pixels to add around the image (default: 0).
                      Adding padding (e.g. 10) can improve OCR for text touching edges.
-            
+            use_cache: Whether to look up / store the result in the full-frame LRU cache (default: False).
+
         Returns:
             PIL Image: Preprocessed image ready for OCR
+
+        函数级注释：
+        - use_cache=True 时结果按 (模式, 尺寸, 像素内容摘要, 预处理参数) 做 LRU 缓存：重试、边缘确认等场景下
+          重复截到相同画面时直接返回缓存副本，省去整帧的增强/双边滤波/灰度化（1080p 约 150ms，摘要约 3ms）；
+          返回的始终是副本，调用方修改结果不会污染缓存；
+        - 缓存仅供整帧截图调用方显式开启；裁剪气泡等各不相同的小图几乎不会命中，默认不计算摘要也不额外复制。
+        """
+        if not use_cache:
+            return self._preprocess_for_ocr_uncached(
+                image, enhance_quality, reduce_noise_flag, convert_grayscale, noise_method, padding
+            )
+        try:
+            key = (
+                image.mode,
+                image.size,
+                hashlib.blake2b(image.tobytes(), digest_size=16).digest(),
+                enhance_quality,
+                reduce_noise_flag,
+                convert_grayscale,
+                noise_method,
+                padding,
+            )
+        except Exception:
+            key = None
+        if key is not None:
+            with self._preprocess_cache_lock:
+                cached = self._preprocess_cache.get(key)
+                if cached is not None:
+                    self._preprocess_cache.move_to_end(key)
+            if cached is not None:
+                return cached.copy()
+
+        processed = self._preprocess_for_ocr_uncached(
+            image, enhance_quality, reduce_noise_flag, convert_grayscale, noise_method, padding
+        )
+        # 预处理失败时原样返回输入图像，不缓存
+        if key is not None and processed is not image:
+            with self._preprocess_cache_lock:
+                self._preprocess_cache[key] = processed.copy()
+                self._preprocess_cache.move_to_end(key)
+                while len(self._preprocess_cache) > self.PREPROCESS_CACHE_SIZE:
+                    self._preprocess_cache.popitem(last=False)
+        return processed
+
+    def _preprocess_for_ocr_uncached(self, image: Image.Image,
+                                     enhance_quality: bool,
+                                     reduce_noise_flag: bool,
+                                     convert_grayscale: bool,
+                                     noise_method: str,
+                                     padding: int) -> Image.Image:
+        """
+        Run the preprocessing pipeline (see preprocess_for_ocr) without caching.
         """
         try:
             processed_image = image.copy()
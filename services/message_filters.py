@@ -3,18 +3,78 @@ Utilities to filter Message objects by sender, time range, type and content.
 """
 from __future__ import annotations
 
+import unicodedata
 from datetime import datetime
-from typing import Iterable, List, Optional, Sequence
+from typing import Iterable, Iterator, List, Optional
 
 from models.data_models import Message, MessageType
 
 
+def _is_caseless(query: str) -> bool:
+    """Return True when lowercasing the haystack cannot affect matches of ``query``.
+
+    A query made only of uncased, non-combining characters (CJK, digits,
+    punctuation, emoji...) can only match runs of identical uncased characters,
+    which str.lower() leaves untouched, so the per-message lower() copy can be
+    skipped and a plain ``in`` test on the raw text gives the same answer.
+    """
+    return query.lower() == query.upper() and not any(unicodedata.combining(ch) for ch in query)
+
+
+def iter_filter_messages(
+    messages: Iterable[Message],
+    sender: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    types: Optional[Iterable[MessageType]] = None,
+    contains: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+) -> Iterator[Message]:
+    """Lazily yield messages matching the criteria (see filter_messages).
+
+    Consumes ``messages`` one at a time, so it can sit directly on top of a
+    streaming source such as MainController.iter_scan_chat_history.
+    """
+    sender_q = sender.lower() if sender else None
+    contains_q = contains.lower() if contains else None
+    # Reuse a frozenset passed by the caller; otherwise build one for O(1) lookups.
+    type_set = (types if isinstance(types, frozenset) else frozenset(types)) if types else None
+    sender_caseless = bool(sender_q) and _is_caseless(sender_q)
+    contains_caseless = bool(contains_q) and _is_caseless(contains_q)
+    min_conf = float(min_confidence) if min_confidence is not None else None
+
+    # Chain one generator stage per *active* criterion instead of testing every
+    # criterion inside a single loop: inactive filters cost nothing per message
+    # and each stage is a tight comprehension. Cheap datetime/enum stages come
+    # first so out-of-range messages never reach the sender/content string work.
+    it: Iterator[Message] = iter(messages)
+    if start:
+        it = (m for m in it if m.timestamp >= start)
+    if end:
+        it = (m for m in it if m.timestamp <= end)
+    if type_set:
+        it = (m for m in it if m.message_type in type_set)
+    if sender_q:
+        if sender_caseless:
+            it = (m for m in it if sender_q in (m.sender or ""))
+        else:
+            it = (m for m in it if sender_q in (m.sender or "").lower())
+    if contains_q:
+        if contains_caseless:
+            it = (m for m in it if contains_q in (m.content or ""))
+        else:
+            it = (m for m in it if contains_q in (m.content or "").lower())
+    if min_conf is not None:
+        it = (m for m in it if m.confidence_score >= min_conf)
+    return it
+
+
 def filter_messages(
     messages: Iterable[Message],
     sender: Optional[str] = None,
     start: Optional[datetime] = None,
     end: Optional[datetime] = None,
-    types: Optional[Sequence[MessageType]] = None,
+    types: Optional[Iterable[MessageType]] = None,
     contains: Optional[str] = None,
     min_confidence: Optional[float] = None,
 ) -> List[Message]:
@@ -22,26 +82,17 @@ def filter_messages(
 
     - sender: case-insensitive substring match in Message.sender
     - start/end: inclusive datetime bounds on Message.timestamp
-    - types: allowed MessageType sequence
+    - types: allowed MessageType collection (a frozenset is used as-is)
     - contains: case-insensitive substring match in Message.content
     """
-    sender_q = sender.lower() if sender else None
-    contains_q = contains.lower() if contains else None
-    type_set = set(types) if types else None
-
-    out: List[Message] = []
-    for m in messages:
-        if sender_q and (m.sender or "").lower().find(sender_q) == -1:
-            continue
-        if start and m.timestamp < start:
-            continue
-        if end and m.timestamp > end:
-            continue
-        if type_set and m.message_type not in type_set:
-            continue
-        if contains_q and (m.content or "").lower().find(contains_q) == -1:
-            continue
-        if (min_confidence is not None) and (m.confidence_score < float(min_confidence)):
-            continue
-        out.append(m)
-    return out
\ No newline at end of file
+    return list(
+        iter_filter_messages(
+            messages,
+            sender=sender,
+            start=start,
+            end=end,
+            types=types,
+            contains=contains,
+            min_confidence=min_confidence,
+        )
+    )
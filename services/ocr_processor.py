@@ -237,6 +237,9 @@ class OCRProcessor:
             except Exception as _offe:
                 self.logger.debug(f"Enable paddlex offline patch failed (optional): {_offe}")
 
+            # 可选：GPU 推理开启 cuDNN 卷积算法穷举搜索（paddle 可能已被导入，需经运行时接口设置）
+            self._apply_cudnn_search_flag()
+
             # 延迟导入或使用测试注入的 PaddleOCR（在离线补丁启用之后），避免导入阶段触发网络请求
             # 函数级注释：
             # - 优先使用被测试替身注入的 PaddleOCR（services.ocr_processor.PaddleOCR 被 patch 时）
@@ -292,6 +295,12 @@ class OCRProcessor:
                             # 显式指定轻量级模型版本，避免默认下载 Server 版大模型
                             "ocr_version": "PP-OCRv4",
                         }
+                    # GPU：新版 PaddleOCR 以 device 指定推理设备；CPU 推理仅在配置开启时启用 MKL-DNN 加速。
+                    # 两者均经过下方签名过滤，仅在当前版本支持时传递。
+                    if full_kwargs["use_gpu"]:
+                        full_kwargs["device"] = "gpu"
+                    elif bool(getattr(self.config, "enable_mkldnn", False)):
+                        full_kwargs["enable_mkldnn"] = True
 
                     # 2) 测试环境兼容：如果 PaddleOCR 被 unittest.mock.Mock 替换，则直接传递完整参数
                     #    以满足 tests/test_ocr_processor.py::test_initialize_engine_success 的断言
@@ -1674,6 +1683,41 @@ class OCRProcessor:
 
         return text_regions
 
+    def recognize_batch(self, images: List[Image.Image]) -> List[List[TextRegion]]:
+        """
+        批量识别多张图像，返回与输入一一对应的文本区域列表。
+
+        说明：
+        - 将全部图像转为 RGB ndarray 后一次性交给引擎（PaddleOCR 3.x 的 predict(list) 为每张图返回一个结果对象），
+          检测与识别分支按批推理，避免逐张调用的固定开销；
+        - 批量调用不可用、失败或返回条数与输入不一致时，回退为逐张 extract_text_regions；
+        - 不执行预处理，调用方按需先行预处理。
+
+        Args:
+            images: 待识别的 PIL 图像列表
+
+        Returns:
+            List[List[TextRegion]]: 与 images 等长的文本区域列表
+        """
+        if self.ocr_engine is None:
+            raise RuntimeError("OCR engine not initialized. Call initialize_engine() first.")
+        if not images:
+            return []
+
+        arrays = [np.asarray(img if img.mode == "RGB" else img.convert("RGB")) for img in images]
+        batch_results = None
+        pred = getattr(self.ocr_engine, "predict", None)
+        if pred is not None:
+            try:
+                batch_results = list(pred(arrays))
+            except Exception as e:
+                self.logger.debug(f"Batched OCR call failed, falling back to per-image OCR: {e}")
+                batch_results = None
+
+        if batch_results is None or len(batch_results) != len(images):
+            return [self.extract_text_regions(img, preprocess=False) for img in images]
+        return [self._build_text_regions(self._normalize_ocr_output([res])) for res in batch_results]
+
     # 注意：上方重复的 extract_text_regions 定义（错误返回 OCRResult）已移除，保留并统一到下方正确实现。
     
     def extract_text_regions(self, image: Image.Image, preprocess: bool = True, preprocess_options: Optional[dict] = None) -> List[TextRegion]:
@@ -2529,6 +2573,39 @@ class OCRProcessor:
             self.logger.error(f"Region-based processing failed: {e}")
             return []
     
+    def _apply_cudnn_search_flag(self) -> bool:
+        """
+        在 GPU 推理且开启 cudnn_exhaustive_search 时设置 Paddle 的 cuDNN 算法穷举搜索标志。
+
+        函数级注释：
+        - Paddle 仅在首次导入时读取 FLAGS_* 环境变量，而 --gpu 的 CUDA 探测早已导入 paddle，
+          因此这里通过 paddle.set_flags 在运行时生效；
+        - 未开启 GPU 或未开启该配置时不做任何事；paddle 不可用或设置失败仅记录 debug 日志。
+
+        Returns:
+            bool: 是否成功设置了该标志
+        """
+        if not (bool(getattr(self.config, "use_gpu", False)) and bool(getattr(self.config, "cudnn_exhaustive_search", False))):
+            return False
+        try:
+            import paddle
+            paddle.set_flags({"FLAGS_cudnn_exhaustive_search": True})
+            self.logger.info("Enabled cuDNN exhaustive search for GPU OCR")
+            return True
+        except Exception as e:
+            self.logger.debug(f"Set FLAGS_cudnn_exhaustive_search failed (optional): {e}")
+            return False
+
+    def prefers_raw_input(self) -> bool:
+        """
+        区域识别是否希望直接接收未经整图预处理的截图。
+
+        函数级注释：
+        - 由 OCRConfig.prefer_raw_region_input 决定；
+        - 为 True 时调用方（MainController）跳过 preprocess_for_ocr，区域检测与裁剪区域的预处理仍在本类内部完成。
+        """
+        return bool(getattr(self.config, "prefer_raw_region_input", False))
+
     def is_engine_ready(self) -> bool:
         """
         Check if OCR engine is initialized and ready.
@@ -8,12 +8,31 @@ import logging
 from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from models.data_models import Message, MessageType
 from models.config import OutputConfig
 import re
 
+try:
+    # 可选依赖：C 实现的 JSON 编码器，启用 OutputConfig.fast_json 时使用
+    import orjson
+except ImportError:
+    orjson = None
+
+# 可能超出 64 位的整数字面量（20 位及以上数字）：orjson 会将其静默解析为 float
+_LONG_DIGITS_RE = re.compile(rb"\d{20,}")
+
+
+def _loads_json_bytes(raw: bytes):
+    """解析 JSON 字节：优先 orjson；NaN/Infinity 或可能超出 64 位的整数回退到标准库 json.loads。"""
+    if orjson is not None and not _LONG_DIGITS_RE.search(raw):
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
 
 class StorageManager:
     """
@@ -26,6 +45,10 @@ class StorageManager:
         self._ensure_output_dir()
         # Persistent deduplication index across saves
         self._dedup_index_path = Path(self.config.directory) / ".dedup_index.json"
+        # 索引的内存缓存：记录与之对应的文件签名 (mtime_ns, size) 及最近一次落盘时的键数量
+        self._dedup_index_cache: Optional[set] = None
+        self._dedup_index_sig: Optional[tuple] = None
+        self._dedup_index_saved_len = 0
 
     def _ensure_output_dir(self) -> None:
         """Create output directory if it does not exist."""
@@ -42,13 +65,21 @@ class StorageManager:
         filename = f"{prefix}_{ts}.{ext}"
         return Path(self.config.directory) / filename
 
-    def _message_to_dict(self, msg: Message) -> dict:
+    def _excluded_fields(self) -> frozenset:
+        """读取 OutputConfig.exclude_fields 并转换为 frozenset，供批量导出时一次性计算后复用"""
+        try:
+            return frozenset((self.config and getattr(self.config, 'exclude_fields', [])) or ())
+        except Exception:
+            return frozenset()
+
+    def _message_to_dict(self, msg: Message, exclude: Optional[frozenset] = None) -> dict:
         """Serialize Message to a JSON-friendly dict.
 
         函数级注释：
         - 基础字段保持与现有测试兼容（id/sender/content/message_type/timestamp/confidence_score/raw_ocr_text）；
         - 当存在结构化扩展（share_card/quote_meta）时，序列化为嵌套字典，便于下游消费；
-        - 支持通过 OutputConfig.exclude_fields 排除顶层字段（包含 share_card/quote_meta 顶层键）。
+        - 支持通过 OutputConfig.exclude_fields 排除顶层字段（包含 share_card/quote_meta 顶层键）；
+        - exclude 为调用方预先计算的排除集合，批量导出时避免逐条消息重建集合。
         """
         base = {
             "id": msg.id,
@@ -75,73 +106,140 @@ class StorageManager:
         except Exception:
             pass
         # 根据 OutputConfig.exclude_fields 进行字段排除（CSV/JSON 共用）
-        try:
-            exclude = set((self.config and getattr(self.config, 'exclude_fields', []) ) or [])
-        except Exception:
-            exclude = set()
-        for k in list(base.keys()):
-            if k in exclude:
-                base.pop(k, None)
+        if exclude is None:
+            exclude = self._excluded_fields()
+        for k in exclude:
+            base.pop(k, None)
         return base
 
+    def _use_fast_json(self) -> bool:
+        """是否使用 orjson 序列化 JSON（需开启 OutputConfig.fast_json 且已安装 orjson）"""
+        return orjson is not None and bool(getattr(self.config, 'fast_json', False))
+
     def _deduplicate(self, messages: List[Message]) -> List[Message]:
         """Remove duplicate messages.
 
         Priority key: message.id; fallback: sender + timestamp + content.
         """
+        return self._deduplicate_keyed(messages)[0]
+
+    def _deduplicate_keyed(self, messages: List[Message]) -> Tuple[List[Message], List[str]]:
+        """批次内去重，同时返回保留消息对应的稳定键，供随后的持久化索引比对复用。
+
+        函数级注释：
+        - 每条消息的 stable_key 只计算一次，索引比对阶段不再重复生成；
+        - 次级键（发送方 + 内容，去空白、统一小写）仅在激进模式下计算。
+        """
         seen = set()
         unique: List[Message] = []
+        keys: List[str] = []
         aggressive = bool(getattr(self.config, 'aggressive_dedup', False))
-
-        # 次级键：基于发送方 + 内容（去空白、统一小写），用于更强去重
-        def secondary_key(msg: Message) -> str:
-            return f"{(msg.sender or '').strip().lower()}|{(msg.content or '').strip().lower()}"
-
         seen_secondary = set()
+        get_key = self._get_message_key
         for m in messages:
-            key = self._get_message_key(m)
-            sec = secondary_key(m)
+            key = get_key(m)
             if key in seen:
                 continue
-            if aggressive and sec in seen_secondary:
-                # 激进模式：内容级重复直接跳过
-                continue
-            seen.add(key)
             if aggressive:
+                # 激进模式：内容级重复直接跳过
+                sec = f"{(m.sender or '').strip().lower()}|{(m.content or '').strip().lower()}"
+                if sec in seen_secondary:
+                    continue
                 seen_secondary.add(sec)
+            seen.add(key)
             unique.append(m)
-        return unique
+            keys.append(key)
+        return unique, keys
 
     @staticmethod
     def _get_message_key(m: Message) -> str:
         # Use centralized key generation from Message
         return m.stable_key()
 
+    def _dedup_index_signature(self) -> Optional[tuple]:
+        """返回索引文件的 (st_mtime_ns, st_size)，文件不存在时返回 None"""
+        try:
+            st = self._dedup_index_path.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
     def _load_dedup_index(self) -> set:
-        """Load persistent deduplication index from disk."""
+        """Load persistent deduplication index from disk.
+
+        函数级注释：
+        - 索引文件自上次读写后未变化（签名一致）时直接复用内存中的集合，
+          连续多批保存（扫描批次、尾部监控）不再每次重新读取并解析整个 JSON；
+        - 文件被外部修改或删除时签名变化，重新从磁盘加载。
+        """
+        sig = self._dedup_index_signature()
+        if sig is not None and sig == self._dedup_index_sig and self._dedup_index_cache is not None:
+            return self._dedup_index_cache
+        index = self._read_dedup_index() if sig is not None else set()
+        self._dedup_index_cache = index
+        self._dedup_index_sig = sig
+        self._dedup_index_saved_len = len(index)
+        return index
+
+    def _read_dedup_index(self) -> set:
+        """从磁盘读取索引文件（可用时使用 orjson 解析，必要时回退标准库），格式异常时返回空集合"""
         try:
-            if self._dedup_index_path.exists():
-                with self._dedup_index_path.open("r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        return set(data)
-                    self.logger.warning("Dedup index file malformed, resetting.")
+            data = _loads_json_bytes(self._dedup_index_path.read_bytes())
+            if isinstance(data, list):
+                return set(data)
+            self.logger.warning("Dedup index file malformed, resetting.")
             return set()
         except Exception as e:
             self.logger.warning(f"Failed to load dedup index: {e}")
             return set()
 
     def _save_dedup_index(self, index: set) -> None:
-        """Persist deduplication index to disk."""
+        """Persist deduplication index to disk.
+
+        索引只会新增键：若传入的正是缓存集合、键数量未变且文件未被外部修改，则跳过重写。
+        """
+        if (
+            index is self._dedup_index_cache
+            and len(index) == self._dedup_index_saved_len
+            and self._dedup_index_sig is not None
+            and self._dedup_index_signature() == self._dedup_index_sig
+        ):
+            return
         try:
-            with self._dedup_index_path.open("w", encoding="utf-8") as f:
-                json.dump(sorted(index), f, ensure_ascii=False, indent=2)
+            if orjson is not None:
+                self._dedup_index_path.write_bytes(orjson.dumps(sorted(index), option=orjson.OPT_INDENT_2))
+            else:
+                with self._dedup_index_path.open("w", encoding="utf-8") as f:
+                    json.dump(sorted(index), f, ensure_ascii=False, indent=2)
         except Exception as e:
             self.logger.warning(f"Failed to save dedup index: {e}")
+            self._dedup_index_cache = None
+            self._dedup_index_sig = None
+            return
+        self._dedup_index_cache = index
+        self._dedup_index_sig = self._dedup_index_signature()
+        self._dedup_index_saved_len = len(index)
+
+    def _filter_against_index(self, messages: List[Message], keys: List[str]) -> List[Message]:
+        """过滤掉历史保存中已出现的消息，并将新消息的键写入持久化索引。
+
+        messages 须已完成批次内去重，keys 为与之一一对应的稳定键（见 _deduplicate_keyed），
+        因此每个唯一消息只查询一次索引。
+        """
+        index = self._load_dedup_index()
+        filtered: List[Message] = []
+        for m, key in zip(messages, keys):
+            if key not in index:
+                filtered.append(m)
+                index.add(key)
+        self._save_dedup_index(index)
+        return filtered
 
     def clear_dedup_index(self) -> None:
         """Clear persistent deduplication index file if it exists."""
         try:
+            self._dedup_index_cache = None
+            self._dedup_index_sig = None
             if self._dedup_index_path.exists():
                 self._dedup_index_path.unlink()
                 self.logger.info(f"Cleared dedup index: {self._dedup_index_path}")
@@ -164,9 +262,21 @@ class StorageManager:
 
         if fmt == "json":
             path = self._generate_filename(filename_prefix, "json")
-            data = [self._message_to_dict(m) for m in messages]
-            with path.open("w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            exclude = self._excluded_fields()
+            data = [self._message_to_dict(m, exclude) for m in messages]
+            buf = None
+            if self._use_fast_json():
+                # orjson 直接输出 UTF-8 字节（非 ASCII 字符不转义，与 ensure_ascii=False 一致）；
+                # 遇到 orjson 不支持的值（如超过 64 位的整数、非字符串键）时回退到标准库 json
+                try:
+                    buf = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+                except TypeError:
+                    buf = None
+            if buf is not None:
+                path.write_bytes(buf)
+            else:
+                with path.open("w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
             self.logger.info(f"Saved {len(messages)} messages to {path}")
             return path
 
@@ -174,16 +284,12 @@ class StorageManager:
             path = self._generate_filename(filename_prefix, "csv")
             # 动态移除被排除的字段
             default_fields = ["id", "sender", "content", "message_type", "timestamp", "confidence_score", "raw_ocr_text"]
-            try:
-                exclude = set((self.config and getattr(self.config, 'exclude_fields', []) ) or [])
-            except Exception:
-                exclude = set()
+            exclude = self._excluded_fields()
             fieldnames = [f for f in default_fields if f not in exclude]
             with path.open("w", encoding="utf-8", newline="") as f:
                 writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
                 writer.writeheader()
-                for m in messages:
-                    writer.writerow(self._message_to_dict(m))
+                writer.writerows(self._message_to_dict(m, exclude) for m in messages)
             self.logger.info(f"Saved {len(messages)} messages to {path}")
             return path
 
@@ -246,18 +352,9 @@ class StorageManager:
 
         if self.config.enable_deduplication:
             # First deduplicate within this batch
-            messages = self._deduplicate(messages)
-            # Then filter out messages already saved in previous runs
-            index = self._load_dedup_index()
-            filtered: List[Message] = []
-            for m in messages:
-                key = self._get_message_key(m)
-                if key not in index:
-                    filtered.append(m)
-                    index.add(key)
-            messages = filtered
-            # Persist updated index
-            self._save_dedup_index(index)
+            messages, keys = self._deduplicate_keyed(messages)
+            # Then filter out messages already saved in previous runs (index is persisted)
+            messages = self._filter_against_index(messages, keys)
         fmt = (self.config.format or "json").lower()
         return self._write_messages(messages, fmt, filename_prefix)
 
@@ -290,16 +387,8 @@ class StorageManager:
 
         # 去重与索引过滤仅执行一次
         if self.config.enable_deduplication:
-            messages = self._deduplicate(messages)
-            index = self._load_dedup_index()
-            filtered: List[Message] = []
-            for m in messages:
-                key = self._get_message_key(m)
-                if key not in index:
-                    filtered.append(m)
-                    index.add(key)
-            messages = filtered
-            self._save_dedup_index(index)
+            messages, keys = self._deduplicate_keyed(messages)
+            messages = self._filter_against_index(messages, keys)
 
         # 逐格式写入
         paths: List[Path] = []
@@ -330,20 +419,28 @@ class StorageManager:
         # For JSON, we use JSON Lines (one JSON object per line) for appendability
         # Standard JSON array cannot be easily appended to without reading the whole file.
         if fmt == "json":
+            exclude = self._excluded_fields()
+            if self._use_fast_json():
+                # 先完整编码再写入：orjson 不支持的值（TypeError）回退到下方标准库路径，不会留下半批数据
+                try:
+                    buf = b"".join(orjson.dumps(self._message_to_dict(m, exclude)) + b"\n" for m in messages)
+                except TypeError:
+                    buf = None
+                if buf is not None:
+                    with file_path.open("ab") as fb:
+                        fb.write(buf)
+                    return
             with file_path.open("a", encoding="utf-8") as f:
                 for m in messages:
                     # Compact JSON line
-                    json.dump(self._message_to_dict(m), f, ensure_ascii=False)
+                    json.dump(self._message_to_dict(m, exclude), f, ensure_ascii=False)
                     f.write("\n")
             return
 
         if fmt == "csv":
             # 动态移除被排除的字段
             default_fields = ["id", "sender", "content", "message_type", "timestamp", "message_time", "confidence_score", "raw_ocr_text"]
-            try:
-                exclude = set((self.config and getattr(self.config, 'exclude_fields', []) ) or [])
-            except Exception:
-                exclude = set()
+            exclude = self._excluded_fields()
             fieldnames = [f for f in default_fields if f not in exclude]
             
             # Check if file exists and is empty to write header
@@ -353,8 +450,7 @@ class StorageManager:
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
                 if write_header:
                     writer.writeheader()
-                for m in messages:
-                    writer.writerow(self._message_to_dict(m))
+                writer.writerows(self._message_to_dict(m, exclude) for m in messages)
             return
 
         if fmt == "txt":
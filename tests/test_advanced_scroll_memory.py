@@ -125,4 +125,73 @@ def integration_progressive_scroll_prunes_images_during_loop(monkeypatch, contro
     assert len(controller.scroll_history) >= 3
     # 仅最近 3 条可能保留 screenshot，其余应为 None
     non_none_count = sum(1 for s in controller.scroll_history if s.get("screenshot") is not None)
-    assert non_none_count <= 3
\ No newline at end of file
+    assert non_none_count <= 3
+
+def test_drain_pending_states_publishes_in_capture_order(controller):
+    """
+    验证流水线模式下识别完成顺序与截图顺序不一致时，状态仍按截图顺序发布。
+
+    函数级注释：
+    - 第 2 帧先于第 1 帧完成识别；
+    - 未等待全部时，队首未完成则不发布任何状态；wait_all=True 时按 1、2 顺序发布。
+    """
+    from collections import deque
+    from concurrent.futures import Future
+
+    published = []
+    controller.on_state_captured = lambda state: published.append(state["scroll_count"])
+
+    first, second = Future(), Future()
+    pending = deque([({"scroll_count": 1, "screenshot": None}, first),
+                     ({"scroll_count": 2, "screenshot": None}, second)])
+    second.set_result(None)
+
+    assert controller._drain_pending_states(pending, max_pending=2) == []
+    assert published == []
+
+    first.set_result(None)
+    controller._drain_pending_states(pending, wait_all=True)
+    assert published == [1, 2]
+    assert not pending
+
+
+@pytest.mark.parametrize("prefer_raw", [False, True])
+def test_extract_state_content_honours_prefer_raw_input(controller, monkeypatch, prefer_raw):
+    """
+    验证 _extract_state_content 与 MainController 一致：OCR 偏好原始输入时跳过整图预处理。
+
+    函数级注释：
+    - 以替身 OCR/解析器记录送入区域检测的图像；
+    - prefer_raw=True 时应直接使用优化后的截图，且不调用 preprocess_for_ocr。
+    """
+    seen = []
+    preprocessed_marker = _make_image(10, 10)
+
+    class DummyOCR:
+        def is_engine_ready(self):
+            return True
+
+        def prefers_raw_input(self):
+            return prefer_raw
+
+        def detect_and_process_regions(self, image):
+            seen.append(image)
+            return []
+
+        def extract_text_regions(self, image):
+            return []
+
+    class DummyParser:
+        def parse(self, regions):
+            return []
+
+    optimized = _make_image(20, 20)
+    controller.ocr = DummyOCR()
+    controller.parser = DummyParser()
+    monkeypatch.setattr(controller, "optimize_screenshot_quality", lambda img: optimized)
+    monkeypatch.setattr(controller.pre, "preprocess_for_ocr", lambda img, **kwargs: preprocessed_marker)
+
+    state = {}
+    controller._extract_state_content(state, _make_image(20, 20))
+    assert state["messages"] == []
+    assert seen == [optimized if prefer_raw else preprocessed_marker]
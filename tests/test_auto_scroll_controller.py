@@ -154,7 +154,39 @@ class TestAutoScrollController:
         
         assert isinstance(result, Image.Image)
         assert result.size == test_image.size
+
+    def test_optimize_screenshot_quality_matches_reference_pipeline(self):
+        """省去通道往返与恒等模糊后，结果应与原 BGR 流程逐像素一致（含 RGBA 输入）。"""
+        import cv2
+
+        rng = np.random.RandomState(0)
+        for shape in [(60, 80, 3), (60, 80, 4)]:
+            img_array = rng.randint(0, 255, shape, dtype=np.uint8)
+            bgr = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+            enhanced = cv2.convertScaleAbs(bgr, alpha=1.2, beta=10)
+            sharpened = cv2.filter2D(cv2.GaussianBlur(enhanced, (1, 1), 0), -1,
+                                     np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]]))
+            expected = cv2.cvtColor(sharpened, cv2.COLOR_BGR2RGB)
+
+            result = self.controller.optimize_screenshot_quality(Image.fromarray(img_array))
+            assert result.mode == "RGB"
+            assert np.array_equal(np.asarray(result), expected)
     
+    def test_is_wechat_foreground_matches_handle_or_exact_title(self, monkeypatch):
+        """前台窗口按句柄或完整标题匹配；标题仅包含 WeChat 的其他窗口不算微信。"""
+        active = Mock(title="WeChatMsgGrabber - IDE", _hWnd=1)
+        monkeypatch.setattr(asc.gw, "getActiveWindow", lambda: active, raising=False)
+        assert self.controller.is_wechat_foreground() is False
+
+        active.title = "微信"
+        assert self.controller.is_wechat_foreground() is True
+
+        active.title = "WeChatMsgGrabber - IDE"
+        self.controller.current_window = WindowInfo(
+            handle=1, position=Rectangle(x=0, y=0, width=800, height=600), is_active=True, title="微信"
+        )
+        assert self.controller.is_wechat_foreground() is True
+
     def test_compare_screenshots_identical(self):
         """Test screenshot comparison with identical images."""
         # Create identical test images
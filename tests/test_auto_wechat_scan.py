@@ -0,0 +1,93 @@
+import logging
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from models.config import OCRConfig
+from models.data_models import Message, MessageType
+from cli.auto_wechat_scan import (
+    apply_cli_overrides,
+    compute_date_streaks,
+    compute_natural_scroll_params,
+    count_senders,
+    parse_cli_args,
+    run_scan_passes,
+)
+
+
+def test_compute_date_streaks_empty():
+    assert compute_date_streaks([]) == (0, 0)
+
+
+def test_compute_date_streaks_single_day():
+    assert compute_date_streaks([date(2024, 10, 1)]) == (1, 0)
+
+
+def test_compute_date_streaks_streak_and_gap():
+    dates = [
+        date(2024, 10, 1),
+        date(2024, 10, 2),
+        date(2024, 10, 3),
+        date(2024, 10, 7),  # 间隔 3 天
+        date(2024, 10, 8),
+        date(2024, 10, 10),  # 间隔 1 天
+    ]
+    assert compute_date_streaks(dates) == (3, 3)
+
+
+def test_compute_natural_scroll_params_lookup():
+    assert compute_natural_scroll_params(900, "up") == ((162, 234), (0.27, 0.48))
+    assert compute_natural_scroll_params(1200, "down") == ((183, 265), (0.22, 0.38))
+    # 超出范围的高度截断到 600/1400，非法高度使用默认值
+    assert compute_natural_scroll_params(300, "up") == compute_natural_scroll_params(600, "up")
+    assert compute_natural_scroll_params(5000, "up") == compute_natural_scroll_params(1400, "up")
+    assert compute_natural_scroll_params(0, "up") == ((180, 260), (0.25, 0.45))
+    # 按像素查表，与逐次计算结果一致（不做 100 像素档位取整）
+    assert compute_natural_scroll_params(1049, "up") == ((188, 272), (0.22, 0.38))
+    assert compute_natural_scroll_params(1001, "up") == ((180, 260), (0.22, 0.38))
+    assert compute_natural_scroll_params(650, "up") == ((117, 169), (0.27, 0.48))
+    assert compute_natural_scroll_params(650.5, "down") == ((99, 143), (0.27, 0.48))
+
+
+def test_count_senders():
+    def _msg(sender):
+        return Message(id="", sender=sender, content="x", message_type=MessageType.TEXT,
+                       timestamp=datetime(2024, 10, 1), confidence_score=1.0, raw_ocr_text="x")
+
+    messages = [_msg("我"), _msg("对方"), _msg("我"), _msg(None), _msg("系统")]
+    assert count_senders(messages) == (2, 1)
+    assert count_senders([]) == (0, 0)
+
+
+def test_run_scan_passes_runs_every_pass_and_survives_errors():
+    logger = logging.getLogger("test_auto_wechat_scan")
+    batches = [["a", "b"], RuntimeError("boom"), ["c"]]
+    calls = []
+
+    def run_once():
+        calls.append(1)
+        item = batches[len(calls) - 1]
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    # full-fetch 两轮：首轮成功后仍执行第二轮
+    assert run_scan_passes(run_once, 2, logger) == ["a", "b"]
+    assert len(calls) == 2
+    calls.clear()
+    batches = [["a"], ["b"]]
+    assert run_scan_passes(run_once, 2, logger) == ["a", "b"]
+    assert run_scan_passes(lambda: ["x"], 1, logger) == ["x"]
+
+
+def test_raw_region_input_flag_sets_ocr_config():
+    logger = logging.getLogger("test_auto_wechat_scan")
+    controller = SimpleNamespace(ocr=SimpleNamespace(config=OCRConfig()))
+    apply_cli_overrides(controller, parse_cli_args([]), logger)
+    assert controller.ocr.config.prefer_raw_region_input is False
+    apply_cli_overrides(controller, parse_cli_args(["--raw-region-input"]), logger)
+    assert controller.ocr.config.prefer_raw_region_input is True
+
+
+def test_ocr_pipeline_is_opt_in():
+    assert parse_cli_args([]).workers == 1
+    assert parse_cli_args(["--workers", "4"]).workers == 4
@@ -0,0 +1,21 @@
+import pytest
+from PIL import Image
+
+import check_image_content
+
+
+@pytest.mark.parametrize("mode", ["P", "1", "RGB"])
+def test_analyze_image_saves_preview_for_palette_and_bilevel_images(tmp_path, mode):
+    src = tmp_path / f"shot_{mode}.png"
+    image = Image.new("RGB", (900, 500), (255, 255, 255))
+    image.paste((0, 128, 0), (100, 100, 400, 300))
+    if mode == "P":
+        image = image.convert("P", palette=Image.Palette.ADAPTIVE, colors=16)
+    else:
+        image = image.convert(mode)
+    image.save(src)
+
+    assert check_image_content.analyze_image(str(src), compute_stats=False, save_preview=True) is True
+    with Image.open("/tmp/image_preview_thumbnail.png") as preview:
+        assert max(preview.size) <= 200
+        assert preview.mode == mode
@@ -26,4 +26,11 @@ def test_clear_dedup_index(tmp_path):
     sm.save_messages([m1], filename_prefix="clear2")
     assert index_path.exists()
     index = json.loads(index_path.read_text(encoding="utf-8"))
-    assert "c1" in set(index)
\ No newline at end of file
+    assert "c1" in set(index)
+
+def test_read_dedup_index_falls_back_to_stdlib_json(tmp_path):
+    sm = StorageManager(OutputConfig(format="json", directory=str(tmp_path), enable_deduplication=True))
+    # 标准库可解析但 orjson 拒绝（NaN）或会转为 float（超出 64 位的整数）的内容
+    (tmp_path / ".dedup_index.json").write_text('["k1", NaN, 123456789012345678901234567890]', encoding="utf-8")
+    index = sm._read_dedup_index()
+    assert "k1" in index and 123456789012345678901234567890 in index
@@ -0,0 +1,361 @@
+import logging
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import cli.full_timeline_scan as fts
+from cli.full_timeline_scan import (
+    FullTimelineScanner,
+    _changed_strip,
+    _frame_dhash,
+    _frame_digest,
+    _key_fingerprint,
+    _apply_device_options,
+    _message_fingerprint,
+    build_parser,
+)
+from models.config import OCRConfig
+from models.data_models import Message, MessageType
+
+
+def _make_scanner(main_controller):
+    # 绕过 __init__，避免真实窗口定位与控制器初始化
+    scanner = FullTimelineScanner.__new__(FullTimelineScanner)
+    scanner.logger = logging.getLogger("test_full_timeline_scan")
+    scanner.main_controller = main_controller
+    scanner.tail_poll_interval = 2.0
+    scanner._stop_flag = False
+    scanner._signal_handlers_installed = False
+    scanner._last_saved_keyset = set()
+    scanner._last_frame_hash = None
+    scanner._last_frame_digest = None
+    scanner._last_frame = None
+    scanner._frame_cache = OrderedDict()
+    scanner._stream_buffer = []
+    scanner._stream_buffered = 0
+    scanner._stream_parts = 0
+    scanner.save_batch_size = 0
+    scanner._preview_messages = []
+    return scanner
+
+
+def test_frame_dhash_detects_change():
+    rng = np.random.RandomState(0)
+    img = Image.fromarray(rng.randint(0, 255, (300, 200, 3), dtype=np.uint8))
+    assert _frame_dhash(img) == _frame_dhash(img.copy())
+    changed = np.asarray(img).copy()
+    changed[250:, :] = 255  # 模拟底部新增一条消息
+    assert _frame_dhash(img) != _frame_dhash(Image.fromarray(changed))
+
+
+def test_frame_digest_distinguishes_frames_with_equal_dhash():
+    dark = Image.new("RGB", (200, 300), (40, 40, 40))
+    light = Image.new("RGB", (200, 300), (240, 240, 240))
+    # 纯色帧的 dHash 都为 0：不能作为帧缓存的身份
+    assert _frame_dhash(dark) == _frame_dhash(light)
+    assert _frame_digest(dark) != _frame_digest(light)
+    assert _frame_digest(dark) == _frame_digest(dark.copy())
+
+
+def test_poll_tail_frame_uses_exact_digest_for_cache_hits():
+    dark = Image.new("RGB", (200, 300), (40, 40, 40))
+    light = Image.new("RGB", (200, 300), (240, 240, 240))
+    frames = [dark, light]
+
+    class DummyController:
+        scroll = SimpleNamespace(capture_current_view=lambda: frames.pop(0))
+
+    scanner = _make_scanner(DummyController())
+    scanner.main_controller.scroll.screenshot_similarity = lambda *a, **k: 0.0
+    # 缓存中只有 dHash 相同、内容不同的画面，不应被视为已识别
+    scanner._frame_cache_put(_frame_digest(Image.new("RGB", (200, 300), (120, 120, 120))), [])
+    assert scanner._poll_tail_frame()[0] is True
+    scanner._frame_cache_put(_frame_digest(light), [])
+    # dHash 与上一帧相同（纯色帧均为 0）时由预检判定为未变化
+    assert scanner._poll_tail_frame() == (False, None)
+
+
+def test_tail_loop_caches_only_full_frame_results(monkeypatch):
+    scanner = _make_scanner(SimpleNamespace(run_once=lambda region=None: []))
+    # 第 1 轮仅识别变化条带，第 2 轮整屏识别；第 2 轮后停止
+    polls = [((True, (0, 10, 200, 20)), ("roi-frame",)), ((True, None), ("full-frame",))]
+
+    def fake_poll():
+        result, digest = polls.pop(0)
+        scanner._last_frame_digest = digest
+        scanner._stop_flag = not polls
+        return result
+
+    monkeypatch.setattr(scanner, "_poll_tail_frame", fake_poll)
+    monkeypatch.setattr(scanner, "_wait_until_next_poll", lambda deadline, interval: deadline)
+    monkeypatch.setattr(fts.signal, "signal", lambda *a, **k: None)
+    scanner._tail_realtime_monitor_loop()
+    assert list(scanner._frame_cache) == [("full-frame",)]
+
+
+def test_message_fingerprint_is_cached_on_instance(monkeypatch):
+    msg = Message(
+        id="m-1",
+        sender="对方",
+        content="你好",
+        message_type=MessageType.TEXT,
+        timestamp=datetime(2024, 10, 1, 9, 0),
+        confidence_score=0.9,
+        raw_ocr_text="你好",
+    )
+    calls = []
+    original = Message.stable_key
+
+    def counting_stable_key(self):
+        calls.append(self)
+        return original(self)
+
+    monkeypatch.setattr(Message, "stable_key", counting_stable_key)
+    assert _message_fingerprint(msg) == _key_fingerprint("m-1")
+    assert _message_fingerprint(msg) == _key_fingerprint("m-1")
+    assert len(calls) == 1
+
+
+def test_frame_cache_evicts_least_recently_used(monkeypatch):
+    scanner = _make_scanner(None)
+    monkeypatch.setattr(FullTimelineScanner, "FRAME_CACHE_SIZE", 2)
+    scanner._frame_cache_put(("f1",), [])
+    scanner._frame_cache_put(("f2",), [])
+    assert scanner._frame_cache_get(("f1",)) == []  # 刷新 f1 的使用顺序
+    scanner._frame_cache_put(("f3",), [])
+    assert list(scanner._frame_cache) == [("f1",), ("f3",)]
+    assert scanner._frame_cache_get(("f2",)) is None
+
+
+def _msg(i):
+    return Message(
+        id=f"m-{i}",
+        sender="对方",
+        content=f"消息{i}",
+        message_type=MessageType.TEXT,
+        timestamp=datetime(2024, 10, 1, 9, 0, i % 60),
+        confidence_score=0.9,
+        raw_ocr_text=f"消息{i}",
+    )
+
+
+def test_stream_state_saves_in_fixed_size_parts(monkeypatch):
+    class DummyController:
+        def run_once(self):
+            raise AssertionError("已流式处理的页不应触发 run_once")
+
+    scanner = _make_scanner(DummyController())
+    scanner.save_batch_size = 4
+    saved = []
+    monkeypatch.setattr(scanner, "_save_messages_ordered", lambda msgs, label: saved.append((label, len(msgs))))
+
+    states = [{"messages": [_msg(i), _msg(i + 100)]} for i in range(5)]
+    for state in states:
+        scanner._stream_state(state)
+    # 已流式处理的页不再持有消息，也不会在解析阶段被重复产出
+    assert all(st["streamed"] and st["messages"] == [] for st in states)
+    assert list(scanner._parse_results_to_messages(states)) == []
+
+    scanner._flush_stream_buffer()
+    assert saved == [
+        ("initial_full_timeline_part001", 4),
+        ("initial_full_timeline_part002", 4),
+        ("initial_full_timeline_part003", 2),
+    ]
+    assert len(scanner._preview_messages) == 10
+
+
+def test_stream_state_saves_single_file_by_default(monkeypatch):
+    scanner = _make_scanner(None)
+    saved = []
+    monkeypatch.setattr(scanner, "_save_messages_ordered", lambda msgs, label: saved.append((label, len(msgs))))
+
+    for i in range(600):
+        scanner._stream_state({"messages": [_msg(i)]})
+    assert saved == []
+    scanner._flush_stream_buffer()
+    assert saved == [("initial_full_timeline", 600)]
+    assert build_parser().parse_args([]).save_batch_size == 0
+
+
+def test_ocr_pipeline_is_opt_in():
+    assert build_parser().parse_args([]).workers == 1
+    assert build_parser().parse_args(["--workers", "3"]).workers == 3
+
+
+def test_changed_strip_returns_bottom_strip_after_upward_shift():
+    rng = np.random.RandomState(1)
+    prev = rng.randint(0, 255, (400, 120), dtype=np.uint8)
+    new_rows = rng.randint(0, 255, (50, 120), dtype=np.uint8)
+    cur = np.vstack([prev[50:], new_rows])
+    x, y, w, h = _changed_strip(prev, cur, margin=0)
+    assert (x, y, w, h) == (0, 350, 120, 50)
+
+
+def test_changed_strip_falls_back_to_full_frame():
+    rng = np.random.RandomState(2)
+    prev = rng.randint(0, 255, (400, 120), dtype=np.uint8)
+    # 无上一帧、尺寸变化或整屏变化时返回 None
+    assert _changed_strip(None, prev) is None
+    assert _changed_strip(prev, prev[:300]) is None
+    assert _changed_strip(prev, 255 - prev) is None
+    # 仅局部变化（无整体上移）时返回变化行范围
+    cur = prev.copy()
+    cur[100:120] = 255 - cur[100:120]
+    assert _changed_strip(prev, cur, margin=0) == (0, 100, 120, 20)
+
+
+def test_tail_loop_skips_ocr_and_backs_off_when_frame_unchanged(monkeypatch):
+    frame = Image.new("RGB", (200, 300), (240, 240, 240))
+
+    class DummyScroll:
+        def capture_current_view(self):
+            return frame
+
+    class DummyController:
+        scroll = DummyScroll()
+        run_once_calls = 0
+
+        def run_once(self):
+            DummyController.run_once_calls += 1
+            return []
+
+    scanner = _make_scanner(DummyController())
+    sleeps = []
+    clock = [100.0]
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+        if len(sleeps) >= 8:
+            scanner._stop_flag = True
+
+    monkeypatch.setattr(fts.time, "sleep", fake_sleep)
+    monkeypatch.setattr(fts.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(fts.signal, "signal", lambda *a, **k: None)
+    scanner._tail_realtime_monitor_loop()
+
+    # 仅首帧执行 OCR，其余轮次画面未变化均跳过
+    assert DummyController.run_once_calls == 1
+    # 前几次空闲保持基础间隔，随后按倍率退避且不超过上限
+    assert sleeps[:3] == [2.0, 2.0, 2.0]
+    assert sleeps[3] == 3.0
+    assert max(sleeps) <= FullTimelineScanner.TAIL_MAX_POLL_INTERVAL
+    assert sleeps == sorted(sleeps)
+
+
+def test_poll_tail_frame_ignores_render_noise_but_detects_new_bubble():
+    from services.auto_scroll_controller import AutoScrollController
+
+    rng = np.random.RandomState(3)
+    base = np.full((600, 400), 235, dtype=np.uint8)
+    for top in range(20, 420, 80):  # 若干已有气泡
+        base[top:top + 50, 40:40 + rng.randint(120, 300)] = rng.randint(0, 120)
+    noisy = np.clip(base.astype(np.int16) + rng.randint(-2, 3, base.shape), 0, 255).astype(np.uint8)
+    with_bubble = noisy.copy()
+    with_bubble[500:550, 200:380] = 90  # 底部新增一条消息
+
+    scroll = AutoScrollController()
+    frames = [Image.fromarray(base), Image.fromarray(noisy), Image.fromarray(with_bubble)]
+    scroll.capture_current_view = lambda: frames.pop(0)
+
+    class DummyController:
+        pass
+
+    controller = DummyController()
+    controller.scroll = scroll
+    scanner = _make_scanner(controller)
+
+    assert scanner._poll_tail_frame()[0] is True
+    reference = scanner._last_frame
+    # 仅有渲染噪声：视为无变化，且参考帧保持不变
+    assert scanner._poll_tail_frame() == (False, None)
+    assert scanner._last_frame is reference
+    changed, roi = scanner._poll_tail_frame()
+    assert changed is True
+    assert roi is not None and roi[1] <= 500 and roi[1] + roi[3] >= 550
+
+
+def test_build_parser_validates_chat_area(capsys):
+    args = build_parser().parse_args(["--chat-area", "-8, 20,300,400"])
+    assert args.chat_area == (-8, 20, 300, 400)
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["--chat-area", "1,2,3"])
+    assert "chat-area" in capsys.readouterr().err
+
+
+def test_cuda_available_probes_paddle(monkeypatch):
+    class _Device:
+        compiled = True
+        count = 1
+
+        def is_compiled_with_cuda(self):
+            return self.compiled
+
+    device = _Device()
+    device.cuda = SimpleNamespace(device_count=lambda: device.count)
+    monkeypatch.setitem(sys.modules, "paddle", SimpleNamespace(device=device))
+    assert fts._cuda_available() is True
+    device.count = 0
+    assert fts._cuda_available() is False
+    device.compiled = False
+    device.count = 1
+    assert fts._cuda_available() is False
+
+    monkeypatch.setitem(sys.modules, "paddle", None)  # 模拟未安装 paddle：导入抛出 ImportError
+    assert fts._cuda_available() is False
+
+
+def test_gpu_flag_sets_use_gpu_only_when_cuda_available(monkeypatch):
+    args = build_parser().parse_args(["--gpu"])
+    assert build_parser().parse_args([]).gpu is False
+
+    monkeypatch.setattr(fts, "_cuda_available", lambda: True)
+    cfg = OCRConfig()
+    _apply_device_options(cfg, args)
+    assert cfg.use_gpu is True and cfg.enable_mkldnn is False
+
+    monkeypatch.setattr(fts, "_cuda_available", lambda: False)
+    cfg = OCRConfig()
+    _apply_device_options(cfg, args)
+    assert cfg.use_gpu is False
+
+
+def test_mkldnn_flag_is_opt_in():
+    cfg = OCRConfig()
+    _apply_device_options(cfg, build_parser().parse_args([]))
+    assert cfg.enable_mkldnn is False
+    _apply_device_options(cfg, build_parser().parse_args(["--mkldnn"]))
+    assert cfg.enable_mkldnn is True
+
+
+def test_cudnn_search_flag_requires_available_gpu(monkeypatch):
+    monkeypatch.setattr(fts, "_cuda_available", lambda: True)
+    cfg = OCRConfig()
+    _apply_device_options(cfg, build_parser().parse_args(["--gpu", "--cudnn-search"]))
+    assert cfg.use_gpu is True and cfg.cudnn_exhaustive_search is True
+
+    monkeypatch.setattr(fts, "_cuda_available", lambda: False)
+    cfg = OCRConfig()
+    _apply_device_options(cfg, build_parser().parse_args(["--gpu", "--cudnn-search"]))
+    assert cfg.use_gpu is False and cfg.cudnn_exhaustive_search is False
+
+
+def test_wait_until_next_poll_accounts_for_work_time(monkeypatch):
+    scanner = _make_scanner(None)
+    clock = [10.0]
+    sleeps = []
+    monkeypatch.setattr(fts.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(fts.time, "sleep", lambda s: (sleeps.append(s), clock.__setitem__(0, clock[0] + s)))
+
+    clock[0] += 0.5  # 本轮工作耗时 0.5s
+    deadline = scanner._wait_until_next_poll(10.0, 2.0)
+    assert sleeps == [1.5] and deadline == 12.0
+    clock[0] += 5.0  # 工作耗时超过间隔：不睡眠并以当前时刻重新对齐
+    assert scanner._wait_until_next_poll(deadline, 2.0) == clock[0]
+    assert sleeps == [1.5]
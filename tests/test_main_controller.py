@@ -181,3 +181,510 @@ def test_save_image_messages_rejects_text_bubble(tmp_path):
     assert msg.message_type == MessageType.UNKNOWN
     images_dir = tmp_path / "images"
     assert not any(images_dir.glob("*.png"))
+
+
+def test_advanced_scan_skips_messages_in_shared_seen_keys(monkeypatch):
+    mc = MainController()
+
+    class DummyScroll:
+        def has_chat_area_override(self):
+            return True
+
+        def get_chat_area_bounds(self):
+            return Rectangle(x=0, y=0, width=200, height=200)
+
+    mc.scroll = DummyScroll()
+
+    class DummyOCR:
+        def is_engine_ready(self):
+            return True
+
+    mc.ocr = DummyOCR()
+
+    ts = datetime(2024, 10, 1, 9, 0, 0)
+    batch = [
+        Message(id=f"t{i}", sender="Tester", content=f"消息{i}", message_type=MessageType.TEXT,
+                timestamp=ts, confidence_score=0.9, raw_ocr_text=f"消息{i}")
+        for i in range(3)
+    ]
+
+    class DummyAdvancedScroll:
+        def __init__(self, on_state_captured, **kwargs):
+            self.on_state_captured = on_state_captured
+
+        def set_override_chat_area(self, rect):
+            return None
+
+        def progressive_scroll(self, direction, max_scrolls, target_content, stop_at_edges):
+            self.on_state_captured({"messages": list(batch), "screenshot": None})
+
+        def get_scroll_statistics(self):
+            return {}
+
+    import controllers.main_controller as mc_mod
+
+    monkeypatch.setattr(mc_mod, "AdvancedScrollController", DummyAdvancedScroll)
+    monkeypatch.setattr(mc, "_fill_message_times", lambda messages, direction="up": None)
+
+    seen = set()
+    first = mc.advanced_scan_chat_history(max_scrolls=1, seen_keys=seen)
+    delivered = []
+    second = mc.advanced_scan_chat_history(max_scrolls=1, seen_keys=seen, on_batch_parsed=delivered.extend)
+
+    assert len(first) == 3
+    assert seen == {m.stable_key() for m in batch}
+    assert second == []
+    assert delivered == []
+
+
+def _scan_message(i):
+    return Message(id=f"s{i}", sender="Tester", content=f"扫描{i}", message_type=MessageType.TEXT,
+                   timestamp=datetime(2024, 10, 1, 9, 0, 0), confidence_score=0.9, raw_ocr_text=f"扫描{i}")
+
+
+class _ScanScroll:
+    """iter_scan_chat_history 所需的最小滚动控制器替身：每次滚动前进一帧，到末帧后保持不变（视为边缘）"""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.pos = 0
+        self.scroll_delay = 0.0
+        self.scroll_speed = 3
+        self.events = []
+
+    def capture_current_view(self):
+        self.events.append("capture")
+        return self.frames[self.pos]
+
+    def optimize_screenshot_quality(self, img):
+        return img
+
+    def scroll_by_window_height(self, direction):
+        self.events.append("scroll")
+        self.pos = min(self.pos + 1, len(self.frames) - 1)
+        return True
+
+    def _compare_screenshots(self, a, b, threshold=0.95, max_side=None):
+        self.events.append(("compare", max_side))
+        return a is b
+
+    def stop_scrolling(self):
+        self.events.append("stop")
+
+
+def test_iter_scan_runs_ocr_in_background_and_stops_at_edge(monkeypatch, tmp_path):
+    import threading
+
+    monkeypatch.chdir(tmp_path)
+    mc = MainController()
+    frames = [Image.new("RGB", (40, 40), (i * 40, 0, 0)) for i in range(3)]
+    mc.scroll = _ScanScroll(frames)
+    ocr_threads = []
+
+    class DummyOCR:
+        def is_engine_ready(self):
+            return True
+
+        def prefers_raw_input(self):
+            return False
+
+        def detect_and_process_regions(self, img):
+            ocr_threads.append(threading.current_thread().name)
+            return [(frames.index(img), None)]
+
+    class DummyParser:
+        def parse(self, regions):
+            i = regions[0]
+            return [_scan_message(i), _scan_message(i + 10)]
+
+    mc.ocr = DummyOCR()
+    mc.pre = type("Pre", (), {"preprocess_for_ocr": lambda self, img, **kwargs: img})()
+    mc.parser = DummyParser()
+    monkeypatch.setattr(mc, "_save_image_messages", lambda messages, screenshot: None)
+
+    ids = [m.id for m in mc.iter_scan_chat_history(direction="down")]
+    # 最后一帧与确认帧相同 => 边缘：该帧消息仍先产出，随后停止
+    assert ids == ["s0", "s10", "s1", "s11", "s2", "s12"]
+    assert ocr_threads and all(name.startswith("scan-ocr") for name in ocr_threads)
+    # 每轮滚动后的截图复用为下一轮的截图：首帧 1 次 + 三轮滚动后各 1 次 + 边缘确认 1 次
+    assert mc.scroll.events.count("capture") == 5
+    # 边缘检测在缩小后的截图上比较
+    assert {e[1] for e in mc.scroll.events if isinstance(e, tuple)} == {256}
+    assert mc.scroll.events[-1] == "stop"
+
+
+def test_iter_scan_reuses_result_for_repeated_frame(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    mc = MainController()
+    first = Image.new("RGB", (40, 40), (10, 20, 30))
+    first.paste((200, 200, 200), (5, 5, 20, 12))
+    frames = [first, first.copy(), Image.new("RGB", (40, 40), (90, 0, 0))]
+    mc.scroll = _ScanScroll(frames)
+    ocr_inputs = []
+
+    class DummyOCR:
+        def is_engine_ready(self):
+            return True
+
+        def prefers_raw_input(self):
+            return False
+
+        def detect_and_process_regions(self, img):
+            ocr_inputs.append(img)
+            return [(len(ocr_inputs) - 1, None)]
+
+    class DummyParser:
+        def parse(self, regions):
+            return [_scan_message(regions[0])]
+
+    mc.ocr = DummyOCR()
+    mc.pre = type("Pre", (), {"preprocess_for_ocr": lambda self, img, **kwargs: img})()
+    mc.parser = DummyParser()
+    monkeypatch.setattr(mc, "_save_image_messages", lambda messages, screenshot: None)
+
+    ids = [m.id for m in mc.iter_scan_chat_history(direction="down", enable_deduplication=False)]
+    # 第二帧与第一帧像素一致：不再识别，复用第一帧的解析结果
+    assert len(ocr_inputs) == 2 and ocr_inputs[0] is frames[0] and ocr_inputs[1] is frames[2]
+    assert ids == ["s0", "s0", "s1"]
+
+
+def test_fill_message_times_uses_only_time_like_system_messages(monkeypatch):
+    from services.message_parser import MessageParser
+
+    mc = MainController()
+    parsed = []
+    real_parse = MessageParser.parse_wechat_time
+
+    def counting_parse(text, reference):
+        parsed.append(text)
+        return real_parse(text, reference)
+
+    monkeypatch.setattr(MessageParser, "parse_wechat_time", staticmethod(counting_parse))
+
+    def mk(content, t=MessageType.TEXT):
+        return Message(id=None, sender="A", content=content, message_type=t,
+                       timestamp=datetime(2024, 10, 1, 9, 0), confidence_score=0.9, raw_ocr_text=content)
+
+    sep = mk("昨天 10:05", MessageType.SYSTEM)
+    recalled = mk("你撤回了一条消息", MessageType.SYSTEM)
+    after = mk("晚点聊")
+    mc._fill_message_times([sep, recalled, after], direction="down")
+
+    assert parsed == ["昨天 10:05"]  # 每条时间分隔只解析一次，非时间系统消息不解析
+    assert recalled.message_time is None
+    assert after.message_time == sep.message_time
+    assert (sep.message_time.hour, sep.message_time.minute) == (10, 5)
+
+
+def test_messages_from_raw_resolves_types_and_shares_fallback_time():
+    from controllers.main_controller import _messages_from_raw
+
+    existing = _scan_message(0)
+    out = _messages_from_raw([
+        {"id": "a", "content": "x", "message_type": "image", "timestamp": "2024-10-01T09:00:00"},
+        {"content": "y", "message_type": MessageType.SYSTEM, "timestamp": "bad"},
+        {"content": "z", "message_type": "nope"},
+        existing,
+    ])
+    assert [m.message_type for m in out[:3]] == [MessageType.IMAGE, MessageType.SYSTEM, MessageType.TEXT]
+    assert out[0].id == "a" and out[0].timestamp == datetime(2024, 10, 1, 9, 0)
+    assert out[1].id and out[1].raw_ocr_text == "y" and out[1].sender == "未知"
+    assert out[1].timestamp is out[2].timestamp
+    assert out[3] is existing
+
+
+def test_scroll_to_top_captures_once_per_check(monkeypatch):
+    import controllers.main_controller as main_controller_module
+
+    mc = MainController()
+    frames = [Image.new("RGB", (40, 40), (i * 30, 0, 0)) for i in range(8)]
+    mc.scroll = _ScanScroll(frames)
+    mc.scroll.start_scrolling = mc.scroll.scroll_by_window_height
+    monkeypatch.setattr(main_controller_module.time, "sleep", lambda s: None)
+
+    mc.scroll_to_top()
+    # 预滚动 5 次后还需检查 3 轮：首轮截两次图，之后每轮复用上一轮滚动后的截图
+    assert mc.scroll.events.count("capture") == 4
+
+
+def test_iter_scan_shares_seen_keys_across_calls(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    mc = MainController()
+    frames = [Image.new("RGB", (40, 40), (i * 40, 0, 0)) for i in range(2)]
+
+    class DummyOCR:
+        def is_engine_ready(self):
+            return True
+
+        def prefers_raw_input(self):
+            return False
+
+        def detect_and_process_regions(self, img):
+            return [(frames.index(img), None)]
+
+    class DummyParser:
+        def parse(self, regions):
+            return [_scan_message(regions[0])]
+
+    mc.ocr = DummyOCR()
+    mc.pre = type("Pre", (), {"preprocess_for_ocr": lambda self, img, **kwargs: img})()
+    mc.parser = DummyParser()
+    monkeypatch.setattr(mc, "_save_image_messages", lambda messages, screenshot: None)
+
+    seen = set()
+    mc.scroll = _ScanScroll(frames)
+    first = mc.scan_chat_history(direction="down", seen_keys=seen)
+    mc.scroll = _ScanScroll(frames)
+    second = mc.scan_chat_history(direction="down", seen_keys=seen)
+    assert [m.id for m in first] == ["s0", "s1"]
+    assert second == [] and seen == {"s0", "s1"}
+
+
+def test_iter_scan_computes_keys_once_per_recognized_frame(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    mc = MainController()
+    first = Image.new("RGB", (40, 40), (10, 20, 30))
+    frames = [first, first.copy(), Image.new("RGB", (40, 40), (90, 0, 0))]
+    mc.scroll = _ScanScroll(frames)
+
+    class DummyOCR:
+        def is_engine_ready(self):
+            return True
+
+        def prefers_raw_input(self):
+            return False
+
+        def detect_and_process_regions(self, img):
+            return [(0 if img is first else 1, None)]
+
+    class DummyParser:
+        def parse(self, regions):
+            return [_scan_message(regions[0])]
+
+    mc.ocr = DummyOCR()
+    mc.pre = type("Pre", (), {"preprocess_for_ocr": lambda self, img, **kwargs: img})()
+    mc.parser = DummyParser()
+    monkeypatch.setattr(mc, "_save_image_messages", lambda messages, screenshot: None)
+    calls = []
+    original = Message.stable_key
+    monkeypatch.setattr(Message, "stable_key", lambda self: calls.append(self.id) or original(self))
+
+    ids = [m.id for m in mc.iter_scan_chat_history(direction="down")]
+    assert ids == ["s0", "s1"]
+    # 重复帧复用缓存的键：只有两次真实识别的结果计算 stable_key
+    assert calls == ["s0", "s1"]
+
+
+def test_iter_scan_capture_retry_skips_relocation_for_valid_window(monkeypatch, tmp_path):
+    import controllers.main_controller as main_controller_module
+
+    monkeypatch.chdir(tmp_path)
+    mc = MainController()
+    frame = Image.new("RGB", (40, 40), (0, 0, 0))
+
+    class FlakyScroll(_ScanScroll):
+        def capture_current_view(self):
+            self.events.append("capture")
+            return None if self.events.count("capture") == 1 else frame
+
+        def has_chat_area_override(self):
+            return False
+
+        def is_window_valid(self):
+            return True
+
+        def locate_wechat_window(self):
+            raise AssertionError("窗口仍有效时不应重定位")
+
+        def ensure_window_ready(self, retries=2, delay=0.3):
+            self.events.append("ready")
+            return True
+
+    mc.scroll = FlakyScroll([frame])
+    mc.ocr = type("OCR", (), {"is_engine_ready": lambda self: True})()
+    monkeypatch.setattr(mc, "_recognize_scan_frame", lambda screenshot: [_scan_message(0)])
+    sleeps = []
+    monkeypatch.setattr(main_controller_module.time, "sleep", lambda s: sleeps.append(s))
+
+    assert [m.id for m in mc.iter_scan_chat_history(direction="down", max_batches=1)] == ["s0"]
+    assert mc.scroll.events[:3] == ["capture", "ready", "capture"]
+    assert 0.3 not in sleeps
+
+
+def test_iter_scan_settle_wait_counts_debug_save_time(monkeypatch, tmp_path):
+    import controllers.main_controller as main_controller_module
+
+    monkeypatch.chdir(tmp_path)
+    mc = MainController()
+    frames = [Image.new("RGB", (40, 40), (i * 40, 0, 0)) for i in range(2)]
+    mc.scroll = _ScanScroll(frames)
+    mc.scroll.scroll_delay = 0.57
+    mc.ocr = type("OCR", (), {"is_engine_ready": lambda self: True})()
+    monkeypatch.setattr(mc, "_recognize_scan_frame", lambda screenshot: [_scan_message(frames.index(screenshot))])
+    clock = [100.0]
+    sleeps = []
+    monkeypatch.setattr(main_controller_module.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(main_controller_module.time, "sleep", lambda s: sleeps.append(round(s, 6)))
+    # 保存调试截图耗时 0.4s：只需再等待剩余的 0.2s
+    monkeypatch.setattr(mc, "_save_scan_debug_screenshot",
+                        lambda screenshot, batch_index: clock.__setitem__(0, clock[0] + 0.4))
+
+    assert [m.id for m in mc.iter_scan_chat_history(direction="down", max_batches=1)] == ["s0"]
+    assert sleeps == [0.2]
+
+
+def test_wait_for_wechat_foreground_returns_early(monkeypatch):
+    import controllers.main_controller as main_controller_module
+
+    clock = [0.0]
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(main_controller_module.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(main_controller_module.time, "sleep", fake_sleep)
+
+    class DummyScroll:
+        override = False
+        foreground_after = 0
+
+        def has_chat_area_override(self):
+            return self.override
+
+        def is_wechat_foreground(self):
+            return clock[0] >= self.foreground_after
+
+    mc = MainController()
+    mc.scroll = DummyScroll()
+    mc._wait_for_wechat_foreground(timeout=1.5)
+    assert sleeps == []  # 已在前台：不等待
+
+    mc.scroll.foreground_after = 0.2
+    mc._wait_for_wechat_foreground(timeout=1.5, interval=0.1)
+    assert len(sleeps) == 2  # 轮询到前台即返回
+
+    sleeps.clear()
+    clock[0] = 0.0
+    mc.scroll.foreground_after = 99
+    mc._wait_for_wechat_foreground(timeout=1.5, interval=0.5)
+    assert sleeps == [0.5, 0.5, 0.5]  # 始终未前置：等满超时后继续
+
+    sleeps.clear()
+    mc.scroll.override = True
+    mc._wait_for_wechat_foreground(timeout=1.5)
+    assert sleeps == []  # 聊天区域覆盖：跳过等待
+
+
+def test_recognize_scan_frame_skips_preprocess_when_engine_prefers_raw_input():
+    mc = MainController()
+    frame = Image.new("RGB", (40, 40), (0, 0, 0))
+    seen = []
+
+    class DummyOCR:
+        def prefers_raw_input(self):
+            return True
+
+        def detect_and_process_regions(self, img):
+            seen.append(img)
+            return [("region", None)]
+
+    class NoPreprocess:
+        def preprocess_for_ocr(self, img, **kwargs):
+            raise AssertionError("偏好原始输入时不应整图预处理")
+
+    mc.scroll = _ScanScroll([frame])
+    mc.ocr = DummyOCR()
+    mc.pre = NoPreprocess()
+    mc.parser = type("Parser", (), {"parse": lambda self, regions: []})()
+
+    assert mc._recognize_scan_frame(frame) == []
+    assert seen == [frame]
+
+
+def test_acquire_text_regions_falls_back_in_order_and_short_circuits():
+    mc = MainController()
+    calls = []
+
+    class DummyOCR:
+        def __init__(self, full_result):
+            self.full_result = full_result
+
+        def detect_and_process_regions(self, img):
+            calls.append(("regions", img))
+            raise RuntimeError("boom")
+
+        def extract_text_regions(self, img, preprocess=True):
+            calls.append(("full", img, preprocess))
+            return self.full_result if preprocess else ["raw"]
+
+    mc.ocr = DummyOCR([])
+    assert mc._acquire_text_regions("pre", "opt") == ["raw"]
+    assert calls == [("regions", "pre"), ("full", "pre", True), ("full", "opt", False)]
+
+    calls.clear()
+    mc.ocr = DummyOCR(["full"])
+    assert mc._acquire_text_regions("pre", "opt") == ["full"]
+    assert calls == [("regions", "pre"), ("full", "pre", True)]
+
+
+def test_fill_message_times_walks_up_scan_from_oldest():
+    mc = MainController()
+
+    def mk(content, t=MessageType.TEXT):
+        return Message(id=None, sender="A", content=content, message_type=t,
+                       timestamp=datetime(2024, 10, 1, 9, 0), confidence_score=0.9, raw_ocr_text=content)
+
+    newer, sep, older = mk("新消息"), mk("10:05", MessageType.SYSTEM), mk("旧消息")
+    # 向上扫描的捕获顺序为 新 -> 旧：时间分隔只作用于其后（更新）的消息
+    mc._fill_message_times([newer, sep, older], direction="up")
+    assert (newer.message_time.hour, newer.message_time.minute) == (10, 5)
+    assert older.message_time != newer.message_time
+
+
+def test_scan_multiple_chats_counts_per_chat_and_dedups_globally(monkeypatch, tmp_path):
+    import controllers.main_controller as mc_mod
+
+    mc = MainController()
+    shared = Message(id="same", sender="A", content="重复内容", message_type=MessageType.TEXT,
+                     timestamp=datetime(2024, 1, 1, 9, 0), confidence_score=0.9, raw_ocr_text="重复内容")
+    only_b = Message(id="b-1", sender="B", content="仅 B", message_type=MessageType.TEXT,
+                     timestamp=datetime(2024, 1, 1, 9, 1), confidence_score=0.9, raw_ocr_text="仅 B")
+    per_chat = {"A": [shared], "B": [shared, only_b]}
+    current = []
+    calls = []
+
+    class DummyScroll:
+        def ensure_window_ready(self):
+            return True
+
+        def click_session_by_text(self, title, ocr):
+            current[:] = [title]
+            return True
+
+    class DummyOCR:
+        def is_engine_ready(self):
+            return True
+
+    def fake_scan_chat_history(**kwargs):
+        # 每个会话的扫描只基于本会话结果计数，不接收跨会话的全局键集合
+        calls.append(kwargs)
+        return list(per_chat[current[0]])
+
+    class DummyStorage:
+        def __init__(self, output_config=None):
+            pass
+
+        def save_messages(self, messages, filename_prefix="x"):
+            return tmp_path / "out.json"
+
+    mc.scroll = DummyScroll()
+    mc.ocr = DummyOCR()
+    monkeypatch.setattr(mc, "scan_chat_history", fake_scan_chat_history)
+    monkeypatch.setattr(mc_mod, "StorageManager", DummyStorage)
+    monkeypatch.setattr(mc_mod.time, "sleep", lambda s: None)
+
+    result = mc.scan_multiple_chats(["A", "B"], per_chat_max_messages=10, formats=["json"], output_dir=str(tmp_path))
+    assert all(kw.get("seen_keys") is None for kw in calls)
+    assert [m.id for m in result if m.message_type != MessageType.SYSTEM] == ["same", "b-1"]
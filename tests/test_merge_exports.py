@@ -0,0 +1,272 @@
+import csv
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import cli.merge_exports as merge_exports_mod
+from cli.merge_exports import (
+    _iter_file_messages,
+    _is_time_only_separator,
+    _normalize_text,
+    _normalize_timestamp,
+    _stable_key,
+    discover_input_files,
+    exclude_fields,
+    iter_messages_from_file,
+    merge_messages,
+    save_csv,
+    save_json,
+    save_markdown,
+)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["2024年10月1日", "10月1日 09:30", "09:30", "星期三", "周日 8:05", "昨天 12:00", "下午 3:15", "PM 3:15", "2024/10/01", "2024-10-01 09:30"],
+)
+def test_time_only_separator_matches_common_formats(text):
+    assert _is_time_only_separator(text)
+
+
+@pytest.mark.parametrize("text", ["１２:３０", "１２：３０", "２０２４年１月１日", "٣:٤٥"])
+def test_time_only_separator_matches_unicode_digits(text):
+    # 与原逐条正则（\d 匹配任意 Unicode 十进制数字）的行为保持一致
+    assert _is_time_only_separator(text)
+
+
+@pytest.mark.parametrize("text", ["", "你好", "12345", "明天 9:00 开会", "周末去哪"])
+def test_time_only_separator_keeps_regular_messages(text):
+    assert not _is_time_only_separator(text)
+
+
+def test_normalize_text_strips_zero_width_and_collapses_whitespace():
+    assert _normalize_text("  时间\u200b：\t10\n\n点\u200f  ") == "时间: 10 点"
+    assert _normalize_text(None) == ""
+    assert _normalize_text(12) == "12"
+
+
+def test_normalize_text_returns_already_normalized_input_unchanged():
+    text = "今天下午开会, 记得带电脑 ok"
+    assert _normalize_text(text) is text
+    assert _normalize_text("全角\u3000空格") == "全角 空格"
+    assert _normalize_text("不换行\xa0空格") == "不换行 空格"
+
+
+def _write_export(path, messages):
+    path.write_text(json.dumps(messages, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_merge_messages_dedups_across_files_and_sorts_by_time(tmp_path):
+    a = _write_export(tmp_path / "a.json", [
+        {"sender": "张三", "content": "晚安", "timestamp": "2024-10-01T22:00:00"},
+        {"sender": "李四", "content": "早", "timestamp": "2024-10-01 08:00:00.123"},
+        {"sender": "系统", "content": "10月1日 08:00", "timestamp": "2024-10-01T08:00:00"},
+    ])
+    b = _write_export(tmp_path / "b.json", [
+        {"sender": "李四 ", "content": "早", "timestamp": "2024-10-01T08:00:00"},
+        {"sender": "王五", "content": "无时间戳", "timestamp": "昨天"},
+        {"id": "x-1", "sender": "张三", "content": "你好", "timestamp": "2024-10-01T09:00:00"},
+        {"id": "x-1", "sender": "张三", "content": "你好（重复）", "timestamp": "2024-10-01T09:00:00"},
+    ])
+    merged = merge_messages([a, b], exclude_time_only=True)
+    assert [m["content"] for m in merged] == ["早", "你好", "晚安", "无时间戳"]
+
+    aggressive = merge_messages([a, b], aggressive_dedup=True)
+    assert sum(1 for m in aggressive if m["content"] == "早") == 1
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("2024-10-01T09:00:00", "2024-10-01T09:00:00"),
+        (" 2024-10-01 09:00:00.123 ", "2024-10-01T09:00:00"),
+        ("2024-1-5 8:05:09", "2024-01-05T08:05:09"),
+        ("2024-13-01T09:00:00", "2024-13-01T09:00:00"),
+        ("昨天", "昨天"),
+        ("", ""),
+    ],
+)
+def test_normalize_timestamp_fast_and_slow_paths(raw, expected):
+    assert _normalize_timestamp(raw) == expected
+
+
+def test_iter_messages_from_file_skips_non_dicts_and_survives_bad_json(tmp_path, capsys):
+    good = _write_export(tmp_path / "good.json", [{"content": "a", "confidence_score": 0.5}, "x", {"content": "b"}])
+    assert list(iter_messages_from_file(good)) == [{"content": "a", "confidence_score": 0.5}, {"content": "b"}]
+    bad = tmp_path / "bad.json"
+    bad.write_text("[{\"content\": ", encoding="utf-8")
+    assert list(iter_messages_from_file(str(bad))) == []
+    assert "加载失败" in capsys.readouterr().out
+
+
+def test_save_json_round_trips_unicode_and_falls_back_for_big_ints(tmp_path):
+    messages = [{"sender": "张三", "content": "你好 👋", "confidence_score": 0.9}]
+    out = tmp_path / "out.json"
+    save_json(messages, str(out))
+    text = out.read_text(encoding="utf-8")
+    assert "你好 👋" in text
+    assert json.loads(text) == messages
+
+    big = [{"id": 2 ** 70, "content": "x"}]
+    save_json(big, str(out))
+    assert json.loads(out.read_text(encoding="utf-8")) == big
+
+
+def test_save_csv_orders_common_fields_first(tmp_path):
+    messages = [
+        {"zeta": 1, "content": "a,b", "sender": "张三", "id": "1"},
+        {"content": "多行\n内容 \"引号\"", "sender": "李四", "id": "2"},
+    ]
+    out = tmp_path / "out.csv"
+    save_csv(messages, str(out))
+    with open(out, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["id", "sender", "content", "zeta"]
+    assert rows[1] == ["1", "张三", "a,b", "1"]
+    assert rows[2] == ["2", "李四", "多行\n内容 \"引号\"", ""]
+
+
+def test_save_markdown_writes_one_line_per_message(tmp_path):
+    out = tmp_path / "out.md"
+    save_markdown([{"timestamp": "2024-10-01T09:00:00", "sender": "张三", "content": "你好"}, {"content": "无发送者"}], str(out))
+    assert out.read_text(encoding="utf-8") == (
+        "# 合并导出（部分片段）\n\n- [2024-10-01T09:00:00] 张三: 你好\n- [] : 无发送者\n"
+    )
+
+
+def test_load_falls_back_to_stdlib_for_nan_and_big_ints(tmp_path, monkeypatch):
+    monkeypatch.setattr(merge_exports_mod, "ijson", None)
+    path = tmp_path / "special.json"
+    path.write_text(
+        '[{"id": 123456789012345678901234567890, "content": "a", "score": NaN},'
+        ' {"id": 2, "content": "b", "score": Infinity}]',
+        encoding="utf-8",
+    )
+    msgs = list(iter_messages_from_file(str(path)))
+    assert [m["id"] for m in msgs] == [123456789012345678901234567890, 2]
+    assert isinstance(msgs[0]["id"], int)
+    assert msgs[0]["score"] != msgs[0]["score"] and msgs[1]["score"] == float("inf")
+    assert merge_exports_mod.load_messages_from_file(str(path)) == msgs
+
+
+def test_iter_messages_from_file_streams_via_ijson_with_floats(tmp_path, monkeypatch):
+    path = _write_export(tmp_path / "stream.json", [{"content": "a", "score": 0.5}, 7, {"content": "b"}])
+    calls, pulled = [], []
+
+    def fake_items(f, prefix, use_float=False):
+        calls.append((prefix, use_float))
+        for item in json.load(f):
+            pulled.append(item)
+            yield item
+
+    monkeypatch.setattr(merge_exports_mod, "ijson", SimpleNamespace(items=fake_items))
+    it = iter_messages_from_file(path)
+    assert next(it) == {"content": "a", "score": 0.5}
+    # 逐条拉取：首条消息产出时尚未读取后续元素
+    assert pulled == [{"content": "a", "score": 0.5}]
+    assert list(it) == [{"content": "b"}]
+    assert calls == [("item", True)]
+
+
+def test_iter_messages_from_file_real_ijson_yields_floats(tmp_path):
+    pytest.importorskip("ijson")
+    path = _write_export(tmp_path / "real.json", [{"content": "a", "confidence_score": 0.25}])
+    msgs = list(iter_messages_from_file(path))
+    assert msgs == [{"content": "a", "confidence_score": 0.25}]
+    assert type(msgs[0]["confidence_score"]) is float
+
+
+def test_merge_messages_parallel_loading_matches_sequential(tmp_path):
+    files = [
+        _write_export(tmp_path / f"part{i}.json", [
+            {"sender": "张三", "content": f"消息{j % 7}", "timestamp": f"2024-10-01T09:{j % 7:02d}:00"}
+            for j in range(i, i + 5)
+        ])
+        for i in range(6)
+    ]
+    sequential = merge_messages(files, max_workers=1)
+    assert merge_messages(files, max_workers=3) == sequential
+    assert len(sequential) == 7
+
+
+def test_parallel_prefetch_streams_through_bounded_queues(tmp_path, monkeypatch):
+    files = [
+        _write_export(tmp_path / f"big{i}.json", [
+            {"sender": "张三", "content": f"文件{i}消息{j}", "timestamp": "2024-10-01T09:00:00"} for j in range(50)
+        ])
+        for i in range(4)
+    ]
+    # 并行预取也必须逐条流式读取，不能回退到整文件加载
+    monkeypatch.setattr(merge_exports_mod, "load_messages_from_file", lambda fp: pytest.fail("不应整文件加载"))
+    monkeypatch.setattr(merge_exports_mod, "_PREFETCH_QUEUE_SIZE", 3)
+    expected = [m for fp in files for m in iter_messages_from_file(fp)]
+    assert list(_iter_file_messages(files, 2)) == expected
+
+    # 消费方提前结束时生产者线程应退出，不会阻塞在已满的队列上
+    it = _iter_file_messages(files, 3)
+    assert next(it) == expected[0]
+    it.close()
+
+
+def test_merge_messages_keeps_stable_order_for_equal_timestamps(tmp_path):
+    in_order = _write_export(tmp_path / "in_order.json", [
+        {"sender": "A", "content": "1", "timestamp": "2024-10-01T09:00:00"},
+        {"sender": "B", "content": "2", "timestamp": "2024-10-01T09:00:00"},
+        {"sender": "C", "content": "3", "timestamp": "2024-10-01T10:00:00"},
+    ])
+    shuffled = _write_export(tmp_path / "shuffled.json", [
+        {"sender": "D", "content": "4", "timestamp": "2024-10-01T09:30:00"},
+        {"sender": "E", "content": "5", "timestamp": "2024-10-01T09:00:00"},
+    ])
+    assert [m["content"] for m in merge_messages([in_order])] == ["1", "2", "3"]
+    assert [m["content"] for m in merge_messages([in_order, shuffled])] == ["1", "2", "5", "4", "3"]
+
+
+def test_exclude_fields_pops_in_place():
+    messages = [{"content": "a", "raw_ocr_text": "a", "confidence_score": 0.9}, {"content": "b"}]
+    result = exclude_fields(messages, ["raw_ocr_text", "confidence_score"])
+    assert result is messages
+    assert messages == [{"content": "a"}, {"content": "b"}]
+
+
+@pytest.mark.parametrize(
+    "mid, expected",
+    [("m-1", "id:m-1"), ("  m-1\n", "id:m-1"), (42, "id:42"), ("", "张三|2024-10-01T09:00:00|你好"), ("   ", "张三|2024-10-01T09:00:00|你好")],
+)
+def test_stable_key_prefers_id(mid, expected):
+    msg = {"id": mid, "sender": " 张三", "content": "你好", "timestamp": "2024-10-01 09:00:00"}
+    assert _stable_key(msg) == expected
+
+
+@pytest.mark.parametrize("exclude_time_only", [False, True])
+def test_merge_messages_pandas_engine_matches_python(tmp_path, exclude_time_only):
+    pytest.importorskip("pandas")
+    a = _write_export(tmp_path / "a.json", [
+        {"sender": "张三", "content": "晚安", "timestamp": "2024-10-01T22:00:00"},
+        {"sender": "李四", "content": "早", "timestamp": "2024-10-01 08:00:00.123"},
+        {"sender": "系统", "content": "10月1日 08:00", "timestamp": "2024-10-01T08:00:00"},
+        {"id": None, "sender": "王五", "content": "空 id", "timestamp": None},
+    ])
+    b = _write_export(tmp_path / "b.json", [
+        {"sender": "李四 ", "content": "早", "timestamp": "2024-10-01T08:00:00"},
+        {"sender": "王五", "content": "无时间戳", "timestamp": "昨天"},
+        {"id": "x-1", "sender": "张三", "content": "你好", "timestamp": "2024-10-01T09:00:00"},
+        {"id": "x-1", "content": "你好（重复）"},
+        {"id": None, "sender": "王五", "content": "另一个空 id"},
+        {"sender": "系统", "content": "10月1日 08:00", "timestamp": "2024-10-02T08:00:00"},
+    ])
+    expected = merge_messages([a, b], exclude_time_only=exclude_time_only, engine="python")
+    assert merge_messages([a, b], exclude_time_only=exclude_time_only, engine="pandas") == expected
+
+
+def test_discover_input_files_scans_directories(tmp_path):
+    (tmp_path / "b.json").write_text("[]", encoding="utf-8")
+    (tmp_path / "A.JSON").write_text("[]", encoding="utf-8")
+    (tmp_path / ".dedup_index.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("", encoding="utf-8")
+    (tmp_path / "dir.json").mkdir()
+    single = tmp_path / "b.json"
+    found = discover_input_files([str(tmp_path), str(single), ""])
+    assert found == sorted([str(tmp_path / "A.JSON"), str(single)])
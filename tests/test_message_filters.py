@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 
-from services.message_filters import filter_messages
+from services.message_filters import filter_messages, iter_filter_messages
 from models.data_models import Message, MessageType
 
 
@@ -45,4 +45,49 @@ def test_filter_by_time_range_and_types():
 
     out = filter_messages(msgs, start=start, end=end, types=[MessageType.TEXT])
     # only include t2 which is TEXT within [start, end]
-    assert len(out) == 1 and out[0].content == "t2"
\ No newline at end of file
+    assert len(out) == 1 and out[0].content == "t2"
+
+
+def test_iter_filter_messages_consumes_source_lazily():
+    base = datetime.now()
+    consumed = []
+
+    def source():
+        for i, sender in enumerate(["Alice", "Bob", "Alice"]):
+            consumed.append(i)
+            yield _mk_msg(sender, f"msg {i}", base + timedelta(seconds=i))
+
+    it = iter_filter_messages(source(), sender="alice")
+    first = next(it)
+    assert first.content == "msg 0" and consumed == [0]
+    assert [m.content for m in it] == ["msg 2"]
+
+
+def test_filter_contains_caseless_query_matches_raw_text():
+    base = datetime.now()
+    msgs = [
+        _mk_msg("张三", "明天开会 OK", base),
+        _mk_msg("李四", "不开会", base + timedelta(seconds=1)),
+        _mk_msg("王五", "Hello", base + timedelta(seconds=2)),
+    ]
+    assert [m.sender for m in filter_messages(msgs, contains="开会")] == ["张三", "李四"]
+    assert [m.sender for m in filter_messages(msgs, contains="会 ok")] == ["张三"]
+    assert [m.sender for m in filter_messages(msgs, sender="四")] == ["李四"]
+
+
+def test_time_range_rejects_before_sender_string_work():
+    class _Msg:
+        message_type = MessageType.TEXT
+        content = "x"
+        confidence_score = 0.9
+
+        def __init__(self, ts):
+            self.timestamp = ts
+
+        @property
+        def sender(self):
+            raise AssertionError("时间范围外的消息不应读取 sender")
+
+    base = datetime(2024, 10, 1, 9, 0)
+    msgs = [_Msg(base - timedelta(days=1)), _Msg(base + timedelta(days=1))]
+    assert filter_messages(msgs, sender="alice", start=base, end=base + timedelta(hours=1)) == []
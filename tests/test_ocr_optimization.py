@@ -51,7 +51,6 @@ class TestOCROptimization(unittest.TestCase):
         # Case 2: High quality score -> No CLAHE
         mock_score.return_value = 0.8
         mock_clahe.reset_mock()
-        
         self.preprocessor.preprocess_for_ocr(
             self.test_image,
             enhance_quality=True
@@ -74,5 +73,31 @@ class TestOCROptimization(unittest.TestCase):
         # Padding for L mode should be 255 (white)
         self.assertEqual(processed.getpixel((0, 0)), 255)
 
+    @patch('services.image_preprocessor.ImagePreprocessor.reduce_noise')
+    def test_preprocess_result_cached_by_content_and_params(self, mock_noise):
+        """Identical frames reuse the cached result; changed content or params rerun the pipeline."""
+        mock_noise.side_effect = lambda img, method="bilateral": img
+
+        first = self.preprocessor.preprocess_for_ocr(self.test_image, enhance_quality=False, use_cache=True)
+        again = self.preprocessor.preprocess_for_ocr(self.test_image.copy(), enhance_quality=False, use_cache=True)
+        self.assertEqual(mock_noise.call_count, 1)
+        self.assertIsNot(first, again)  # callers always receive their own copy
+        self.assertEqual(first.tobytes(), again.tobytes())
+
+        self.preprocessor.preprocess_for_ocr(self.test_image, enhance_quality=False, padding=2, use_cache=True)
+        changed = Image.new('RGB', (100, 100), color=(10, 10, 10))
+        self.preprocessor.preprocess_for_ocr(changed, enhance_quality=False, use_cache=True)
+        self.assertEqual(mock_noise.call_count, 3)
+
+    @patch('services.image_preprocessor.ImagePreprocessor.reduce_noise')
+    def test_preprocess_cache_is_opt_in(self, mock_noise):
+        """Without use_cache (e.g. per-crop preprocessing) every call reruns the pipeline and nothing is cached."""
+        mock_noise.side_effect = lambda img, method="bilateral": img
+
+        self.preprocessor.preprocess_for_ocr(self.test_image, enhance_quality=False)
+        self.preprocessor.preprocess_for_ocr(self.test_image, enhance_quality=False)
+        self.assertEqual(mock_noise.call_count, 2)
+        self.assertEqual(len(self.preprocessor._preprocess_cache), 0)
+
 if __name__ == '__main__':
     unittest.main()
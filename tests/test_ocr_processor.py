@@ -124,6 +124,40 @@ class TestOCRProcessor:
             show_log=False
         )
     
+    @patch('services.ocr_processor.PaddleOCR')
+    def test_initialize_engine_sets_cudnn_search_flag_only_for_gpu(self, mock_paddle_ocr, monkeypatch):
+        """仅在 use_gpu 且开启 cudnn_exhaustive_search 时经 paddle.set_flags 设置 cuDNN 穷举搜索。"""
+        calls = []
+        fake_paddle = Mock()
+        fake_paddle.set_flags.side_effect = lambda flags: calls.append(dict(flags))
+        monkeypatch.setitem(sys.modules, "paddle", fake_paddle)
+
+        assert OCRProcessor(OCRConfig(cudnn_exhaustive_search=True)).initialize_engine() is True
+        assert OCRProcessor(OCRConfig(use_gpu=True)).initialize_engine() is True
+        assert calls == []
+
+        assert OCRProcessor(OCRConfig(use_gpu=True, cudnn_exhaustive_search=True)).initialize_engine() is True
+        assert calls == [{"FLAGS_cudnn_exhaustive_search": True}]
+
+    def test_initialize_engine_passes_device_and_mkldnn_kwargs(self, monkeypatch):
+        """真实签名路径：GPU 时传 device="gpu"；CPU 时仅在 enable_mkldnn 开启时传 enable_mkldnn。"""
+        calls = []
+
+        class FakePaddleOCR:
+            def __init__(self, lang="ch", use_gpu=False, show_log=False, device=None, enable_mkldnn=False):
+                calls.append({"lang": lang, "use_gpu": use_gpu, "device": device, "enable_mkldnn": enable_mkldnn})
+
+        monkeypatch.setattr("services.ocr_processor.PaddleOCR", FakePaddleOCR)
+
+        assert OCRProcessor(OCRConfig(use_gpu=True, enable_mkldnn=True)).initialize_engine() is True
+        assert calls[-1]["device"] == "gpu" and calls[-1]["use_gpu"] is True and calls[-1]["enable_mkldnn"] is False
+
+        assert OCRProcessor(OCRConfig()).initialize_engine() is True
+        assert calls[-1]["device"] is None and calls[-1]["enable_mkldnn"] is False
+
+        assert OCRProcessor(OCRConfig(enable_mkldnn=True)).initialize_engine() is True
+        assert calls[-1]["device"] is None and calls[-1]["enable_mkldnn"] is True
+
     @patch('services.ocr_processor.PaddleOCR')
     def test_initialize_engine_failure(self, mock_paddle_ocr, ocr_processor):
         """Test OCR engine initialization failure."""
@@ -490,3 +524,24 @@ def test_detect_and_process_regions_adds_media_placeholder_for_small_square(monk
     base = Image.new('RGB', (600, 800), color='white')
     results = processor.detect_and_process_regions(base, max_regions=10)
     assert any(tr.type in ("image", "sticker") for tr, _ in results)
+
+
+def test_recognize_batch_scatters_results_per_image():
+    processor = OCRProcessor(OCRConfig(language="ch", confidence_threshold=0.5))
+    calls = []
+
+    class FakeEngine:
+        def predict(self, inputs):
+            calls.append(len(inputs))
+            return [
+                {"rec_texts": [f"第{i}页"], "rec_scores": [0.9], "rec_polys": [[[0, 0], [10, 0], [10, 5], [0, 5]]]}
+                for i in range(len(inputs))
+            ]
+
+    processor.ocr_engine = FakeEngine()
+    images = [Image.new('RGB', (40, 20), color='white'), Image.new('L', (40, 20), color=255)]
+    batches = processor.recognize_batch(images)
+    # 两张图一次推理完成，结果按输入顺序拆分
+    assert calls == [2]
+    assert [[tr.text for tr in regions] for regions in batches] == [["第0页"], ["第1页"]]
+    assert processor.recognize_batch([]) == []
@@ -0,0 +1,122 @@
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_cli_does_not_load_heavy_dependencies():
+    code = (
+        "import sys, cli.run_extraction as m;"
+        "heavy = [n for n in ('controllers.main_controller', 'services.ocr_processor', 'numpy') if n in sys.modules];"
+        "assert not heavy, heavy;"
+        "assert m.ConfigManager.__name__ == 'ConfigManager'"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
+
+
+def test_parser_is_built_once_and_parsed_args_are_isolated():
+    from cli.run_extraction import build_parser
+
+    assert build_parser() is build_parser()
+    first = build_parser().parse_args(["--scan", "--batches", "3"])
+    assert first.scan is True and first.batches == 3
+    first.batches = 99
+    assert build_parser().parse_args(["--scan", "--batches", "3"]).batches == 3
+
+
+def test_build_output_override_merges_cli_and_config():
+    from cli.run_extraction import _build_output_override, build_parser
+    from models.config import AppConfig
+
+    app_cfg = AppConfig(output_format="csv", output_directory="/tmp/cfg_out", enable_deduplication=True)
+    args = build_parser().parse_args(["--formats", "json, md,", "--exclude-fields", "raw_ocr_text, ,confidence_score", "--no-dedup"])
+    override = _build_output_override(args, app_cfg)
+    assert override.format == "csv"
+    assert override.directory == "/tmp/cfg_out"
+    assert override.formats == ["json", "md"]
+    assert override.exclude_fields == ["raw_ocr_text", "confidence_score"]
+    assert override.enable_deduplication is False
+
+
+
+def test_cli_filters_return_input_unchanged_without_criteria():
+    from cli.run_extraction import _apply_cli_filters, _iter_cli_filters, build_parser
+
+    messages = [object(), object()]
+    args = build_parser().parse_args([])
+    assert _apply_cli_filters(messages, args) is messages
+    assert _iter_cli_filters(messages, args) is messages
+    # min_confidence=0.0 也属于有效条件，不能被当作“未设置”
+    assert build_parser().parse_args(["--min-confidence", "0"]).min_confidence == 0.0
+    assert _apply_cli_filters([], build_parser().parse_args(["--min-confidence", "0"])) == []
+
+def test_scan_dry_run_filters_stream_without_saving(tmp_path, monkeypatch, caplog):
+    import logging
+    from datetime import datetime
+
+    import cli.run_extraction as cli_mod
+    from models.config import AppConfig
+    from models.data_models import Message, MessageType
+
+    class DummyCfgMgr:
+        def get_config(self):
+            return AppConfig(output_format="json", output_directory=str(tmp_path))
+
+    class DummyController:
+        def iter_scan_chat_history(self, max_batches=None, direction="up", reporter=None):
+            for i, sender in enumerate(["Alice", "Bob", "alice"]):
+                yield Message(
+                    id=f"m-{i}", sender=sender, content=f"msg {i}", message_type=MessageType.TEXT,
+                    timestamp=datetime(2024, 10, 1, 9, 0, i), confidence_score=0.9, raw_ocr_text="",
+                )
+
+        def run_and_save(self, **kwargs):
+            raise AssertionError("dry-run must not save")
+
+    class DummyLoggingManager:
+        def setup(self, cfg):
+            pass  # 保留 pytest 的日志捕获处理器
+
+    monkeypatch.setattr(cli_mod, "ConfigManager", DummyCfgMgr)
+    monkeypatch.setattr(cli_mod, "LoggingManager", DummyLoggingManager)
+    monkeypatch.setattr(cli_mod, "MainController", DummyController)
+    monkeypatch.setattr(sys, "argv", ["prog", "--scan", "--dry-run", "--no-progress", "--sender", "ALICE"])
+
+    with caplog.at_level(logging.INFO, logger="cli.run_extraction"):
+        cli_mod.main()
+    assert "Dry-run: scanned 2 messages" in caplog.text
+    assert "Extraction finished, messages: 2" in caplog.text
+
+
+def test_parse_chat_area_accepts_padded_ints_and_rejects_malformed():
+    from cli.run_extraction import _parse_chat_area
+
+    assert _parse_chat_area(" -8, 20 ,300,400 ") == (-8, 20, 300, 400)
+    assert _parse_chat_area("1,2,3") is None
+    assert _parse_chat_area("1,2,3,4,5") is None
+    assert _parse_chat_area("1,2,3,x") is None
+    # 宽高必须非负，与其它 CLI 的 --chat-area 规则一致
+    assert _parse_chat_area("0,0,-300,400") is None
+    assert _parse_chat_area("0,0,300,-400") is None
+    assert _parse_chat_area("+1,2,3,4") is None
+
+
+def test_types_filter_resolves_names_and_ignores_invalid_value(caplog):
+    from cli.run_extraction import _iter_cli_filters, build_parser
+    from models.data_models import MessageType
+
+    class _Msg:
+        sender = content = ""
+        confidence_score = 1.0
+
+        def __init__(self, t):
+            self.message_type = t
+
+    msgs = [_Msg(MessageType.TEXT), _Msg(MessageType.IMAGE), _Msg(MessageType.SYSTEM)]
+    kept = list(_iter_cli_filters(msgs, build_parser().parse_args(["--types", " text, image ,"])))
+    assert [m.message_type for m in kept] == [MessageType.TEXT, MessageType.IMAGE]
+    # 含未知类型名时整体忽略 --types 并记录警告（与原有行为一致）
+    with caplog.at_level("WARNING"):
+        assert len(list(_iter_cli_filters(msgs, build_parser().parse_args(["--types", "TEXT,BOGUS"])))) == 3
+    assert "Invalid --types value" in caplog.text
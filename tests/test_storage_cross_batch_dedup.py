@@ -35,4 +35,44 @@ def test_cross_batch_dedup_json(tmp_path):
     index_path = tmp_path / ".dedup_index.json"
     assert index_path.exists()
     index = json.loads(index_path.read_text(encoding="utf-8"))
-    assert set(index) >= {"m1", "m2", "m3", "m4"}
\ No newline at end of file
+    assert set(index) >= {"m1", "m2", "m3", "m4"}
+
+def _msg(mid):
+    return Message(id=mid, sender="A", content=mid, message_type=MessageType.TEXT,
+                   timestamp=datetime.now(), confidence_score=0.9, raw_ocr_text=mid)
+
+
+def test_dedup_index_is_cached_between_saves_and_reloaded_on_external_change(tmp_path, monkeypatch):
+    sm = StorageManager(OutputConfig(format="json", directory=str(tmp_path), enable_deduplication=True))
+    reads = []
+    original_read = StorageManager._read_dedup_index
+    monkeypatch.setattr(StorageManager, "_read_dedup_index", lambda self: reads.append(1) or original_read(self))
+
+    sm.save_messages([_msg("m1")], filename_prefix="b1")
+    sm.save_messages([_msg("m2")], filename_prefix="b2")
+    assert reads == []  # 索引由本实例写入，后续保存直接复用内存集合
+
+    # 无新增键时不重写索引文件
+    index_path = tmp_path / ".dedup_index.json"
+    before = index_path.stat().st_mtime_ns
+    sm.save_messages([_msg("m1"), _msg("m2")], filename_prefix="b3")
+    assert index_path.stat().st_mtime_ns == before
+
+    # 其他进程改写了索引文件：签名变化后重新加载
+    index_path.write_text(json.dumps(["m1", "m2", "m9"]), encoding="utf-8")
+    path = sm.save_messages([_msg("m9"), _msg("m3")], filename_prefix="b4")
+    assert reads == [1]
+    assert [d["id"] for d in json.loads(path.read_text(encoding="utf-8"))] == ["m3"]
+    assert set(json.loads(index_path.read_text(encoding="utf-8"))) == {"m1", "m2", "m3", "m9"}
+
+
+def test_save_computes_each_stable_key_once(tmp_path, monkeypatch):
+    sm = StorageManager(OutputConfig(format="json", directory=str(tmp_path), enable_deduplication=True))
+    calls = []
+    original = Message.stable_key
+    monkeypatch.setattr(Message, "stable_key", lambda self: calls.append(self.id) or original(self))
+
+    path = sm.save_messages([_msg("m1"), _msg("m2"), _msg("m1")], filename_prefix="keys")
+    # 批次内去重后的键直接用于持久化索引比对，不再二次生成
+    assert sorted(calls) == ["m1", "m1", "m2"]
+    assert [d["id"] for d in json.loads(path.read_text(encoding="utf-8"))] == ["m1", "m2"]
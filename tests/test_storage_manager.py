@@ -108,4 +108,47 @@ def test_output_dir_created(tmp_path: Path):
     storage = StorageManager(cfg)
     assert Path(cfg.directory).exists()
     path = storage.save_messages(make_messages(), filename_prefix="create_dir")
-    assert path.exists()
\ No newline at end of file
+    assert path.exists()
+
+@pytest.mark.unit
+def test_save_messages_fast_json_matches_stdlib(tmp_path: Path):
+    pytest.importorskip("orjson")
+    plain = StorageManager(OutputConfig(format="json", directory=str(tmp_path / "plain"), enable_deduplication=False))
+    fast = StorageManager(OutputConfig(format="json", directory=str(tmp_path / "fast"), enable_deduplication=False, fast_json=True))
+
+    plain_path = plain.save_messages(make_messages(), filename_prefix="plain")
+    fast_path = fast.save_messages(make_messages(), filename_prefix="fast")
+
+    fast_text = fast_path.read_text(encoding="utf-8")
+    assert "你好" in fast_text  # 非 ASCII 字符不转义
+    assert json.loads(fast_text) == json.loads(plain_path.read_text(encoding="utf-8"))
+
+
+@pytest.mark.unit
+def test_fast_json_falls_back_to_stdlib_for_unsupported_values(tmp_path: Path):
+    pytest.importorskip("orjson")
+    msgs = make_messages()
+    msgs[0].id = 2 ** 70  # 超过 64 位的整数：orjson 抛出 TypeError
+    fast = StorageManager(OutputConfig(format="json", directory=str(tmp_path / "fast"), enable_deduplication=False, fast_json=True))
+
+    path = fast.save_messages(msgs, filename_prefix="big_int")
+    assert json.loads(path.read_text(encoding="utf-8"))[0]["id"] == 2 ** 70
+
+    append_path = tmp_path / "fast" / "append.json"
+    fast.append_messages_to_file(msgs, append_path, "json")
+    lines = append_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == len(msgs) and json.loads(lines[0])["id"] == 2 ** 70
+
+
+@pytest.mark.unit
+def test_save_messages_json_exclude_fields(tmp_path: Path):
+    cfg = OutputConfig(format="json", directory=str(tmp_path / "excl"), enable_deduplication=False,
+                       exclude_fields=["raw_ocr_text", "confidence_score", "not_a_field"])
+    storage = StorageManager(cfg)
+    assert storage._excluded_fields() == frozenset({"raw_ocr_text", "confidence_score", "not_a_field"})
+
+    path = storage.save_messages(make_messages(), filename_prefix="excl")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert len(data) == 3
+    for d in data:
+        assert set(d.keys()) == {"id", "sender", "content", "message_type", "timestamp"}